@@ -0,0 +1,122 @@
+import os
+import random
+import shutil
+
+from mutagen.id3 import ID3, APIC, TIT2, TPE1, TALB, TPE2, TCON, TDRC, TRCK, TPOS, TCOM, TBPM, TPUB, TCOP
+
+# One MPEG-1 Layer III frame (128 kbps, 44.1 kHz) of silence
+_FRAME_HEADER = b"\xff\xfb\x90\x64"
+_FRAME_SIZE = 417
+_FRAME = _FRAME_HEADER + b"\x00" * (_FRAME_SIZE - len(_FRAME_HEADER))
+_FRAMES_PER_SECOND = 44100 / 1152
+
+_PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+# The optional text frames, in the order they are added as the tag density grows
+_OPTIONAL_FRAMES = [
+    (TALB, lambda i: f"Album {i // 10}"),
+    (TPE2, lambda i: f"Album Artist {i // 10}"),
+    (TCON, lambda i: "Hip-Hop"),
+    (TDRC, lambda i: str(1990 + i % 30)),
+    (TRCK, lambda i: str(i % 10 + 1)),
+    (TPOS, lambda i: "1"),
+    (TCOM, lambda i: f"Composer {i % 50}"),
+    (TBPM, lambda i: str(80 + i % 80)),
+    (TPUB, lambda i: f"Label {i % 5}"),
+    (TCOP, lambda i: f"(c) {1990 + i % 30} Label {i % 5}"),
+]
+
+SONGS_DIR = "songs"
+MIRROR_DIR = "mirror"
+COVERS_DIR = "covers"
+
+
+class LibrarySpec:
+    def __init__(self, num_files=200, tag_density=0.5, cover_bytes=32 * 1024, embedded_covers=1.0,
+                 depth=2, fanout=4, seconds=2.0, seed=0):
+        """
+        Describes a synthetic MP3 library. Every file is named "{TITLE} - {ARTIST}.mp3" and has
+        its title and artist set, so every operation has something to do.
+        :param num_files: The number of MP3 files
+        :param tag_density: The fraction of the optional text tags set on each file, from 0 to 1
+        :param cover_bytes: The size of each cover image in bytes
+        :param embedded_covers: The fraction of files that already have a cover art, from 0 to 1
+        :param depth: The number of folder levels the files are spread over. 0 keeps every file at the top
+        :param fanout: The number of subfolders in each folder
+        :param seconds: The length of the audio in each file
+        :param seed: The seed of the random data, so that the same spec always builds the same library
+        """
+        if not 0 <= tag_density <= 1 or not 0 <= embedded_covers <= 1:
+            raise ValueError("The tag density and the fraction of embedded covers must be between 0 and 1")
+        self.num_files = num_files
+        self.tag_density = tag_density
+        self.cover_bytes = cover_bytes
+        self.embedded_covers = embedded_covers
+        self.depth = depth
+        self.fanout = fanout
+        self.seconds = seconds
+        self.seed = seed
+
+    def to_dict(self) -> dict:
+        return dict(vars(self))
+
+
+def generate_library(root: str, spec: LibrarySpec) -> None:
+    """
+    Generates a synthetic library, replacing anything already at the root. The root holds:
+    `songs`, the tagged MP3 files spread over nested folders;
+    `mirror`, untagged copies of the files with the same names, for copy_tags;
+    `covers`, one image per file named after the file, for set_cover_art.
+    :param root: The folder to generate the library in
+    :param spec: The library to generate
+    """
+    shutil.rmtree(root, ignore_errors=True)
+    rng = random.Random(spec.seed)
+    audio = _FRAME * max(int(spec.seconds * _FRAMES_PER_SECOND), 1)
+    num_optional = round(spec.tag_density * len(_OPTIONAL_FRAMES))
+    num_embedded = round(spec.embedded_covers * spec.num_files)
+
+    for i in range(spec.num_files):
+        title, artist = f"Song {i:06d}", f"Artist {i % 97:02d}"
+        name = f"{title} - {artist}.mp3"
+        folder = _folder_for(i, spec.depth, spec.fanout)
+
+        song_path = os.path.join(root, SONGS_DIR, folder, name)
+        mirror_path = os.path.join(root, MIRROR_DIR, folder, name)
+        for path in (song_path, mirror_path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "wb") as file:
+                file.write(audio)
+
+        id3 = ID3()
+        id3.add(TIT2(encoding=3, text=title))
+        id3.add(TPE1(encoding=3, text=artist))
+        for frame_cls, value in _OPTIONAL_FRAMES[:num_optional]:
+            id3.add(frame_cls(encoding=3, text=value(i)))
+        if i < num_embedded:
+            id3.add(APIC(encoding=3, mime="image/png", type=3, desc="Cover", data=_image(rng, spec.cover_bytes)))
+        id3.save(song_path)
+
+        cover_path = os.path.join(root, COVERS_DIR, folder, f"{title} - {artist}.png")
+        os.makedirs(os.path.dirname(cover_path), exist_ok=True)
+        with open(cover_path, "wb") as file:
+            file.write(_image(rng, spec.cover_bytes))
+
+
+def _folder_for(i: int, depth: int, fanout: int) -> str:
+    """
+    Internal function that spreads the files evenly over the leaf folders
+    """
+    parts = []
+    for level in range(depth):
+        parts.append(f"d{level}_{i % fanout}")
+        i //= fanout
+    return os.path.join(*parts) if parts else ""
+
+
+def _image(rng: random.Random, size: int) -> bytes:
+    """
+    Internal function that makes a PNG-signed blob of random bytes. It is never decoded, so it only
+    needs to be recognized as an image.
+    """
+    return _PNG_SIGNATURE + rng.randbytes(max(size - len(_PNG_SIGNATURE), 0))
@@ -0,0 +1,247 @@
+"""
+Times the batch operations of EasyMP3 on a synthetic library and records the results as JSON,
+so that runs on different versions can be compared.
+
+    python -m benchmarks.run --files 1000 --output results.json
+    python -m benchmarks.run --files 1000 --compare results.json
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from importlib import metadata
+from typing import Callable
+
+from easymp3 import BatchResult, EasyMP3, Tag
+
+from .library import COVERS_DIR, MIRROR_DIR, SONGS_DIR, LibrarySpec, generate_library
+
+SCHEMA_VERSION = 1
+
+# Each operation is given a tagger for the songs of a fresh copy of the library, and the root of the copy
+OPERATIONS: dict[str, Callable[[EasyMP3, str], BatchResult]] = {
+    "set_cover_art": lambda tagger, root: tagger.set_cover_art(
+        os.path.join(root, COVERS_DIR), show_output=False),
+    "copy_tags": lambda tagger, root: tagger.copy_tags(
+        os.path.join(root, MIRROR_DIR), show_output=False),
+    "set_filename_from_tags": lambda tagger, root: tagger.set_filename_from_tags(
+        f"{Tag.ARTIST} - {Tag.TITLE}", show_output=False),
+    "extract_cover_arts": lambda tagger, root: tagger.extract_cover_arts(
+        os.path.join(root, "extracted"), show_output=False),
+    "remove_all_tags": lambda tagger, root: tagger.remove_all_tags(show_output=False),
+    # The sort tags are not set by the generator, so every file is written
+    "set_tags_from_filename": lambda tagger, root: tagger.set_tags_from_filename(
+        f"{Tag.TITLESORT} - {Tag.ARTISTSORT}", show_output=False),
+}
+
+
+def run_benchmarks(spec: LibrarySpec, operations: list[str], repeat=3, workers=1, workdir: str | None = None,
+                   progress: Callable[[str], None] | None = None) -> dict:
+    """
+    Generates a library once, then times every operation on a fresh copy of it, so that each
+    run starts from the same files. Only the operation itself is timed; the scan of the library
+    when the tagger is created is recorded separately.
+    :param spec: The library to generate
+    :param operations: The names of the operations to time. See OPERATIONS
+    :param repeat: The number of times each operation is timed
+    :param workers: The number of worker threads of the tagger
+    :param workdir: The folder to work in, or None for a temporary folder that is removed afterwards
+    :param progress: An optional function given a line of progress for every run
+    :return: The results, in the JSON format written by main
+    """
+    unknown = [name for name in operations if name not in OPERATIONS]
+    if unknown:
+        raise ValueError(f"Unknown operations: {', '.join(unknown)}")
+
+    own_workdir = workdir is None
+    workdir = tempfile.mkdtemp(prefix="easymp3-bench-") if own_workdir else workdir
+    try:
+        pristine = os.path.join(workdir, "pristine")
+        started = time.perf_counter()
+        generate_library(pristine, spec)
+        generate_seconds = time.perf_counter() - started
+
+        results = []
+        for name in operations:
+            runs = []
+            for i in range(repeat):
+                run = _run_once(name, pristine, os.path.join(workdir, "run"), workers)
+                runs.append(run)
+                if progress is not None:
+                    progress(f"{name} [{i + 1}/{repeat}]: {run['seconds']:.3f}s")
+            results.append(_summarize(name, runs))
+
+        return {
+            "schema": SCHEMA_VERSION,
+            "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "environment": _environment(),
+            "library": spec.to_dict(),
+            "workers": workers,
+            "repeat": repeat,
+            "generate_seconds": round(generate_seconds, 6),
+            "results": results,
+        }
+    finally:
+        if own_workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+
+def _run_once(name: str, pristine: str, root: str, workers: int) -> dict:
+    """
+    Internal function that times an operation once on a fresh copy of the library
+    """
+    shutil.rmtree(root, ignore_errors=True)
+    shutil.copytree(pristine, root)
+
+    started = time.perf_counter()
+    tagger = EasyMP3(os.path.join(root, SONGS_DIR), search_subfolders=True, workers=workers)
+    scan_seconds = time.perf_counter() - started
+
+    cpu_started = time.process_time()
+    started = time.perf_counter()
+    result = OPERATIONS[name](tagger, root)
+    seconds = time.perf_counter() - started
+    cpu_seconds = time.process_time() - cpu_started
+
+    return {
+        "seconds": seconds,
+        "cpu_seconds": cpu_seconds,
+        "scan_seconds": scan_seconds,
+        "files": result.total,
+        "written": result.written,
+        "unchanged": result.unchanged,
+        "skipped": result.skipped,
+        "failed": result.failed,
+        "bytes_read": result.bytes_read,
+        "bytes_written": result.bytes_written,
+    }
+
+
+def _summarize(name: str, runs: list[dict]) -> dict:
+    """
+    Internal function that reduces the runs of an operation to its timings and the outcome of the last run
+    """
+    seconds = [run["seconds"] for run in runs]
+    last = runs[-1]
+    median = statistics.median(seconds)
+    return {
+        "operation": name,
+        "seconds": [round(value, 6) for value in seconds],
+        "median_seconds": round(median, 6),
+        "min_seconds": round(min(seconds), 6),
+        "cpu_seconds": round(statistics.median(run["cpu_seconds"] for run in runs), 6),
+        "scan_seconds": round(statistics.median(run["scan_seconds"] for run in runs), 6),
+        "files_per_second": round(last["files"] / median, 2) if median > 0 else None,
+        **{key: last[key] for key in ("files", "written", "unchanged", "skipped", "failed",
+                                      "bytes_read", "bytes_written")},
+    }
+
+
+def _environment() -> dict:
+    """
+    Internal function that describes what the benchmarks ran on
+    """
+    try:
+        version = metadata.version("easymp3")
+    except metadata.PackageNotFoundError:
+        version = None
+    return {
+        "easymp3": version,
+        "commit": _git_commit(),
+        "mutagen": metadata.version("mutagen"),
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def _git_commit() -> str | None:
+    """
+    Internal function that gets the commit of the checkout being benchmarked, if it is a git checkout
+    """
+    try:
+        completed = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True,
+                                   cwd=os.path.dirname(os.path.abspath(__file__)))
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return completed.stdout.strip() or None
+
+
+def compare(baseline: dict, current: dict) -> list[str]:
+    """
+    Compares the median time of every operation with a previous run
+    :param baseline: The results of the previous run
+    :param current: The results of this run
+    :return: A line for every operation in both runs, with the ratio of the new time to the old one
+    """
+    if baseline.get("schema") != current.get("schema"):
+        raise ValueError(f"Cannot compare results of schema {baseline.get('schema')} "
+                         f"with results of schema {current.get('schema')}")
+    if baseline.get("library") != current.get("library"):
+        print("Warning: the baseline was run on a different library", file=sys.stderr)
+
+    old_times = {result["operation"]: result["median_seconds"] for result in baseline["results"]}
+    lines = []
+    for result in current["results"]:
+        old = old_times.get(result["operation"])
+        if old is None:
+            continue
+        new = result["median_seconds"]
+        ratio = new / old if old > 0 else float("inf")
+        lines.append(f"{result['operation']:<24} {old:>10.3f}s {new:>10.3f}s {ratio:>7.2f}x")
+    return lines
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.run", description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--files", type=int, default=200, help="The number of MP3 files in the library")
+    parser.add_argument("--tag-density", type=float, default=0.5,
+                        help="The fraction of the optional text tags set on each file, from 0 to 1")
+    parser.add_argument("--cover-bytes", type=int, default=32 * 1024, help="The size of each cover image in bytes")
+    parser.add_argument("--embedded-covers", type=float, default=1.0,
+                        help="The fraction of files that already have a cover art, from 0 to 1")
+    parser.add_argument("--depth", type=int, default=2, help="The number of folder levels the files are spread over")
+    parser.add_argument("--fanout", type=int, default=4, help="The number of subfolders in each folder")
+    parser.add_argument("--seconds", type=float, default=2.0, help="The length of the audio in each file")
+    parser.add_argument("--seed", type=int, default=0, help="The seed of the random data")
+    parser.add_argument("--operations", nargs="+", default=list(OPERATIONS), choices=list(OPERATIONS),
+                        metavar="OPERATION", help="The operations to time (default: all)")
+    parser.add_argument("--repeat", type=int, default=3, help="The number of times each operation is timed")
+    parser.add_argument("--workers", type=int, default=1, help="The number of worker threads of the tagger")
+    parser.add_argument("--workdir", help="The folder to generate the library in (default: a temporary folder)")
+    parser.add_argument("--output", help="The path to write the JSON results to (default: stdout)")
+    parser.add_argument("--compare", metavar="BASELINE", help="The JSON results of a previous run to compare with")
+    args = parser.parse_args(argv)
+
+    spec = LibrarySpec(num_files=args.files, tag_density=args.tag_density, cover_bytes=args.cover_bytes,
+                       embedded_covers=args.embedded_covers, depth=args.depth, fanout=args.fanout,
+                       seconds=args.seconds, seed=args.seed)
+    results = run_benchmarks(spec, args.operations, args.repeat, args.workers, args.workdir,
+                             progress=lambda line: print(line, file=sys.stderr))
+
+    output = json.dumps(results, indent=2)
+    if args.output is None:
+        print(output)
+    else:
+        with open(args.output, "w", encoding="utf-8") as file:
+            file.write(output + "\n")
+
+    if args.compare is not None:
+        with open(args.compare, encoding="utf-8") as file:
+            baseline = json.load(file)
+        print(f"{'operation':<24} {'baseline':>11} {'current':>11} {'ratio':>8}", file=sys.stderr)
+        for line in compare(baseline, results):
+            print(line, file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
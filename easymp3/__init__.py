@@ -1,6 +1,17 @@
+from .async_easymp3 import AsyncEasyMP3
+from .covers import CoverCache, CoverIndex
 from .easymp3 import EasyMP3
+from .events import Event, EventSink, PrintSink
+from .index import TagIndex
+from .journal import Journal
+from .padding import PaddingPolicy, SaveStats
+from .profiling import Profiler
+from .runner import BatchResult, FileResult
+from .session import EditSession
+from .table import TagTable
 from .tag import Tag
+from .template import Template
+from .transform import CoverTransform
+from .watch import Watcher
 
 import easymp3.exception
-
-
@@ -0,0 +1,229 @@
+import asyncio
+from typing import AsyncIterator, Callable, Literal
+
+from . import events
+from . import runner
+from .covers import CoverIndex
+from .easymp3 import EasyMP3, _ALL_TAGS, _COVER_FROM_FILENAME
+from .events import Event
+from .runner import BatchResult, FileResult
+from .tag import Tag
+from .template import Template
+from .transform import CoverTransform
+
+
+class Outcomes:
+    def __init__(self, tagger: EasyMP3, plan: Callable[[], Callable[[str], FileResult] | None],
+                 concurrency: int, operation: str, show_output=True,
+                 finish: Callable[[dict[str, str]], None] | None = None, args: dict | None = None):
+        """
+        The pending outcomes of an AsyncEasyMP3 batch operation. It can either be awaited for a
+        BatchResult, or iterated with `async for` to receive a FileResult for every file as soon
+        as it is done. The operation only starts when the outcomes are awaited or iterated, and
+        can only be consumed once.
+        :param tagger: The EasyMP3 object whose files are processed
+        :param plan: A function that validates the arguments of the operation and returns its
+                     per-file work. It is run in a worker thread.
+        :param concurrency: The maximum number of files processed at the same time
+        :param operation: The name of the batch operation, used in the events
+        :param show_output: Whether to show the console output if the tagger has no event sink
+        :param finish: An optional function run in a worker thread after every file is processed.
+                       It is given the old path of every renamed file mapped to its new path.
+        :param args: The arguments the operation was called with, so that the journal only resumes
+                     an unfinished run of the same call
+        """
+        self._tagger = tagger
+        self._plan = plan
+        self._concurrency = max(concurrency, 1)
+        self._operation = operation
+        self._show_output = show_output
+        self._finish = finish
+        self._args = args
+        self._consumed = False
+
+    def __aiter__(self) -> AsyncIterator[FileResult]:
+        return self._stream()
+
+    def __await__(self):
+        return self._collect().__await__()
+
+    async def _collect(self) -> BatchResult:
+        result = BatchResult()
+        async for file_result in self:
+            result.add(file_result)
+        return result
+
+    async def _stream(self) -> AsyncIterator[FileResult]:
+        if self._consumed:
+            raise RuntimeError("The outcomes of a batch operation can only be consumed once")
+        self._consumed = True
+
+        sink = self._tagger._sink(self._show_output)
+        func = await asyncio.to_thread(self._plan)
+        result = BatchResult()
+        if func is None:
+            sink(Event(events.FINISHED, self._operation, summary=result))
+            return
+        journal = self._tagger.journal
+        if journal is not None:
+            func = journal.track(func, self._operation, self._args)
+
+        pending = set()
+        try:
+            async for mp3_path in _iter_paths(self._tagger):
+                pending.add(asyncio.ensure_future(asyncio.to_thread(
+                    runner.run_file, func, mp3_path, sink, self._operation, self._tagger.profiler)))
+                if len(pending) >= self._concurrency:
+                    done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    for task in done:
+                        result.add(task.result())
+                        yield task.result()
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    result.add(task.result())
+                    yield task.result()
+        finally:
+            for task in pending:
+                task.cancel()
+
+        if journal is not None:
+            await asyncio.to_thread(journal.finish, result)
+        if self._finish is not None:
+            await asyncio.to_thread(self._finish, result.renamed)
+        sink(Event(events.FINISHED, self._operation, summary=result))
+
+
+async def _iter_paths(tagger: EasyMP3) -> AsyncIterator[str]:
+    """
+    Internal function that yields the paths to the MP3 files of a tagger, scanning in a worker thread
+    if the paths are not kept in memory
+    """
+    lazy = tagger.lazy
+    paths = tagger._iter_paths()
+    if not lazy:
+        for mp3_path in paths:
+            yield mp3_path
+        return
+    while (mp3_path := await asyncio.to_thread(next, paths, None)) is not None:
+        yield mp3_path
+
+
+class AsyncEasyMP3:
+    def __init__(self, tagger: EasyMP3, concurrency=8):
+        """
+        An asyncio front-end for an EasyMP3 object. Every batch method of EasyMP3 is mirrored,
+        but returns Outcomes that can be awaited for a BatchResult or iterated with `async for`
+        to receive the outcome of every file as soon as it is done. The blocking work runs in
+        worker threads, with at most `concurrency` files processed at the same time.
+        :param tagger: The EasyMP3 object whose files are processed
+        :param concurrency: The maximum number of files processed at the same time
+        """
+        self._tagger = tagger
+        self._concurrency = concurrency
+
+    @classmethod
+    async def open(cls, directory: str, search_subfolders=False, concurrency=8, **kwargs) -> "AsyncEasyMP3":
+        """
+        Creates an AsyncEasyMP3 object, scanning the directory in a worker thread.
+        :param directory: Path to the directory to search for MP3 files or a path
+                          to a single MP3 file.
+        :param search_subfolders: Whether to include subfolders in the search.
+        :param concurrency: The maximum number of files processed at the same time
+        :param kwargs: Any other keyword arguments for EasyMP3. ex. index=...
+        :return: The new AsyncEasyMP3 object
+        """
+        tagger = await asyncio.to_thread(EasyMP3, directory, search_subfolders, **kwargs)
+        return cls(tagger, concurrency)
+
+    def remove_all_tags(self, show_output=True) -> Outcomes:
+        """
+        Removes all ID3 tags from the MP3 files. See EasyMP3.remove_all_tags
+        """
+        return self._outcomes(lambda: self._tagger._plan_remove_all_tags(), "remove_all_tags", show_output)
+
+    def set_cover_art(self, covers_dir: str | CoverIndex | None = None,
+                      template_str: str | Template = _COVER_FROM_FILENAME,
+                      search_subfolders=True, show_output=True) -> Outcomes:
+        """
+        Adds cover art to the MP3 files. See EasyMP3.set_cover_art
+        """
+        return self._outcomes(lambda: self._tagger._plan_set_cover_art(covers_dir, template_str, search_subfolders),
+                              "set_cover_art", show_output,
+                              args={"covers_dir": covers_dir, "template_str": template_str,
+                                    "search_subfolders": search_subfolders})
+
+    def set_filename_from_tags(self, template_str: str | Template, copy=False, rename_invalid=True,
+                               show_output=True, copy_strategy="auto") -> Outcomes:
+        """
+        Renames the MP3 files with their tags by using a template. See EasyMP3.set_filename_from_tags
+        """
+        return self._outcomes(lambda: self._tagger._plan_set_filename_from_tags(template_str, copy, rename_invalid,
+                                                                                copy_strategy),
+                              "set_filename_from_tags", show_output,
+                              finish=lambda renamed: self._tagger._update_paths(renamed, copy),
+                              args={"template_str": template_str, "copy": copy, "rename_invalid": rename_invalid,
+                                    "copy_strategy": copy_strategy})
+
+    def set_tags_from_filename(self, template_str: str | Template, show_output=True) -> Outcomes:
+        """
+        Sets tags for the MP3 files based on their filename. See EasyMP3.set_tags_from_filename
+        """
+        return self._outcomes(lambda: self._tagger._plan_set_tags_from_filename(template_str),
+                              "set_tags_from_filename", show_output, args={"template_str": template_str})
+
+    def set_tags_from_dict(self, template_dict: dict[Tag, str], show_output=True) -> Outcomes:
+        """
+        Sets the same tags for all MP3 files. See EasyMP3.set_tags_from_dict
+        """
+        return self._outcomes(lambda: self._tagger._plan_set_tags_from_dict(template_dict),
+                              "set_tags_from_dict", show_output, args={"template_dict": template_dict})
+
+    def copy_tags(self, dest_dir: str, search_subfolders=True, tag_list: list[Tag] | Literal["all_tags"] = _ALL_TAGS,
+                  complement=False, show_output=True) -> Outcomes:
+        """
+        Copies the tags of the MP3 files to files of the same name. See EasyMP3.copy_tags
+        """
+        return self._outcomes(lambda: self._tagger._plan_copy_tags(dest_dir, search_subfolders, tag_list, complement),
+                              "copy_tags", show_output,
+                              args={"dest_dir": dest_dir, "search_subfolders": search_subfolders,
+                                    "tag_list": tag_list, "complement": complement})
+
+    def extract_cover_arts(self, folder_path: str, template_str: str | Template | None = None,
+                           rename_invalid=True, show_output=True,
+                           dedupe: Literal["hardlink", "symlink", "manifest"] | None = None,
+                           manifest_path: str | None = None) -> Outcomes:
+        """
+        Extracts the cover arts of the MP3 files. See EasyMP3.extract_cover_arts
+        """
+        args = {"folder_path": folder_path, "template_str": template_str, "rename_invalid": rename_invalid,
+                "dedupe": dedupe, "manifest_path": manifest_path}
+        journal = self._tagger.journal
+        return self._outcomes(
+            lambda: self._tagger._plan_extract_cover_arts(
+                folder_path, template_str, rename_invalid, dedupe, manifest_path,
+                journal is not None and journal.resumes("extract_cover_arts", args)),
+            "extract_cover_arts", show_output, args=args)
+
+    def shrink_cover_arts(self, transform: CoverTransform, show_output=True) -> Outcomes:
+        """
+        Shrinks the cover arts embedded in the MP3 files. See EasyMP3.shrink_cover_arts
+        """
+        return self._outcomes(lambda: self._tagger._plan_shrink_cover_arts(transform), "shrink_cover_arts",
+                              show_output, args={"transform": transform})
+
+    def _outcomes(self, plan: Callable[[], Callable[[str], FileResult] | None], operation: str, show_output: bool,
+                  finish: Callable[[dict[str, str]], None] | None = None, args: dict | None = None) -> Outcomes:
+        return Outcomes(self._tagger, plan, self._concurrency, operation, show_output, finish, args)
+
+    @property
+    def tagger(self) -> EasyMP3:
+        return self._tagger
+
+    @property
+    def concurrency(self) -> int:
+        return self._concurrency
+
+    @property
+    def mp3_list(self) -> list[str]:
+        return self._tagger.mp3_list
@@ -0,0 +1,311 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+from mutagen.id3 import APIC
+
+from . import events
+from . import exception
+from . import profiling
+from . import runner
+from . import util
+from .transform import CoverTransform
+
+DEFAULT_COVER_CACHE_BYTES = 64 * 1024 * 1024
+
+
+class CoverIndex:
+    def __init__(self, covers_dir: str, search_subfolders=True):
+        """
+        Scans a directory of cover images once and maps each normalized image name
+        (the filename with no extension, lowercased and stripped) to its path.
+        A CoverIndex can be passed to EasyMP3.set_cover_art in place of a directory
+        so that the same scan is reused across calls.
+
+        If more than one image has the same normalized name, the image closest to
+        `covers_dir` wins, and images at the same depth are ordered by path.
+        :param covers_dir: Directory containing cover images
+        :param search_subfolders: Whether to include subfolders in the scan
+        """
+        if not os.path.isdir(covers_dir):
+            raise exception.InvalidCoversDirectoryError(f"\"{covers_dir}\" is not a directory")
+        self._directory = covers_dir
+        self._search_sub = search_subfolders
+        self._covers: dict[str, str] = {}
+        self.refresh()
+
+    def refresh(self) -> None:
+        """
+        Rescans the covers directory. Should be called after images are added, removed or renamed.
+        """
+        covers = {}
+        ranks = {}
+        for path in util.scan_files(self._directory, self._search_sub):
+            if not util.has_image_type(path):
+                continue
+            name = util.normalize_name(util.filename_no_extension(path))
+            rank = (os.path.relpath(path, self._directory).count(os.sep), path)
+            if name not in ranks or rank < ranks[name]:
+                ranks[name] = rank
+                covers[name] = path
+        self._covers = covers
+
+    def find(self, name: str) -> str | None:
+        """
+        Finds the cover image for a name
+        :param name: The name of the cover image with no extension. ex. "Fast - Juice WRLD"
+        :return: The path to the cover image or None if there is no matching image
+        """
+        return self._covers.get(util.normalize_name(name))
+
+    def __contains__(self, name: str) -> bool:
+        return self.find(name) is not None
+
+    def __len__(self) -> int:
+        return len(self._covers)
+
+    @property
+    def directory(self) -> str:
+        return self._directory
+
+    @property
+    def include_subfolders(self) -> bool:
+        return self._search_sub
+
+
+class CoverPayload:
+    def __init__(self, path: str, data: bytes, mime_type: str):
+        """
+        A cover image read into memory, together with a prebuilt front cover APIC frame
+        that can be added to any number of MP3 files
+        :param path: The path the image was read from
+        :param data: The binary data of the image
+        :param mime_type: The MIME type of the image
+        """
+        self.path = path
+        self.data = data
+        self.mime_type = mime_type
+        self.digest = hashlib.sha256(data).hexdigest()
+        self.apic = APIC(encoding=3, mime=mime_type, type=3, desc='Cover', data=data)
+
+    @property
+    def size(self) -> int:
+        return len(self.data)
+
+
+class CoverCache:
+    def __init__(self, max_bytes=DEFAULT_COVER_CACHE_BYTES, transform: CoverTransform | None = None):
+        """
+        A least recently used cache of cover images, bounded by the total size of the images.
+        Images are keyed by path, modification time and size, so an image that changes on disk
+        is read again. An image larger than the whole budget is read every time it is requested.
+        Different images are read in parallel, and an image requested by several threads at once
+        is only read once.
+        :param max_bytes: The maximum total size of the cached images in bytes
+        :param transform: An optional CoverTransform applied to every image when it is read, so that
+                          the downscaled image is the one that is cached and embedded
+        """
+        self._max_bytes = max_bytes
+        self._transform = transform
+        self._bytes = 0
+        self._payloads: OrderedDict[tuple, CoverPayload] = OrderedDict()
+        self._pending: dict[tuple, threading.Event] = {}
+        self._lock = threading.Lock()
+
+    def get(self, cover_path: str) -> CoverPayload:
+        """
+        Gets a cover image, reading it from disk only if it is not cached
+        :param cover_path: The path to the cover image
+        :return: The cover image and its prebuilt APIC frame
+        :raises TypeError: If the file is not an image
+        """
+        stat = os.stat(cover_path)
+        key = (os.path.abspath(cover_path), stat.st_mtime_ns, stat.st_size)
+        while True:
+            with self._lock:
+                payload = self._payloads.get(key)
+                if payload is not None:
+                    self._payloads.move_to_end(key)
+                    return payload
+                pending = self._pending.get(key)
+                if pending is None:
+                    pending = self._pending[key] = threading.Event()
+                    break
+            # Another thread is reading the same image. If it could not be cached, it is read again
+            pending.wait()
+
+        try:
+            payload = self._read(cover_path)
+            with self._lock:
+                self._add(key, payload)
+        finally:
+            with self._lock:
+                del self._pending[key]
+            pending.set()
+        return payload
+
+    def _read(self, cover_path: str) -> CoverPayload:
+        """
+        Internal method that reads a cover image from disk and transforms it
+        """
+        mime_type = util.get_mime_type(cover_path, verify_image=True)
+        with profiling.phase(profiling.IMAGE_READ), open(cover_path, 'rb') as img:
+            data = img.read()
+        events.count_read(len(data))
+        if self._transform is not None:
+            data, mime_type = self._transform.apply(data, mime_type)
+        return CoverPayload(cover_path, data, mime_type)
+
+    def _add(self, key: tuple, payload: CoverPayload) -> None:
+        """
+        Internal method that caches an image if it fits in the budget. Must be called with the lock held.
+        """
+        if payload.size > self._max_bytes:
+            return
+        replaced = self._payloads.pop(key, None)
+        if replaced is not None:
+            self._bytes -= replaced.size
+        self._payloads[key] = payload
+        self._bytes += payload.size
+        while self._bytes > self._max_bytes:
+            _, evicted = self._payloads.popitem(last=False)
+            self._bytes -= evicted.size
+
+    def clear(self) -> None:
+        """
+        Removes every image from the cache
+        """
+        with self._lock:
+            self._payloads.clear()
+            self._bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._payloads)
+
+    @property
+    def size(self) -> int:
+        return self._bytes
+
+    @property
+    def max_bytes(self) -> int:
+        return self._max_bytes
+
+    @property
+    def transform(self) -> CoverTransform | None:
+        return self._transform
+
+
+DEDUPE_MODES = ("hardlink", "symlink", "manifest")
+DEFAULT_MANIFEST_NAME = "covers.jsonl"
+
+
+class ExtractedCovers:
+    def __init__(self, folder_path: str, dedupe: str, manifest_path: str | None = None, append=False):
+        """
+        The distinct cover images extracted by a batch operation. Every distinct image is written
+        once to the folder, named after the SHA-256 digest of its data, and each track only gets a
+        link to it (or only a manifest entry). An image already in the folder from an earlier run
+        is not written again.
+        :param folder_path: The directory for the extracted cover arts
+        :param dedupe: How each track gets its cover art. One of
+                       - "hardlink": a hard link named after the track (a copy if hard links are not supported)
+                       - "symlink": a symbolic link named after the track
+                       - "manifest": no file, only the manifest entry
+        :param manifest_path: The path to the JSON Lines manifest with one entry per track:
+                              {"track": ..., "sha256": ..., "image": ..., "link": ...}
+                              Default is "covers.jsonl" in the folder.
+        :param append: Whether to add to an existing manifest, ex. when an interrupted run is resumed.
+                       By default, the manifest is started anew.
+        """
+        if dedupe not in DEDUPE_MODES:
+            raise ValueError(f"The dedupe mode must be one of {DEDUPE_MODES}. Invalid mode: {dedupe}")
+        self._folder = folder_path
+        self._dedupe = dedupe
+        self._manifest_path = manifest_path or os.path.join(folder_path, DEFAULT_MANIFEST_NAME)
+        self._images: dict[str, str] = {}
+        self._pending: dict[str, threading.Event] = {}
+        self._lock = threading.Lock()
+        self._manifest_lock = threading.Lock()
+        os.makedirs(folder_path, exist_ok=True)
+        open(self._manifest_path, "a" if append else "w", encoding="utf-8").close()
+
+    def __contains__(self, digest: str) -> bool:
+        with self._lock:
+            return digest in self._images
+
+    def add(self, mp3_path: str, digest: str, apic: APIC | None,
+            dest_path_no_extension: str) -> tuple[str, str]:
+        """
+        Adds the cover art of a track, writing the image only if it was not extracted before
+        :param mp3_path: The path to the MP3 file
+        :param digest: The SHA-256 digest of the cover art data
+        :param apic: The cover art frame. Can be None if the digest is already in the extracted covers
+        :param dest_path_no_extension: The path to the link for the track, with no extension
+        :return: The status (WRITTEN if a file was written, otherwise UNCHANGED) and a message
+        """
+        image_path, written = self._store(digest, apic)
+
+        link_path = None
+        if self._dedupe != "manifest":
+            link_path = dest_path_no_extension + os.path.splitext(image_path)[1]
+            if not (os.path.exists(link_path) and os.path.samefile(link_path, image_path)):
+                util.link_file_atomic(image_path, link_path, symbolic=self._dedupe == "symlink")
+                written = True
+
+        line = json.dumps({"track": mp3_path, "sha256": digest, "image": image_path, "link": link_path})
+        with self._manifest_lock:
+            with open(self._manifest_path, "a", encoding="utf-8") as manifest:
+                manifest.write(line + "\n")
+
+        if written:
+            return runner.WRITTEN, f"Successfully extracted cover art from MP3 with path '{mp3_path}' to file " \
+                                   f"'{link_path or image_path}'"
+        return runner.UNCHANGED, f"The cover art of MP3 with path '{mp3_path}' was already extracted to " \
+                                 f"'{link_path or image_path}'"
+
+    def _store(self, digest: str, apic: APIC | None) -> tuple[str, bool]:
+        """
+        Internal method that writes a distinct image once. Tracks with an image that is being written
+        by another thread wait for it.
+        :return: The path to the image and whether it was written by this call
+        """
+        with self._lock:
+            image_path = self._images.get(digest)
+            if image_path is not None:
+                return image_path, False
+            event = self._pending.get(digest)
+            owner = event is None
+            if owner:
+                event = self._pending[digest] = threading.Event()
+
+        if not owner:
+            event.wait()
+            with self._lock:
+                image_path = self._images.get(digest)
+            if image_path is None:
+                raise exception.InvalidCoverArtDataError(f"The cover art with digest {digest} could not be extracted")
+            return image_path, False
+
+        try:
+            extension = util.get_extension_from_mime(apic.mime.lower())
+            image_path = os.path.join(self._folder, digest + extension)
+            written = not os.path.exists(image_path)
+            if written:
+                util.write_file_atomic(image_path, apic.data)
+            with self._lock:
+                self._images[digest] = image_path
+        finally:
+            with self._lock:
+                del self._pending[digest]
+            event.set()
+        return image_path, written
+
+    @property
+    def manifest_path(self) -> str:
+        return self._manifest_path
+
+    @property
+    def images(self) -> dict[str, str]:
+        return dict(self._images)
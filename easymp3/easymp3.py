@@ -1,82 +1,294 @@
+import functools
+import hashlib
+import itertools
 import os.path
-import shutil
 import sys
-from typing import Literal
-
-from mutagen.id3 import APIC, ID3
-from mutagen.mp3 import MP3
+import threading
+import time
+from concurrent.futures import Executor, ThreadPoolExecutor
+from contextlib import closing, contextmanager, nullcontext
+from typing import Callable, Iterable, Iterator, Literal
 
+from . import events
 from . import exception
+from . import export
+from . import manifest
+from . import placement
+from . import profiling
+from . import runner
 from . import tag
 from . import util
+from .covers import CoverCache, CoverIndex, ExtractedCovers
+from .events import Event, EventSink, PrintSink
+from .index import TagIndex
+from .journal import Journal, RenameEntry
+from .manifest import ManifestRow
+from .padding import PaddingFunction, PaddingPolicy, SaveStats
+from .profiling import Profiler
+from .runner import BatchResult, FileResult
+from .session import Edit, EditSession, FileTags
 from .tag import Tag
-from .util import INVALID_CHAR_TRANS
+from .template import Template
+from .transform import CoverTransform
 
 _COVER_FROM_FILENAME = "cover_from_filename"
 _ALL_TAGS = "all_tags"
 
 
 class EasyMP3:
-    def __init__(self, directory: str, search_subfolders=False):
+    def __init__(self, directory: str, search_subfolders=False, index: TagIndex | str | None = None,
+                 workers: int = 1, executor: Executor | None = None, cover_cache: CoverCache | None = None,
+                 padding: PaddingPolicy | None = None, exclude: list[str] | None = None, lazy=False,
+                 on_event: EventSink | None = None, profiler: Profiler | None = None,
+                 journal: Journal | str | None = None):
         """
         Initializes the EasyMP3 object with a list of paths to MP3 files.
         :param directory: Path to the directory to search for MP3 files or a path
                           to a single MP3 file.
         :param search_subfolders: Whether to include subfolders in the search.
+        :param index: An optional TagIndex (or a path to its database) used to serve the tags of
+                      unchanged files without parsing them. The index is updated on every save.
+        :param workers: The number of threads used to process files in batch operations.
+                        The default of 1 processes the files one at a time in the calling thread.
+        :param executor: An optional executor (ex. a ThreadPoolExecutor) to run the per-file work on
+                         instead of creating a thread pool for every batch operation. `workers` should
+                         match the number of workers of the executor.
+        :param cover_cache: An optional CoverCache used to read each cover image once and share it
+                            between files (and between EasyMP3 objects that are given the same cache).
+                            By default, each EasyMP3 object has its own 64 MB cache.
+        :param padding: An optional PaddingPolicy that reserves padding after the tags when a file has
+                        to be rewritten, so that later edits are written in place. By default, mutagen's
+                        padding is used. Either way, `save_stats` counts in-place writes and rewrites.
+        :param exclude: Optional glob patterns of files and folders to leave out of the search.
+                        ex. ["*.part", "Podcasts/*"]
+        :param lazy: Whether to scan the directory while the files are processed instead of listing
+                     every file up front. The directory is scanned again by every batch operation, and
+                     the list of paths is only kept once `mp3_list` is used.
+        :param on_event: An optional event sink, called with an Event when each file is started, with the
+                         bytes it read and wrote, with its outcome, and with the summary of each batch
+                         operation. It replaces the console output, so `show_output` is then ignored.
+                         With more than one worker, it is called from the worker threads.
+        :param profiler: An optional Profiler that times the phases of every file (scanning, parsing,
+                         reading cover images, saving and renaming) in every batch operation
+        :param journal: An optional Journal (or a path to one) that records every file as it is done,
+                        so that an interrupted batch operation can be resumed by running it again,
+                        and its renames can be undone with `rollback_renames`
         """
-        self._list: list[str] = util.get_all_mp3s(directory, search_subfolders)
-        self._directory = directory
+        self._directory: str | None = directory
         self._search_sub = search_subfolders
+        self._exclude = exclude
+        if lazy:
+            util.iter_mp3s(directory, search_subfolders, exclude)  # Validates the directory
+            self._list: list[str] | None = None
+            self._source: Callable[[], Iterator[str]] | None = (
+                lambda: util.iter_mp3s(directory, search_subfolders, exclude))
+        else:
+            started = time.perf_counter()
+            self._list = util.get_all_mp3s(directory, search_subfolders, exclude)
+            if profiler is not None:
+                profiler.record_scan(profiling.SCAN, time.perf_counter() - started)
+            self._source = None
+        self._configure(index, workers, executor, cover_cache, padding, on_event, profiler, journal)
+
+    @classmethod
+    def from_paths(cls, paths: Iterable[str], index: TagIndex | str | None = None, workers: int = 1,
+                   executor: Executor | None = None, cover_cache: CoverCache | None = None,
+                   padding: PaddingPolicy | None = None, on_event: EventSink | None = None,
+                   profiler: Profiler | None = None, journal: Journal | str | None = None) -> "EasyMP3":
+        """
+        Creates an EasyMP3 object for the given MP3 files instead of the files of a directory.
+        Paths that don't end with .mp3 are left out. The paths are read as the files are processed,
+        so a generator can be passed for a very large number of files. A generator can only be read
+        once, so use `mp3_list` to keep its paths if more than one batch operation is run.
+        :param paths: The paths to the MP3 files
+        :param index: See EasyMP3
+        :param workers: See EasyMP3
+        :param executor: See EasyMP3
+        :param cover_cache: See EasyMP3
+        :param padding: See EasyMP3
+        :param on_event: See EasyMP3
+        :param profiler: See EasyMP3
+        :param journal: See EasyMP3
+        :return: The new EasyMP3 object
+        """
+        if iter(paths) is paths:
+            source = _single_use(paths)
+        else:
+            source = lambda: iter(paths)
+        return cls._from_source(lambda: _only_mp3s(source()), index, workers, executor, cover_cache, padding,
+                                on_event, profiler, journal)
+
+    @classmethod
+    def from_file_list(cls, list_path: str, index: TagIndex | str | None = None, workers: int = 1,
+                       executor: Executor | None = None, cover_cache: CoverCache | None = None,
+                       padding: PaddingPolicy | None = None, on_event: EventSink | None = None,
+                       profiler: Profiler | None = None, journal: Journal | str | None = None) -> "EasyMP3":
+        """
+        Creates an EasyMP3 object for the MP3 files listed in a text file, one path per line.
+        The file is read as the files are processed. ex. the output of `find /music -name "*.mp3"`
+        :param list_path: The path to the text file, or "-" to read the paths from stdin.
+                          Stdin can only be read once, so use `mp3_list` to keep its paths if more
+                          than one batch operation is run.
+        :param index: See EasyMP3
+        :param workers: See EasyMP3
+        :param executor: See EasyMP3
+        :param cover_cache: See EasyMP3
+        :param padding: See EasyMP3
+        :param on_event: See EasyMP3
+        :param profiler: See EasyMP3
+        :param journal: See EasyMP3
+        :return: The new EasyMP3 object
+        """
+        if list_path == "-":
+            source = _single_use(_read_path_list(sys.stdin))
+        elif os.path.isfile(list_path):
+            source = lambda: _read_path_list(list_path)
+        else:
+            raise FileNotFoundError(f"\"{list_path}\" is not a file")
+        return cls._from_source(lambda: _only_mp3s(source()), index, workers, executor, cover_cache, padding,
+                                on_event, profiler, journal)
 
-    def remove_all_tags(self, show_output=True) -> None:
+    @classmethod
+    def _from_source(cls, source: Callable[[], Iterator[str]], index: TagIndex | str | None, workers: int,
+                     executor: Executor | None, cover_cache: CoverCache | None,
+                     padding: PaddingPolicy | None, on_event: EventSink | None,
+                     profiler: Profiler | None, journal: Journal | str | None) -> "EasyMP3":
+        """
+        Internal method that creates an EasyMP3 object whose paths come from a source instead of a directory
+        """
+        tagger = cls.__new__(cls)
+        tagger._directory = None
+        tagger._search_sub = False
+        tagger._exclude = None
+        tagger._list = None
+        tagger._source = source
+        tagger._configure(index, workers, executor, cover_cache, padding, on_event, profiler, journal)
+        return tagger
+
+    def _configure(self, index: TagIndex | str | None, workers: int, executor: Executor | None,
+                   cover_cache: CoverCache | None, padding: PaddingPolicy | None,
+                   on_event: EventSink | None, profiler: Profiler | None,
+                   journal: Journal | str | None) -> None:
+        """
+        Internal method that sets the options shared by every way of creating an EasyMP3 object
+        """
+        if isinstance(index, str):
+            index = TagIndex(index)
+        self._index: TagIndex | None = index
+        self._workers = workers
+        self._executor = executor
+        self._cover_cache = cover_cache if cover_cache is not None else CoverCache()
+        self._padding = padding
+        self._save_stats = SaveStats()
+        self._on_event = on_event
+        self._profiler = profiler
+        if isinstance(journal, str):
+            journal = Journal(journal)
+        self._journal: Journal | None = journal
+
+
+    def remove_all_tags(self, show_output=True) -> BatchResult:
         """
         Removes all ID3 tags from the MP3 files in the directory.
         :param show_output: Whether to show the console output
+        :return: A summary of the files that were processed
         """
-        for mp3_path in self._list:
-            audio = ID3(mp3_path)
-            audio.delete()
-            audio.save()
-            if show_output:
-                print(f"All tags removed for '{mp3_path}'")
+        return self._run(self._plan_remove_all_tags(), "remove_all_tags", show_output)
+
+    def _plan_remove_all_tags(self) -> Callable[[str], FileResult]:
+        def remove_tags(mp3_path: str) -> FileResult:
+            if not util.remove_tags(mp3_path):
+                message = f"No tags to remove for '{mp3_path}'"
+                return FileResult(mp3_path, runner.UNCHANGED, message)
+            self._update_index(mp3_path)
+            message = f"All tags removed for '{mp3_path}'"
+            return FileResult(mp3_path, runner.WRITTEN, message)
+
+        return remove_tags
+
+    def _edit_remove_all_tags(self) -> Edit:
+        def remove_tags(mp3_path: str, file_tags: FileTags) -> tuple[str, str]:
+            if not file_tags.id3 and not util.has_tags(mp3_path):
+                message = f"No tags to remove for '{mp3_path}'"
+                return runner.UNCHANGED, message
+            file_tags.remove_all()
+            message = f"All tags removed for '{mp3_path}'"
+            return runner.WRITTEN, message
 
-    def set_cover_art(self, covers_dir=None, template_str: str = _COVER_FROM_FILENAME,
-                      search_subfolders=True, show_output=True) -> None:
+        return remove_tags
+
+    def set_cover_art(self, covers_dir: str | CoverIndex | None = None,
+                      template_str: str | Template = _COVER_FROM_FILENAME,
+                      search_subfolders=True, show_output=True) -> BatchResult:
         """
         Adds cover art to MP3 files based on matching image files in the specified directory.
         Matches are found by filename (default) or by using a template string
-        :param covers_dir: Directory containing cover images. Default is the directory of the MP3 files
+        :param covers_dir: Directory containing cover images or a CoverIndex of one (which can be
+                           reused across calls). Default is the directory of the MP3 files, so it is
+                           required for an EasyMP3 object created with from_paths or from_file_list.
+                           The directory is scanned once per call, see CoverIndex for how
+                           duplicate image names are resolved
         :param template_str: A string containing a template for the name of the cover art (with the default
                              being to search for matching file names).
-                             ex: f"{Tag.TITLE} - {Tag.ARTIST}".
+                             ex: f"{Tag.TITLE} - {Tag.ARTIST}". Can also be a compiled Template.
                              Note: Templates should not have a file extension at the end
-        :param search_subfolders: Whether to include subfolders in the search
+        :param search_subfolders: Whether to include subfolders in the search. Ignored if
+                                  `covers_dir` is a CoverIndex
         :param show_output: Whether to show the console output
+        :return: A summary of the files that were processed
         """
+        return self._run(self._plan_set_cover_art(covers_dir, template_str, search_subfolders),
+                         "set_cover_art", show_output,
+                         args={"covers_dir": covers_dir, "template_str": template_str,
+                               "search_subfolders": search_subfolders})
+
+    def _plan_set_cover_art(self, covers_dir: str | CoverIndex | None, template_str: str | Template,
+                            search_subfolders: bool) -> Callable[[str], FileResult]:
+        return self._plan_edit(self._edit_set_cover_art(covers_dir, template_str, search_subfolders))
 
+    def _edit_set_cover_art(self, covers_dir: str | CoverIndex | None, template_str: str | Template,
+                            search_subfolders: bool) -> Edit:
         if covers_dir is None:
+            if self._directory is None:
+                raise exception.InvalidCoversDirectoryError("covers_dir is required for an EasyMP3 object that "
+                                                            "was not created from a directory")
             covers_dir = self._directory
-        if not isinstance(template_str, str):
+        if not isinstance(template_str, (str, Template)):
             raise exception.InvalidTemplateStringError(f"Template must be a string. Invalid template: {template_str}")
-        tag_list = tag.get_tag_list(string=False)
-        for mp3_path in self._list:
-            if template_str == _COVER_FROM_FILENAME:
+        template = None if template_str == _COVER_FROM_FILENAME else Template.compile(template_str)
+        if isinstance(covers_dir, CoverIndex):
+            cover_index = covers_dir
+        else:
+            cover_index = CoverIndex(covers_dir, search_subfolders)
+
+        def apply_cover(mp3_path: str, file_tags: FileTags) -> tuple[str, str]:
+            if template is None:
                 cover_file = util.filename_no_extension(mp3_path)
             else:
-                cover_file = self._new_name_from_template(mp3_path, template_str, tag_list, rename_invalid=False)
-            cover_path: str = EasyMP3._find_cover_from_file(cover_file, covers_dir, search_subfolders)
+                cover_file = template.render(file_tags.values(), rename_invalid=False)
+            cover_path = cover_index.find(cover_file)
             if cover_path is None:
-                print(f"Cover Not Found for: {mp3_path}", file=sys.stderr)
-            else:
-                util.apply_cover_art(mp3_path, cover_path)
-                if show_output:
-                    print(f"Cover Art successfully applied to '{mp3_path}' using file '{cover_path}'")
+                message = f"Cover Not Found for: {mp3_path}"
+                return runner.SKIPPED, message
 
-    def set_filename_from_tags(self, template_str: str, copy=False, rename_invalid=True, show_output=True) -> None:
+            if not util.add_cover(file_tags.id3, self._cover_cache.get(cover_path).apic):
+                message = f"'{mp3_path}' already has the cover art of file '{cover_path}'"
+                return runner.UNCHANGED, message
+            message = f"Cover Art successfully applied to '{mp3_path}' using file '{cover_path}'"
+            return runner.WRITTEN, message
+
+        return apply_cover
+
+    def set_filename_from_tags(self, template_str: str | Template, copy=False, rename_invalid=True,
+                               show_output=True, copy_strategy: str = placement.AUTO) -> BatchResult:
         """
         Renames all the MP3 filenames with their tags by using a template.
+        The new path of every file is worked out before any file is moved, and two files are never
+        moved or copied to the same path. A file whose new path is already taken (by a file earlier in
+        the batch or by an existing file) is reported and left as is. Files are moved with an atomic
+        rename, falling back to a copy only when the new path is on another device.
         :param template_str: A string representing how to format the new file name.
-                         ex. f"{Tag.TITLE} - {Tag.ARTIST}"
+                         ex. f"{Tag.TITLE} - {Tag.ARTIST}". Can also be a compiled Template.
                          Note: A template should never end with .mp3 as this is
                          implied
         :param copy: A boolean variable to control whether the files are moved or copied
@@ -84,72 +296,185 @@ class EasyMP3:
                          rename invalid filenames or have the user rename them as they
                          occur
         :param show_output: Whether to show the console output
+        :param copy_strategy: How files are copied in copy mode. One of
+                              - "auto": clone the data if the file system supports it (ex. Btrfs, XFS),
+                                otherwise copy it in the kernel, falling back to a regular copy
+                              - "reflink": the same as "auto"
+                              - "hardlink": link the copy to the same data. Later edits to either
+                                file show in both, so only use it for copies that are not edited
+                              - "copy_file_range": copy the data in the kernel, falling back to a regular copy
+                              - "copy": a regular copy
+                              The metadata of the file is always kept, like shutil.copy2
+        :return: A summary of the files that were processed. Its `renamed` maps the old path of every
+                 file that was moved or copied to its new path. `mp3_list` is updated with the new paths
+                 of moved files, while copies are not added to it.
+        """
+        result = self._run(self._plan_set_filename_from_tags(template_str, copy, rename_invalid, copy_strategy),
+                           "set_filename_from_tags", show_output,
+                           args={"template_str": template_str, "copy": copy, "rename_invalid": rename_invalid,
+                                 "copy_strategy": copy_strategy})
+        self._update_paths(result.renamed, copy)
+        return result
+
+    def _plan_set_filename_from_tags(self, template_str: str | Template, copy: bool, rename_invalid: bool,
+                                     copy_strategy: str = placement.AUTO) -> Callable[[str], FileResult]:
+        template = Template.compile(template_str)
+        util.check_template(template.source)
+        placement.check_copy_strategy(copy_strategy)
+        targets = self._plan_targets(template, rename_invalid)
+        directories = placement.DirectoryCache()
+
+        def rename(mp3_path: str) -> FileResult:
+            new_mp3_path, replay = targets[mp3_path]
+            replay()
+            if isinstance(new_mp3_path, Exception):
+                raise new_mp3_path
+            if new_mp3_path is None:
+                return FileResult(mp3_path, runner.UNCHANGED, f"'{mp3_path}' is already named correctly")
+            return self._place(mp3_path, new_mp3_path, copy, copy_strategy, directories)
+
+        return rename
+
+    def _plan_targets(self, template: Template,
+                      rename_invalid: bool) -> dict[str, tuple[str | Exception | None, Callable[[], None]]]:
+        """
+        Internal method that works out the new path of every file before any file is moved, so that
+        collisions are decided by the order of the files rather than by which thread gets there first
+        :param template: The template of the new filenames
+        :param rename_invalid: Whether to automatically rename invalid filenames
+        :return: Every path mapped to its new path, None if it is already named correctly, or the
+                 error to report for it, along with a function that adds the bytes read and the
+                 timings of working it out to the file (see runner.run_ahead)
         """
-        util.check_template(template_str)
-        tag_list = tag.get_tag_list(string=False)
+        timed = self._profiler is not None
+
+        def render(mp3_path: str) -> str:
+            new_name = template.render(self._read_tags(mp3_path), rename_invalid)
+            return os.path.join(os.path.dirname(mp3_path), new_name) + ".mp3"
+
+        def render_ahead(mp3_path: str) -> tuple[str | Exception, Callable[[], None]]:
+            return runner.run_ahead(render, mp3_path, timed)
 
-        for mp3_path in self._list:
+        # Keep the paths so that a lazy scan does not pick up the renamed files again
+        paths = self.mp3_list
+        with self._open_executor() as executor:
+            rendered = list(executor.map(render_ahead, paths) if executor is not None else map(render_ahead, paths))
+
+        targets = {}
+        claimed_paths = {}
+        for mp3_path, (new_mp3_path, replay) in zip(paths, rendered):
+            if not isinstance(new_mp3_path, Exception):
+                try:
+                    if not _claim_path(mp3_path, new_mp3_path, claimed_paths):
+                        new_mp3_path = None
+                except exception.FileCollisionError as error:
+                    new_mp3_path = error
+            targets[mp3_path] = new_mp3_path, replay
+        return targets
+
+    def _rename_step(self, template_str: str | Template, copy: bool, rename_invalid: bool,
+                     copy_strategy: str = placement.AUTO) -> Callable[[str, object], FileResult]:
+        template = Template.compile(template_str)
+        util.check_template(template.source)
+        placement.check_copy_strategy(copy_strategy)
+        # Keep the paths so that a lazy scan does not pick up the renamed files again
+        self._materialize()
+        claimed_paths = {}
+        claim_lock = threading.Lock()
+        directories = placement.DirectoryCache()
+
+        def rename(mp3_path: str, audio) -> FileResult:
             parent_path = os.path.dirname(mp3_path)
-            new_name = self._new_name_from_template(mp3_path, template_str, tag_list, rename_invalid)
+            new_name = template.render(audio, rename_invalid)
 
             new_mp3_path = os.path.join(parent_path, new_name) + ".mp3"
 
-            base_path = os.path.dirname(new_mp3_path)
-            os.makedirs(base_path, exist_ok=True)
+            with claim_lock:
+                claimed = _claim_path(mp3_path, new_mp3_path, claimed_paths)
+            if not claimed:
+                return FileResult(mp3_path, runner.UNCHANGED, f"'{mp3_path}' is already named correctly")
 
-            if copy:
-                #  copy and keep metadata
-                shutil.copy2(mp3_path, new_mp3_path)
-                if show_output:
-                    print(f"Successfully copied '{mp3_path}' to {new_mp3_path}")
-            else:
-                shutil.move(mp3_path, new_mp3_path)
-                if show_output:
-                    print(f"Successfully moved '{mp3_path}' to {new_mp3_path}")
+            return self._place(mp3_path, new_mp3_path, copy, copy_strategy, directories)
+
+        return rename
 
-        self._reload_directory()
+    def _place(self, mp3_path: str, new_mp3_path: str, copy: bool, copy_strategy: str,
+               directories: placement.DirectoryCache) -> FileResult:
+        """
+        Internal method that moves or copies a file to its new path, creating its folder if needed
+        """
+        directories.ensure(os.path.dirname(new_mp3_path))
+        if self._journal is not None:
+            self._journal.record_place(mp3_path, new_mp3_path, copy)
+        if copy:
+            #  copy and keep metadata
+            placement.copy_file(mp3_path, new_mp3_path, copy_strategy)
+            message = f"Successfully copied '{mp3_path}' to {new_mp3_path}"
+        else:
+            placement.move_file(mp3_path, new_mp3_path)
+            if self._index is not None:
+                self._index.rename(mp3_path, new_mp3_path)
+            message = f"Successfully moved '{mp3_path}' to {new_mp3_path}"
+        return FileResult(mp3_path, runner.WRITTEN, message, new_path=new_mp3_path)
 
-    def set_tags_from_filename(self, template_str: str, show_output=True) -> None:
+    def set_tags_from_filename(self, template_str: str | Template, show_output=True) -> BatchResult:
         """
         Sets tags for all the MP3s based on their filename by using a provided template
         :param template_str: A string representing how to extract the tags.
-                         ex. f"{Tag.TITLE} - {Tag.ARTIST}"
+                         ex. f"{Tag.TITLE} - {Tag.ARTIST}". Can also be a compiled Template.
                          Note: A template should never end with .mp3 as this is implied
         :param show_output: Whether to show the console output
+        :return: A summary of the files that were processed
         """
-        util.check_template(template_str)
-        for mp3_path in self._list:
+        return self._run(self._plan_set_tags_from_filename(template_str), "set_tags_from_filename", show_output,
+                         args={"template_str": template_str})
+
+    def _plan_set_tags_from_filename(self, template_str: str | Template) -> Callable[[str], FileResult]:
+        return self._plan_edit(self._edit_set_tags_from_filename(template_str))
+
+    def _edit_set_tags_from_filename(self, template_str: str | Template) -> Edit:
+        template = Template.compile(template_str)
+        util.check_template(template.source)
+
+        def set_tags(mp3_path: str, file_tags: FileTags) -> tuple[str, str]:
             file_name_no_extension = util.filename_no_extension(mp3_path)
-            template_dict = util.extract_info(template_str, file_name_no_extension)
+            template_dict = template.parse(file_name_no_extension)
             if template_dict is None:
-                if show_output:
-                    print(f"MP3 file with path '{mp3_path}' does not match the template string and will be skipped")
-                continue
-            audio = util.construct_mp3_obj(mp3_path)
-            for key, value in template_dict.items():
-                checked_key = tag.check_tag_key(key)
-                audio[checked_key] = value
-            audio.save()
-            print(f"Tags from template string successfully applied to MP3 file with path '{mp3_path}'")
-
-    def set_tags_from_dict(self, template_dict: dict[Tag, str], show_output=True) -> None:
+                message = f"MP3 file with path '{mp3_path}' does not match the template string and will be skipped"
+                return runner.SKIPPED, message
+            new_values = {tag.check_tag_key(key): value for key, value in template_dict.items()}
+            if not util.set_easy_values(file_tags.easy, new_values):
+                message = f"MP3 file with path '{mp3_path}' already has the tags from the template string"
+                return runner.UNCHANGED, message
+            message = f"Tags from template string successfully applied to MP3 file with path '{mp3_path}'"
+            return runner.WRITTEN, message
+
+        return set_tags
+
+    def set_tags_from_dict(self, template_dict: dict[Tag, str], show_output=True) -> BatchResult:
         """
         Sets the same tags for all MP3 files based on a template dictionary.
         :param template_dict - A dictionary containing `Tag` keys and string values
         :param show_output: Whether to show the console output
+        :return: A summary of the files that were processed
         :raise InvalidTemplateDictError if the template dictionary has incorrect types or values
         """
+        return self._run(self._plan_set_tags_from_dict(template_dict), "set_tags_from_dict", show_output,
+                         args={"template_dict": template_dict})
 
+    def _plan_set_tags_from_dict(self, template_dict: dict[Tag, str]) -> Callable[[str], FileResult]:
+        return self._plan_edit(self._edit_set_tags_from_dict(template_dict))
+
+    def _edit_set_tags_from_dict(self, template_dict: dict[Tag, str]) -> Edit:
+        template_dict = dict(template_dict)
+        cover = None
         if Tag.COVER_ART in template_dict:
             covers_info = template_dict.pop(Tag.COVER_ART)
-            if isinstance(covers_info, str) and util.is_image(covers_info):
-                #  put same image for all
-                for mp3_path in self._list:
-                    util.apply_cover_art(mp3_path, covers_info)
-            else:
+            if not (isinstance(covers_info, str) and util.is_image(covers_info)):
                 raise exception.InvalidTemplateDictError(
                     f"The value for key {Tag.COVER_ART} must be a string representing"
                     f"a path to a cover art image.\nInvalid value: {covers_info}")
+            cover = self._cover_cache.get(covers_info)
         valid_tags_dict = dict()
 
         for key, value in template_dict.items():
@@ -159,29 +484,203 @@ class EasyMP3:
                 raise exception.InvalidTemplateDictError(f"The value for key {key} must be a string."
                                                          f"\nInvalid value: {value}")
 
-        for mp3_path in self._list:
-            audio = util.construct_mp3_obj(mp3_path)
-            for key, value in valid_tags_dict.items():
-                audio[key] = value
-            audio.save()
-            if show_output:
-                print(f"Tags from template dictionary successfully applied to MP3 with path '{mp3_path}'")
+        def set_tags(mp3_path: str, file_tags: FileTags) -> tuple[str, str]:
+            changed = False
+            if cover is not None:
+                #  put same image for all
+                changed = util.add_cover(file_tags.id3, cover.apic)
+            changed = util.set_easy_values(file_tags.easy, valid_tags_dict) or changed
+            if not changed:
+                message = f"MP3 with path '{mp3_path}' already has the tags from the template dictionary"
+                return runner.UNCHANGED, message
+            message = f"Tags from template dictionary successfully applied to MP3 with path '{mp3_path}'"
+            return runner.WRITTEN, message
+
+        return set_tags
+
+    def import_tags(self, manifest_path: str, match: Literal["path", "filename"] = "path",
+                    manifest_format: Literal["csv", "jsonl"] | None = None, show_output=True) -> BatchResult:
+        """
+        Sets different tags for each MP3 file from a CSV or JSON Lines manifest, such as a catalog export.
+        The manifest is read one row at a time while the rows are applied, so it does not have to fit in memory.
+        Each row names a file and its tags, and optionally a cover image under "cover_art". ex.
+            path,title,artist,cover_art
+            Juice WRLD/Fast.mp3,Fast,Juice WRLD,covers/Fast.jpg
+        See manifest.iter_manifest for the details of both formats.
+        :param manifest_path: The path to the manifest
+        :param match: Whether each row names its file by "path" (relative paths are relative to the folder of
+                      the manifest) or by "filename" (ignoring case and surrounding whitespace)
+        :param manifest_format: "csv", "jsonl", or None to tell the format from the extension
+        :param show_output: Whether to show the console output
+        :return: A summary of the rows. Rows that name a file that is not one of the MP3 files, that match more
+                 than one of them, or that name a file already named by an earlier row are skipped. Rows that
+                 cannot be used fail with an InvalidManifestError, under the path "<manifest_path>:<line>".
+        :raises InvalidManifestError: If the format is unknown, or the header of a CSV manifest is invalid
+        """
+        rows = manifest.iter_manifest(manifest_path, match, manifest_format)
+        func, items = self._plan_import_tags(manifest_path, rows, match)
+        return self._run(func, "import_tags", show_output, items,
+                         args={"manifest": _file_identity(manifest_path), "match": match,
+                               "manifest_format": manifest_format})
+
+    def _plan_import_tags(self, manifest_path: str, rows: Iterator[ManifestRow],
+                          match: str) -> tuple[Callable[[str], FileResult], Iterator[str]]:
+        """
+        Internal method that matches the rows of a manifest to the MP3 files while they are read
+        :return: The per-file work, and the items to run it for. Each item is the path to the MP3 file
+                 of a row, or "<manifest_path>:<line>" for a row that is not applied
+        """
+        if match == manifest.MATCH_PATH:
+            files = {_path_key(mp3_path): [mp3_path] for mp3_path in self.mp3_list}
+            find = lambda key: files.get(_path_key(key), [])
+        else:
+            files = util.group_by_name(self.mp3_list)
+            find = lambda key: files.get(util.normalize_name(key), [])
+        journal = self._journal
+        # Rows waiting to be applied, keyed by item. Only the rows in flight are kept. The rows that a
+        # resumed journal run skips are never applied, so they are not kept.
+        pending: dict[str, ManifestRow | FileResult] = {}
+        lines: dict[str, int] = {}
+
+        def keep(item: str, entry: ManifestRow | FileResult) -> str:
+            if journal is None or not journal.skips(item):
+                pending[item] = entry
+            return item
+
+        def items() -> Iterator[str]:
+            for row in rows:
+                label = f"{manifest_path}:{row.line}"
+                if row.error is not None:
+                    error = exception.InvalidManifestError(row.error)
+                    yield keep(label, FileResult(label, runner.FAILED, f"Invalid row {label}: {row.error}", error))
+                    continue
+                matches = find(row.key)
+                if len(matches) != 1:
+                    if matches:
+                        message = f"'{row.key}' ({label}) is ambiguous and will be skipped. Matching files: {matches}"
+                    else:
+                        message = f"'{row.key}' ({label}) is not one of the MP3 files and will be skipped"
+                    yield keep(label, FileResult(label, runner.SKIPPED, message))
+                elif matches[0] in lines:
+                    message = (f"'{row.key}' ({label}) was already imported from line {lines[matches[0]]} "
+                               f"and will be skipped")
+                    yield keep(label, FileResult(label, runner.SKIPPED, message))
+                else:
+                    lines[matches[0]] = row.line
+                    yield keep(matches[0], row)
+
+        def set_row_tags(row: ManifestRow, mp3_path: str, file_tags: FileTags) -> tuple[str, str]:
+            changed = False
+            if row.cover is not None:
+                changed = util.add_cover(file_tags.id3, self._cover_cache.get(row.cover).apic)
+            changed = util.set_easy_values(file_tags.easy, row.tags) or changed
+            if not changed:
+                return runner.UNCHANGED, f"MP3 with path '{mp3_path}' already has the tags from line {row.line}"
+            return runner.WRITTEN, f"Tags from line {row.line} successfully applied to MP3 with path '{mp3_path}'"
+
+        def import_row(item: str) -> FileResult:
+            entry = pending.pop(item)
+            if isinstance(entry, FileResult):
+                return entry
+            return self._plan_edit(functools.partial(set_row_tags, entry))(item)
+
+        return import_row, items()
+
+    def export_tags(self, export_path: str, tag_list: list[Tag] | Literal["all_tags"] = _ALL_TAGS,
+                    export_format: Literal["csv", "jsonl"] | None = None, ordered=True, start=0, resume=False,
+                    show_output=True) -> BatchResult:
+        """
+        Writes a record of the tags of every MP3 file to a CSV or JSON Lines file, such as for a search index.
+        The files are read on the tagger's workers and each record is written as soon as it can be, so the
+        records are never all kept in memory. Each record has the path, the tags, the size in bytes, the
+        duration in seconds and the SHA-256 digest of the cover art (see export.export_record). A file that
+        cannot be read gets a record with its path and an "error".
+        :param export_path: The path to the export. It is replaced unless the export is resumed
+        :param tag_list: A list of tags, where each item in the list should be a member of the Tag class.
+                         Tag.COVER_ART is always exported as the cover digest. By default, every tag is exported.
+        :param export_format: "csv", "jsonl", or None to tell the format from the extension
+        :param ordered: Whether to write the records in the order of the files. Otherwise, each record is
+                        written as soon as its file is read.
+        :param start: The position in the list of files to start from. The records are added to the end of the
+                      export. For an ordered export, this is the number of records already in the export.
+        :param resume: Whether to resume an ordered export that was interrupted, starting after the last
+                       complete record in the export
+        :param show_output: Whether to show the console output
+        :return: A summary of the files that were exported
+        :raises InvalidManifestError: If the format is unknown
+        :raises ValueError: If an export that is not ordered is resumed
+        """
+        export_format = manifest.check_manifest_format(export_path, export_format)
+        if resume:
+            if not ordered:
+                raise ValueError("Only an ordered export can be resumed")
+            start = export.count_records(export_path, export_format)
+        if tag_list == _ALL_TAGS:
+            keys = list(export.DEFAULT_TAGS)
+        else:
+            keys = list(dict.fromkeys(tag.check_tag_key(_tag) for _tag in tag_list if _tag != Tag.COVER_ART))
+        with export.ExportWriter(export_path, keys, export_format, ordered, start, append=start > 0) as writer:
+            func, items = self._plan_export_tags(writer, keys, start)
+            return self._run(func, "export_tags", show_output, items, track=False)
+
+    def _plan_export_tags(self, writer: export.ExportWriter, keys: list[str],
+                          start: int) -> tuple[Callable[[str], FileResult], Iterator[str]]:
+        """
+        Internal method that plans writing the record of every file from a position
+        :return: The per-file work, and the paths to run it for
+        """
+        # The positions of the files in flight. A path listed more than once has more than one position
+        positions: dict[str, list[int]] = {}
+        positions_lock = threading.Lock()
+
+        def items() -> Iterator[str]:
+            for position, mp3_path in enumerate(itertools.islice(self._iter_paths(), start, None), start):
+                with positions_lock:
+                    positions.setdefault(mp3_path, []).append(position)
+                yield mp3_path
+
+        def export_file(mp3_path: str) -> FileResult:
+            with positions_lock:
+                waiting = positions[mp3_path]
+                position = waiting.pop(0)
+                if not waiting:
+                    del positions[mp3_path]
+            record = {export.PATH: mp3_path}
+            try:
+                record = export.export_record(mp3_path, keys, self._index)
+            except Exception as error:
+                record[export.ERROR] = str(error)
+                raise
+            finally:
+                writer.write(position, record)
+            return FileResult(mp3_path, runner.WRITTEN, f"Exported the tags of '{mp3_path}'")
+
+        return export_file, items()
 
     def copy_tags(self, dest_dir: str, search_subfolders=True, tag_list: list[Tag] | Literal["all_tags"] = _ALL_TAGS,
-                  complement=False, show_output=True):
+                  complement=False, show_output=True) -> BatchResult:
         """
         Copy the tags from all the MP3 files to other MP3 files of the same name in a specified directory.
-        :param dest_dir: The directory to look for matching MP3 files.
+        :param dest_dir: The directory to look for matching MP3 files. Files are matched by name,
+            ignoring case and surrounding whitespace. Names that match more than one file in
+            dest_dir, or more than one of the MP3 files, are reported and skipped.
         :param search_subfolders: Whether to include subfolders of dest_dir in the search
         :param tag_list: A list of tags, where each item in the list should be a member of the Tag class.
         :param complement: Whether to check for if a tag is in the list or if an item is not in the list.
             If this param is False (default), this function will apply all tags in tag_list. If it is True,
             this function will apply to all tags except those that are in tag_list.
         :param show_output: Whether to show console output
+        :return: A summary of the files that were processed
         """
+        return self._run(self._plan_copy_tags(dest_dir, search_subfolders, tag_list, complement),
+                         "copy_tags", show_output,
+                         args={"dest_dir": dest_dir, "search_subfolders": search_subfolders, "tag_list": tag_list,
+                               "complement": complement})
 
+    def _plan_copy_tags(self, dest_dir: str, search_subfolders: bool, tag_list: list[Tag] | Literal["all_tags"],
+                        complement: bool) -> Callable[[str], FileResult] | None:
         if tag_list == _ALL_TAGS and complement:
-            return  # Handle edge case
+            return None  # Handle edge case
 
         if tag_list == _ALL_TAGS:
             tag_set = None
@@ -191,32 +690,45 @@ class EasyMP3:
                 tag.check_tag_key(_tag)
                 tag_set.add(_tag.value)
 
-        all_files = util.get_all_files(dest_dir, search_subfolders=True)
-        for mp3_path in self.mp3_list:
+        dest_files = util.group_by_name(util.get_all_files(dest_dir, search_subfolders))
+        source_files = util.group_by_name(self.mp3_list)
+
+        def copy(mp3_path: str) -> FileResult:
             src_base_name = os.path.basename(mp3_path)
-            dest_file_path = None
-            for file_path in all_files:
-                dest_base_name = os.path.basename(file_path)
-                if src_base_name.lower().strip() == dest_base_name.lower().strip():
-                    dest_file_path = file_path
-                    break
+            name = util.normalize_name(src_base_name)
+            matches = dest_files.get(name, [])
 
-            if dest_file_path is None:
-                print(f"File '{src_base_name}' not found in '{dest_dir}' with search_subfolders={search_subfolders}",
-                      file=sys.stderr)
-                continue
+            if not matches:
+                message = f"File '{src_base_name}' not found in '{dest_dir}' with search_subfolders={search_subfolders}"
+                return FileResult(mp3_path, runner.SKIPPED, message)
+            if len(matches) > 1:
+                message = (f"File '{src_base_name}' is ambiguous in '{dest_dir}' and will be skipped. "
+                           f"Matching files: {matches}")
+                return FileResult(mp3_path, runner.SKIPPED, message)
+            if len(source_files.get(name, [])) > 1:
+                message = (f"File '{src_base_name}' is shared by more than one source file and will be skipped. "
+                           f"Source files: {source_files[name]}")
+                return FileResult(mp3_path, runner.SKIPPED, message)
 
-            util.copy_tags(mp3_path, dest_file_path, tag_set, complement)
-            if show_output:
-                print(f"Tags successfully copied from '{mp3_path}' to '{dest_file_path}'")
+            dest_file_path = matches[0]
+            if not util.copy_tags(mp3_path, dest_file_path, tag_set, complement, self._padding_for(dest_file_path)):
+                message = f"'{dest_file_path}' already has the tags of '{mp3_path}'"
+                return FileResult(mp3_path, runner.UNCHANGED, message)
+            self._update_index(dest_file_path)
+            message = f"Tags successfully copied from '{mp3_path}' to '{dest_file_path}'"
+            return FileResult(mp3_path, runner.WRITTEN, message)
 
-    def extract_cover_arts(self, folder_path: str, template_str: str | None = None,
-                           rename_invalid=True, show_output=True) -> None:
+        return copy
+
+    def extract_cover_arts(self, folder_path: str, template_str: str | Template | None = None,
+                           rename_invalid=True, show_output=True,
+                           dedupe: Literal["hardlink", "symlink", "manifest"] | None = None,
+                           manifest_path: str | None = None) -> BatchResult:
         """
         Extracts the cover arts for all MP3 files
         :param folder_path: A string representing the directory for the extracted cover arts
         :param template_str: A string representing how each extracted cover art should be named.
-                            ex. f"{Tag.TITLE} - {Tag.ARTIST}".
+                            ex. f"{Tag.TITLE} - {Tag.ARTIST}". Can also be a compiled Template.
                             - Tags can also create new directories used to group cover arts.
                                 Ex. f"{Tag.ARTIST}\\{Tag.TITLE}"
                                 - This will create a folder for each artist with their cover art images
@@ -225,94 +737,431 @@ class EasyMP3:
         :param rename_invalid: Whether to automatically rename invalid filenames or to prompt
                             the user for a new name every time an invalid filename is found
         :param show_output: Whether to show the console output
+        :param dedupe: Whether to write each distinct image only once. The distinct images are named
+                       after the SHA-256 digest of their data, and each MP3 file gets
+                       - "hardlink": a hard link to its image, named with the template
+                       - "symlink": a symbolic link to its image, named with the template
+                       - "manifest": no file of its own
+                       Either way, a JSON Lines manifest maps every MP3 file to its image.
+                       The default of None writes an image for every MP3 file.
+        :param manifest_path: The path to the manifest when `dedupe` is used. Default is "covers.jsonl"
+                              in `folder_path`.
+        :return: A summary of the files that were processed
         """
-        tag_list = tag.get_tag_list(string=False)
+        args = {"folder_path": folder_path, "template_str": template_str, "rename_invalid": rename_invalid,
+                "dedupe": dedupe, "manifest_path": manifest_path}
+        # A resumed run skips the files already done, so their manifest entries are kept
+        resumed = self._journal is not None and self._journal.resumes("extract_cover_arts", args)
+        return self._run(self._plan_extract_cover_arts(folder_path, template_str, rename_invalid, dedupe,
+                                                       manifest_path, resumed), "extract_cover_arts", show_output,
+                         args=args)
+
+    def _plan_extract_cover_arts(self, folder_path: str, template_str: str | Template | None, rename_invalid: bool,
+                                 dedupe: str | None = None, manifest_path: str | None = None,
+                                 resumed=False) -> Callable[[str], FileResult]:
+        template = None if template_str is None else Template.compile(template_str)
         os.makedirs(folder_path, exist_ok=True)
-        for mp3_path in self._list:
-            if template_str is None:
+        extracted = None if dedupe is None else ExtractedCovers(folder_path, dedupe, manifest_path, append=resumed)
+
+        def extract(mp3_path: str) -> FileResult:
+            if template is None:
                 cover_name_no_extension = util.filename_no_extension(mp3_path)
             else:
-                cover_name_no_extension = self._new_name_from_template(mp3_path, template_str, tag_list, rename_invalid)
+                cover_name_no_extension = template.render(self._read_tags(mp3_path), rename_invalid)
+            digest = None
+            if self._index is not None:
+                digest = self._index.get(mp3_path).cover_digest
+                if digest is None:
+                    message = f"No cover art found for file: {mp3_path}"
+                    return FileResult(mp3_path, runner.SKIPPED, message)
             dest_path_no_extension = os.path.join(folder_path, cover_name_no_extension)
-            util.extract_cover_art(mp3_path, dest_path_no_extension, show_output)
 
-    def _reload_directory(self) -> None:
+            if extracted is None:
+                dest_path = util.extract_cover_art(mp3_path, dest_path_no_extension)
+                if dest_path is None:
+                    return FileResult(mp3_path, runner.SKIPPED, f"No cover art found for file: {mp3_path}")
+                return FileResult(mp3_path, runner.WRITTEN, f"Successfully extracted cover art from MP3 with path "
+                                                            f"'{mp3_path}' to file '{dest_path}'")
+
+            apic = None
+            if digest is None or digest not in extracted:
+                apic = util.read_cover(mp3_path)
+                if apic is None:
+                    message = f"No cover art found for file: {mp3_path}"
+                    return FileResult(mp3_path, runner.SKIPPED, message)
+                digest = hashlib.sha256(apic.data).hexdigest()
+            status, message = extracted.add(mp3_path, digest, apic, dest_path_no_extension)
+            return FileResult(mp3_path, status, message)
+
+        return extract
+
+    def shrink_cover_arts(self, transform: CoverTransform, show_output=True) -> BatchResult:
+        """
+        Downscales and recompresses the cover arts already embedded in the MP3 files. Each distinct
+        image is encoded once and reused for every file that shares it. Files whose cover arts are
+        already small enough are not saved. With a PaddingPolicy, the space freed in each file is kept
+        as padding for later edits instead of making the file smaller.
+        ex. tagger.shrink_cover_arts(CoverTransform(max_size=600, image_format="JPEG", quality=80))
+        :param transform: The CoverTransform to apply to every cover art
+        :param show_output: Whether to show the console output
+        :return: A summary of the files that were processed
+        """
+        return self._run(self._plan_shrink_cover_arts(transform), "shrink_cover_arts", show_output,
+                         args={"transform": transform})
+
+    def _plan_shrink_cover_arts(self, transform: CoverTransform) -> Callable[[str], FileResult]:
+        return self._plan_edit(self._edit_shrink_cover_arts(transform))
+
+    def _edit_shrink_cover_arts(self, transform: CoverTransform) -> Edit:
+        if not isinstance(transform, CoverTransform):
+            raise TypeError(f"Expected a CoverTransform. Invalid transform: {transform}")
+
+        def shrink(mp3_path: str, file_tags: FileTags) -> tuple[str, str]:
+            frames = [frame for frame in file_tags.id3.getall('APIC') if frame.mime.lower().startswith("image")]
+            if not frames:
+                message = f"No cover art found for file: {mp3_path}"
+                return runner.SKIPPED, message
+
+            changed = False
+            for frame in frames:
+                data, mime_type = transform.apply(frame.data, frame.mime.lower())
+                if data != frame.data:
+                    frame.data = data
+                    frame.mime = mime_type
+                    changed = True
+            if not changed:
+                message = f"The cover arts of '{mp3_path}' are already small enough"
+                return runner.UNCHANGED, message
+            message = f"Cover arts successfully shrunk for '{mp3_path}'"
+            return runner.WRITTEN, message
+
+        return shrink
+
+    def rollback_renames(self, run_id: int | None = None, show_output=True) -> BatchResult:
         """
-        Internal method that resets the list of paths to mp3 files. Used after filenames are changed
+        Undoes the moves and copies recorded in the journal by a run of set_filename_from_tags
+        (or a renaming edit session), including one that was interrupted. Moved files are moved
+        back to their old paths and copies are removed. Tag changes are not undone.
+        :param run_id: The run to undo (see Journal.runs), or None for the last run that moved or copied files
+        :param show_output: Whether to show the console output
+        :return: A summary of the files that were processed. Its `renamed` maps the path of every file
+                 that was moved back to its old path, and `mp3_list` is updated with the old paths.
+        :raises ValueError: If the tagger has no journal
         """
-        self._list = util.get_all_mp3s(self._directory, self._search_sub)
+        if self._journal is None:
+            raise ValueError("Renames can only be rolled back with a journal")
+        entries = {entry.new_path: entry for entry in self._journal.renames(run_id)}
+
+        def roll_back(new_mp3_path: str) -> FileResult:
+            entry: RenameEntry = entries[new_mp3_path]
+            old_mp3_path = entry.old_path
+            if entry.copy:
+                if not os.path.exists(new_mp3_path):
+                    status, message = runner.UNCHANGED, f"The copy '{new_mp3_path}' does not exist"
+                else:
+                    os.unlink(new_mp3_path)
+                    status, message = runner.WRITTEN, f"Removed the copy '{new_mp3_path}' of '{old_mp3_path}'"
+                self._journal.record_rollback(entry)
+                return FileResult(new_mp3_path, status, message)
+
+            if not os.path.exists(new_mp3_path) and os.path.exists(old_mp3_path):
+                # The run was interrupted before the file was moved
+                self._journal.record_rollback(entry)
+                return FileResult(new_mp3_path, runner.UNCHANGED, f"'{old_mp3_path}' was never moved")
+            if os.path.exists(old_mp3_path) and not os.path.samefile(new_mp3_path, old_mp3_path):
+                raise exception.FileCollisionError(f"A file already exists at '{old_mp3_path}'")
+            placement.move_file(new_mp3_path, old_mp3_path)
+            if self._index is not None:
+                self._index.rename(new_mp3_path, old_mp3_path)
+            self._journal.record_rollback(entry)
+            message = f"Successfully moved '{new_mp3_path}' back to {old_mp3_path}"
+            return FileResult(new_mp3_path, runner.WRITTEN, message, new_path=old_mp3_path)
 
-    @staticmethod
-    def _new_name_from_template(mp3_path: str, template: str, tag_list: list[Tag], rename_invalid: bool) -> str:
+        result = BatchResult()
+        sink = self._sink(show_output)
+        with self._open_executor() as executor, \
+                closing(runner.iter_results(list(entries), roll_back, executor, self._workers,
+                                            sink, "rollback_renames", self._profiler)) as results:
+            for file_result in results:
+                result.add(file_result)
+        self._update_paths(result.renamed, copy=False)
+        sink(Event(events.FINISHED, "rollback_renames", summary=result))
+        return result
+
+    def batch(self, show_output=True) -> EditSession:
         """
-        Internal method that parses template strings based on the tags of an MP3 file
-        :param mp3_path: The path to the mp3 file
-        :param template: A traditional string template. Ex. f"{Tag.TITLE}"
-        :param tag_list: A list of tags from the Tag class
-        :param rename_invalid: Whether to rename invalid files automatically or prompt the user
+        Starts an edit session that queues operations and then applies them file by file, so that
+        each file is parsed and saved once no matter how many operations are queued. A queued
+        rename is applied last. The session is applied when the `with` block exits.
+        ex.
+            with tagger.batch() as session:
+                session.set_tags_from_filename(f"{Tag.TITLE} - {Tag.ARTIST}")
+                session.set_cover_art(covers_dir)
+                session.set_filename_from_tags(f"{Tag.ARTIST} - {Tag.TITLE}")
+            print(session.result)
+        :param show_output: Whether to show the console output
+        :return: The new edit session
         """
-        audio = util.construct_mp3_obj(mp3_path)
-        new_name = template
-        for _tag in tag_list:
-            new_val = audio.get(_tag.value, f"NO{_tag.name}")
+        return EditSession(self, show_output)
 
-            if isinstance(new_val, list):
-                new_val = util.list_to_str(new_val)
-            new_val_translated = new_val.translate(INVALID_CHAR_TRANS)
-            if rename_invalid:
-                new_val = new_val_translated
-            elif not util.is_valid_sub_file_name(new_val) and _tag.name in new_name:
-                new_val = util.get_valid_replacement(new_val)
-                print()
+    def _run(self, func: Callable[[str], FileResult] | None, operation: str, show_output=True,
+             paths: Iterable[str] | None = None, track=True, args: dict | None = None) -> BatchResult:
+        """
+        Internal method that runs the per-file work of a batch operation for every MP3 file,
+        on the executor or thread pool if there is one. Errors are collected per file instead
+        of aborting the batch.
+        :param func: The per-file work, or None if the operation has nothing to do
+        :param operation: The name of the batch operation, used in the events
+        :param show_output: Whether to show the console output if there is no event sink
+        :param paths: The paths to run the work for, or None for every MP3 file
+        :param track: Whether to record the operation in the journal, if there is one
+        :param args: The arguments the operation was called with, so that the journal only resumes
+                     an unfinished run of the same call
+        :return: A summary of the files that were processed
+        """
+        result = BatchResult()
+        sink = self._sink(show_output)
+        profiler = self._profiler
+        if func is not None:
+            journal = self._journal if track else None
+            if journal is not None:
+                func = journal.track(func, operation, args)
+            if paths is None:
+                paths = self._iter_paths()
+            if profiler is not None:
+                paths = profiler.timed_paths(paths, operation)
+            with self._open_executor() as executor, \
+                    profiler.profiling(operation) if profiler is not None else nullcontext(), \
+                    closing(runner.iter_results(paths, func, executor, self._workers,
+                                                sink, operation, profiler)) as results:
+                for file_result in results:
+                    result.add(file_result)
+            if journal is not None:
+                journal.finish(result)
+        sink(Event(events.FINISHED, operation, summary=result))
+        return result
 
-            if new_val != new_val_translated:
-                pass
-            new_name = new_name.replace(_tag.name, new_val)
-        return new_name
+    def _sink(self, show_output: bool) -> EventSink:
+        """
+        Internal method that gets the event sink of a batch operation
+        :param show_output: Whether to show the console output if there is no event sink
+        """
+        if self._on_event is not None:
+            return self._on_event
+        return PrintSink(show_output)
 
-    @staticmethod
-    def _apply_cover_art_data(mp3_path: str, cover_data, mime_type: str):
+    def _plan_edit(self, edit: Edit) -> Callable[[str], FileResult]:
         """
-        An internal method that adds cover art to a single MP3 file
-        :param mp3_path: Path to the MP3 file.
-        :param cover_data: Path to the cover image.
+        Internal method that turns an edit into per-file work that parses the file, applies the
+        edit and saves the file only if the edit changed it
+        :param edit: The edit to apply to each file
+        :return: The per-file work
         """
+        def run_edit(mp3_path: str) -> FileResult:
+            file_tags = FileTags(mp3_path, self._index)
+            status, message = edit(mp3_path, file_tags)
+            if status == runner.WRITTEN:
+                file_tags.save(self._padding_for(mp3_path))
+                self._update_index(mp3_path)
+            return FileResult(mp3_path, status, message)
 
-        apic = APIC(encoding=3, mime=mime_type, type=3, desc='Cover', data=cover_data)
+        return run_edit
 
-        mp3_audio = MP3(mp3_path, ID3=ID3)
+    @contextmanager
+    def _open_executor(self):
+        """
+        Internal context manager that provides the executor for a batch operation, creating
+        a thread pool for the duration of the operation if only a number of workers was given
+        """
+        if self._executor is not None:
+            yield self._executor
+        elif self._workers > 1:
+            with ThreadPoolExecutor(max_workers=self._workers) as executor:
+                yield executor
+        else:
+            yield None
+
+    def _iter_paths(self) -> Iterator[str]:
+        """
+        Internal method that gets the paths to the mp3 files, reading them from the source if they are not kept
+        """
+        if self._list is not None:
+            return iter(self._list)
+        return self._source()
 
-        if mp3_audio.tags is None:
-            mp3_audio.add_tags()
+    def _update_paths(self, renamed: dict[str, str], copy: bool) -> None:
+        """
+        Internal method that replaces the paths of moved files in the list of paths to mp3 files.
+        Used after filenames are changed, instead of scanning the directory again
+        :param renamed: The old path of every renamed file mapped to its new path
+        :param copy: Whether the files were copied, in which case the list is left as is
+        """
+        if copy or not renamed or self._list is None:
+            return
+        self._list = [renamed.get(mp3_path, mp3_path) for mp3_path in self._list]
 
-        mp3_audio.tags.add(apic)
-        mp3_audio.save()
+    def _padding_for(self, mp3_path: str) -> PaddingFunction:
+        """
+        Internal method that gets the padding function for saving a file, counting the save in `save_stats`
+        :param mp3_path: The path to the mp3 file
+        """
+        return self._save_stats.track(mp3_path, self._padding)
 
-    @staticmethod
-    def _find_cover_from_file(song_name: str, covers_dir: str, search_subfolders: bool) -> str | None:
+    def _update_index(self, mp3_path: str) -> None:
         """
-        An internal method that searches for a matching cover image for a song name in the specified directory.
-        :param song_name: The name of the song to find a cover image for.
-        :param covers_dir: The directory containing potential cover images.
-        :param search_subfolders: Whether to include subfolders in the search.
-        :return: The path to the cover art or None if one is not found
+        Internal method that refreshes the index entry of a file after it was saved
+        :param mp3_path: The path to the mp3 file
         """
-        files = util.get_all_files(covers_dir, search_subfolders)
+        if self._index is not None:
+            self._index.update(mp3_path)
 
-        for file in files:
-            file_no_extension = util.filename_no_extension(file)
-            if file_no_extension.lower().strip() == song_name.lower().strip() and util.is_image(file):
-                return file
-        return None
+    def _read_tags(self, mp3_path: str):
+        """
+        Internal method that reads the EasyID3 values of a file, using the index if there is one
+        :param mp3_path: The path to the mp3 file
+        :return: A mapping of EasyID3 keys to their values
+        """
+        return FileTags(mp3_path, self._index).values()
 
     @property
     def mp3_list(self) -> list[str]:
+        """
+        The paths to the MP3 files. For a lazy EasyMP3 object, the paths are read the first time
+        this is used and kept from then on.
+        """
+        self._materialize()
         return self._list
 
+    def _materialize(self) -> None:
+        """
+        Internal method that reads the paths of a lazy EasyMP3 object and keeps them
+        """
+        if self._list is None:
+            self._list = list(self._source())
+
     @property
-    def mp3s_directory(self) -> str:
+    def mp3s_directory(self) -> str | None:
         return self._directory
 
+    @property
+    def lazy(self) -> bool:
+        return self._source is not None and self._list is None
+
     @property
     def include_subfolders(self) -> bool:
         return self._search_sub
+
+    @property
+    def exclude(self) -> list[str] | None:
+        return self._exclude
+
+    @property
+    def index(self) -> TagIndex | None:
+        return self._index
+
+    @property
+    def workers(self) -> int:
+        return self._workers
+
+    @property
+    def cover_cache(self) -> CoverCache:
+        return self._cover_cache
+
+    @property
+    def padding(self) -> PaddingPolicy | None:
+        return self._padding
+
+    @property
+    def save_stats(self) -> SaveStats:
+        return self._save_stats
+
+    @property
+    def on_event(self) -> EventSink | None:
+        return self._on_event
+
+    @property
+    def profiler(self) -> Profiler | None:
+        return self._profiler
+
+    @property
+    def journal(self) -> Journal | None:
+        return self._journal
+
+
+def _single_use(paths: Iterator[str]) -> Callable[[], Iterator[str]]:
+    """
+    Internal function that makes a source of paths that can only be read once
+    """
+    used = False
+
+    def source() -> Iterator[str]:
+        nonlocal used
+        if used:
+            raise RuntimeError("The paths of this EasyMP3 object can only be read once. "
+                               "Use mp3_list to keep them for more than one batch operation")
+        used = True
+        return paths
+
+    return source
+
+
+def _path_key(path: str) -> str:
+    """
+    Internal function that normalizes a path so that different spellings of the same path compare equal
+    """
+    return os.path.normcase(os.path.abspath(path))
+
+
+def _claim_path(mp3_path: str, new_mp3_path: str, claimed_paths: dict[str, str]) -> bool:
+    """
+    Internal function that claims the new path of a file that is moved or copied, so that two files
+    of a batch never get the same path and no existing file is replaced
+    :param mp3_path: The path to the MP3 file
+    :param new_mp3_path: The new path of the file
+    :param claimed_paths: The paths claimed so far in the batch (see _path_key), mapped to the file that claimed them
+    :return: Whether the path was claimed, or False if the file already has it
+    :raises FileCollisionError: If another file of the batch claimed the path, or another file exists there
+    """
+    claim = _path_key(new_mp3_path)
+    if claim == _path_key(mp3_path):
+        return False
+    if claim in claimed_paths:
+        raise exception.FileCollisionError(
+            f"'{claimed_paths[claim]}' in the batch is already renamed to '{new_mp3_path}'")
+    if os.path.exists(new_mp3_path) and not os.path.samefile(mp3_path, new_mp3_path):
+        raise exception.FileCollisionError(f"A file already exists at '{new_mp3_path}'")
+    claimed_paths[claim] = mp3_path
+    return True
+
+
+def _file_identity(path: str) -> list:
+    """
+    Internal function that identifies a file by its path, size and modification time, so that a
+    changed file is told apart from the one an unfinished run used
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return [os.path.abspath(path)]
+    return [os.path.abspath(path), stat.st_size, stat.st_mtime_ns]
+
+
+def _only_mp3s(paths: Iterator[str]) -> Iterator[str]:
+    """
+    Internal function that leaves out the paths that don't end with .mp3
+    """
+    return (path for path in paths if util.has_extension(path, (".mp3",)))
+
+
+def _read_path_list(list_file) -> Iterator[str]:
+    """
+    Internal function that reads the paths listed in a text file (or an open file), one per line
+    """
+    if isinstance(list_file, str):
+        with open(list_file, encoding="utf-8") as file:
+            yield from _read_path_list(file)
+        return
+    for line in list_file:
+        path = line.rstrip("\r\n")
+        if path.strip():
+            yield path
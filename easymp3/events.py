@@ -0,0 +1,108 @@
+import sys
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import TYPE_CHECKING, Callable, Iterator
+
+if TYPE_CHECKING:
+    from .runner import BatchResult
+
+# Per-file events, in the order they are emitted for a file
+STARTED = "started"
+BYTES = "bytes"
+WRITTEN = "written"
+SKIPPED = "skipped"
+UNCHANGED = "unchanged"
+FAILED = "failed"
+# Emitted once at the end of a batch operation
+FINISHED = "finished"
+
+_io_counts: ContextVar[list[int] | None] = ContextVar("easymp3_io_counts", default=None)
+
+
+class Event:
+    def __init__(self, kind: str, operation: str, path: str | None = None, message: str = "",
+                 error: BaseException | None = None, bytes_read=0, bytes_written=0,
+                 summary: "BatchResult | None" = None):
+        """
+        Something that happened during a batch operation, passed to the event sink of the tagger
+        :param kind: One of STARTED, BYTES, WRITTEN, UNCHANGED, SKIPPED or FAILED for a single file,
+                     or FINISHED for the whole batch
+        :param operation: The name of the batch operation. ex. "set_cover_art"
+        :param path: The path to the MP3 file, or None for FINISHED
+        :param message: A human-readable description of the outcome of the file
+        :param error: The exception raised while processing the file, for FAILED
+        :param bytes_read: The number of bytes read from disk for the file, for BYTES
+        :param bytes_written: The number of bytes written to disk for the file, for BYTES
+        :param summary: The summary of the batch operation, for FINISHED
+        """
+        self.kind = kind
+        self.operation = operation
+        self.path = path
+        self.message = message
+        self.error = error
+        self.bytes_read = bytes_read
+        self.bytes_written = bytes_written
+        self.summary = summary
+
+    def __repr__(self):
+        return f"Event({self.kind!r}, {self.operation!r}, {self.path!r})"
+
+
+# An event sink receives every event of a batch operation. With more than one worker, it is called
+# from the worker threads.
+EventSink = Callable[[Event], None]
+
+
+class PrintSink:
+    def __init__(self, show_output=True):
+        """
+        The default event sink, which prints the outcome of every file to the console.
+        Files that were skipped are printed to stderr. Errors are always printed to stderr,
+        even if the rest of the output is not shown.
+        :param show_output: Whether to show the console output
+        """
+        self.show_output = show_output
+
+    def __call__(self, event: Event) -> None:
+        if event.kind == FAILED:
+            print(event.message, file=sys.stderr)
+        elif not self.show_output or not event.message:
+            return
+        elif event.kind == SKIPPED:
+            print(event.message, file=sys.stderr)
+        elif event.kind in (WRITTEN, UNCHANGED):
+            print(event.message)
+
+
+@contextmanager
+def counting_io() -> Iterator[list[int]]:
+    """
+    Counts the bytes read and written by the code run inside the block, in the current thread or task
+    :return: A list of the bytes read and the bytes written, updated as they are counted
+    """
+    counts = [0, 0]
+    token = _io_counts.set(counts)
+    try:
+        yield counts
+    finally:
+        _io_counts.reset(token)
+
+
+def count_read(num_bytes: int) -> None:
+    """
+    Counts bytes read from disk for the file being processed, if they are being counted
+    :param num_bytes: The number of bytes read
+    """
+    counts = _io_counts.get()
+    if counts is not None:
+        counts[0] += num_bytes
+
+
+def count_written(num_bytes: int) -> None:
+    """
+    Counts bytes written to disk for the file being processed, if they are being counted
+    :param num_bytes: The number of bytes written
+    """
+    counts = _io_counts.get()
+    if counts is not None:
+        counts[1] += num_bytes
@@ -32,3 +32,11 @@ class InvalidCoversDirectoryError(EasyMP3Error):
 
 class InvalidCoverArtDataError(EasyMP3Error):
     pass
+
+
+class FileCollisionError(EasyMP3Error):
+    pass
+
+
+class InvalidManifestError(EasyMP3Error):
+    pass
@@ -0,0 +1,156 @@
+import csv
+import json
+import os
+import threading
+from typing import Any, Iterable
+
+from . import util
+from .index import TagIndex, cover_digest
+from .manifest import CSV, JSONL
+from .tag import Tag
+
+# The fields of every record besides the tags
+PATH = "path"
+SIZE = "size"
+DURATION = "duration"
+COVER_DIGEST = "cover_digest"
+ERROR = "error"
+
+# The tags exported by default. The cover art is exported as its digest, and performers are stored
+# under one key per role, so neither can be read under a single key.
+DEFAULT_TAGS = tuple(dict.fromkeys(_tag.value for _tag in Tag if _tag not in (Tag.COVER_ART, Tag.PERFORMER)))
+
+
+def export_record(mp3_path: str, keys: Iterable[str], index: TagIndex | None = None) -> dict[str, Any]:
+    """
+    Reads the record of an MP3 file for an export
+    :param mp3_path: The path to the MP3 file
+    :param keys: The EasyID3 keys of the tags to read
+    :param index: An optional TagIndex to read the tags and cover digest of unchanged files from
+    :return: The path, the tags (a string, a list of strings for a tag with more than one value, or None
+             for a missing tag), the size in bytes, the duration in seconds (None if it could not be read)
+             and the SHA-256 digest of the cover art (None if there is none)
+    """
+    if index is not None:
+        entry = index.get(mp3_path)
+        values, digest = entry.tags, entry.cover_digest
+    else:
+        id3 = util.read_id3(mp3_path)
+        values, digest = util.easy_view(id3), cover_digest(id3)
+    record: dict[str, Any] = {PATH: mp3_path}
+    for key in keys:
+        value = values.get(key)
+        record[key] = (value[0] if len(value) == 1 else list(value)) if value else None
+    record[SIZE] = os.path.getsize(mp3_path)
+    duration = util.read_duration(mp3_path)
+    record[DURATION] = round(duration, 3) if duration is not None else None
+    record[COVER_DIGEST] = digest
+    return record
+
+
+class ExportWriter:
+    def __init__(self, export_path: str, keys: list[str], export_format: str, ordered=True, start=0, append=False):
+        """
+        Writes the records of an export as they are read. Ordered records that are read early are held
+        until the records before them are written, so only the records of the files in flight are kept.
+        Every file gets exactly one record in the order of the files, so the number of records
+        in an ordered export is the position to resume it from.
+        :param export_path: The path to the export
+        :param keys: The EasyID3 keys of the exported tags
+        :param export_format: "csv" or "jsonl"
+        :param ordered: Whether to write the records in the order of their positions or as they arrive
+        :param start: The position of the first record
+        :param append: Whether to add the records to the end of an existing export
+        """
+        self._format = export_format
+        self._ordered = ordered
+        self._next = start
+        self._held: dict[int, dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._columns = [PATH, *keys, SIZE, DURATION, COVER_DIGEST, ERROR]
+        write_header = not (append and os.path.exists(export_path) and os.path.getsize(export_path) > 0)
+        self._file = open(export_path, "a" if append else "w", encoding="utf-8",
+                          newline="" if export_format == CSV else None)
+        if export_format == CSV:
+            self._csv = csv.writer(self._file)
+            if write_header:
+                self._csv.writerow(self._columns)
+
+    def write(self, position: int, record: dict[str, Any]) -> None:
+        """
+        Writes the record at a position, or holds it until the records before it are written
+        :param position: The position of the file of the record
+        :param record: The record of the file
+        """
+        with self._lock:
+            if not self._ordered:
+                self._write(record)
+                return
+            self._held[position] = record
+            while self._next in self._held:
+                self._write(self._held.pop(self._next))
+                self._next += 1
+
+    def _write(self, record: dict[str, Any]) -> None:
+        """
+        Internal method that writes a record. Must be called with the lock held.
+        """
+        if self._format == JSONL:
+            self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+            return
+        row = []
+        for column in self._columns:
+            value = record.get(column)
+            row.append("" if value is None else util.list_to_str(value) if isinstance(value, list) else value)
+        self._csv.writerow(row)
+
+    def close(self) -> None:
+        """
+        Closes the export. Records that are still held after a missing record (ex. when the export was
+        interrupted) are dropped, so that the number of records stays the position to resume from.
+        """
+        with self._lock:
+            self._held.clear()
+            self._file.close()
+
+    def __enter__(self) -> "ExportWriter":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+
+def count_records(export_path: str, export_format: str) -> int:
+    """
+    Counts the complete records of an export, removing a last record that was cut short
+    :param export_path: The path to the export
+    :param export_format: "csv" or "jsonl"
+    :return: The number of records, not counting the header of a CSV export
+    """
+    if not os.path.exists(export_path):
+        return 0
+    _trim_partial_line(export_path)
+    with open(export_path, encoding="utf-8", newline="" if export_format == CSV else None) as export:
+        if export_format == CSV:
+            return max(sum(1 for _ in csv.reader(export)) - 1, 0)
+        return sum(1 for line in export if line.strip())
+
+
+def _trim_partial_line(path: str) -> None:
+    """
+    Internal function that removes the end of a file after its last line break
+    """
+    with open(path, "rb+") as file:
+        end = file.seek(0, os.SEEK_END)
+        position = end
+        while position > 0:
+            step = min(position, 64 * 1024)
+            file.seek(position - step)
+            chunk = file.read(step)
+            newline = chunk.rfind(b"\n")
+            if newline != -1:
+                position = position - step + newline + 1
+                break
+            position -= step
+        if position != end:
+            file.truncate(position)
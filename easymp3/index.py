@@ -0,0 +1,161 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+
+from mutagen.id3 import ID3
+
+from . import util
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    inode INTEGER NOT NULL,
+    tags TEXT NOT NULL,
+    cover_digest TEXT
+)
+"""
+
+
+def cover_digest(id3: ID3) -> str | None:
+    """
+    Computes a digest of the first cover art embedded in an MP3 file
+    :param id3: The ID3 tags of the MP3 file
+    :return: The SHA-256 hex digest of the cover art data or None if there is no cover art
+    """
+    apic_frames = id3.getall('APIC')
+    if not apic_frames:
+        return None
+    return hashlib.sha256(apic_frames[0].data).hexdigest()
+
+
+class IndexEntry:
+    def __init__(self, tags: dict[str, list[str]], cover_digest: str | None):
+        """
+        A single file as stored in a TagIndex
+        :param tags: The decoded EasyID3 values of the file
+        :param cover_digest: The digest of the first embedded cover art or None if there is none
+        """
+        self.tags = tags
+        self.cover_digest = cover_digest
+
+    @property
+    def has_cover_art(self) -> bool:
+        return self.cover_digest is not None
+
+
+class TagIndex:
+    def __init__(self, db_path: str):
+        """
+        An on-disk (SQLite) index of the decoded tags of MP3 files. Each entry is stored
+        together with the size, modification time and inode of the file, and is only
+        served while all three still match the file on disk.
+        :param db_path: Path to the index database. It is created if it does not exist.
+                        ex. os.path.join(songs_directory, ".easymp3-index.sqlite")
+        """
+        self._db_path = db_path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        with self._conn:
+            self._conn.execute(_SCHEMA)
+
+    def get(self, mp3_path: str) -> IndexEntry:
+        """
+        Gets the entry for an MP3 file, parsing the file only if it is not indexed
+        or has changed since it was indexed
+        :param mp3_path: The path to the MP3 file
+        :return: The up-to-date entry for the file
+        """
+        entry = self.lookup(mp3_path)
+        if entry is None:
+            entry = self.update(mp3_path)
+        return entry
+
+    def lookup(self, mp3_path: str) -> IndexEntry | None:
+        """
+        Gets the entry for an MP3 file without parsing it
+        :param mp3_path: The path to the MP3 file
+        :return: The entry or None if the file is not indexed or has changed since it was indexed
+        """
+        stat = os.stat(mp3_path)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT size, mtime_ns, inode, tags, cover_digest FROM files WHERE path = ?",
+                (_key(mp3_path),)).fetchone()
+        if row is None or tuple(row[:3]) != _stat_key(stat):
+            return None
+        return IndexEntry(json.loads(row[3]), row[4])
+
+    def read_tags(self, mp3_path: str) -> dict[str, list[str]]:
+        """
+        Gets the decoded EasyID3 values of an MP3 file, served from the index when possible
+        :param mp3_path: The path to the MP3 file
+        :return: A dictionary of EasyID3 keys and their values
+        """
+        return self.get(mp3_path).tags
+
+    def update(self, mp3_path: str) -> IndexEntry:
+        """
+        Parses an MP3 file and stores its tags in the index. Should be called after every
+        save to the file.
+        :param mp3_path: The path to the MP3 file
+        :return: The new entry for the file
+        """
+        stat = os.stat(mp3_path)
+        id3 = util.read_id3(mp3_path)
+        easy = util.easy_view(id3)
+        entry = IndexEntry({key: list(values) for key, values in easy.items()}, cover_digest(id3))
+
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO files (path, size, mtime_ns, inode, tags, cover_digest) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (_key(mp3_path), *_stat_key(stat), json.dumps(entry.tags), entry.cover_digest))
+        return entry
+
+    def rename(self, old_path: str, new_path: str) -> None:
+        """
+        Moves the entry of a renamed file to its new path. The entry stays valid only if
+        the rename kept the size, modification time and inode of the file.
+        :param old_path: The path the file was indexed under
+        :param new_path: The new path of the file
+        """
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM files WHERE path = ?", (_key(new_path),))
+            self._conn.execute("UPDATE files SET path = ? WHERE path = ?", (_key(new_path), _key(old_path)))
+
+    def forget(self, mp3_path: str) -> None:
+        """
+        Removes the entry of an MP3 file from the index
+        :param mp3_path: The path to the MP3 file
+        """
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM files WHERE path = ?", (_key(mp3_path),))
+
+    def close(self) -> None:
+        """
+        Closes the connection to the index database
+        """
+        with self._lock:
+            self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    @property
+    def db_path(self) -> str:
+        return self._db_path
+
+
+def _key(mp3_path: str) -> str:
+    return os.path.abspath(mp3_path)
+
+
+def _stat_key(stat: os.stat_result) -> tuple[int, int, int]:
+    return stat.st_size, stat.st_mtime_ns, stat.st_ino
@@ -0,0 +1,312 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from enum import Enum
+from typing import Any, Callable
+
+from . import runner
+from .covers import CoverIndex
+from .runner import BatchResult, FileResult
+from .template import Template
+
+# The statuses of files that a resumed run does not process again. Failed files are retried.
+_DONE = (runner.WRITTEN, runner.UNCHANGED, runner.SKIPPED)
+
+DEFAULT_FSYNC_EVERY = 1000
+
+
+class _Run:
+    def __init__(self, run_id: int, operation: str, fingerprint: str | None = None):
+        """
+        Internal record of one batch operation in a journal
+        """
+        self.run_id = run_id
+        self.operation = operation
+        self.fingerprint = fingerprint
+        self.finished = False
+        self.done: set[str] = set()
+        # Old path mapped to the new path and whether the file was copied, in the order they were placed
+        self.placed: dict[str, tuple[str, bool]] = {}
+        self.rolled_back: set[str] = set()
+
+
+class RenameEntry:
+    def __init__(self, run_id: int, old_path: str, new_path: str, copy: bool):
+        """
+        A file that a run of a journal moved or copied
+        :param run_id: The run that placed the file
+        :param old_path: The path of the file before it was placed
+        :param new_path: The path it was moved or copied to
+        :param copy: Whether the file was copied instead of moved
+        """
+        self.run_id = run_id
+        self.old_path = old_path
+        self.new_path = new_path
+        self.copy = copy
+
+    def __repr__(self):
+        return f"RenameEntry({self.old_path!r} -> {self.new_path!r}, copy={self.copy})"
+
+
+class Journal:
+    def __init__(self, journal_path: str, fsync_every=DEFAULT_FSYNC_EVERY):
+        """
+        An append-only JSON Lines journal of the batch operations of an EasyMP3 object. Every file that
+        is done is recorded as soon as it is done, and every move or copy is recorded before it happens.
+        If an operation is interrupted, running the same operation again with the same journal skips the
+        files that were already done (failed files are retried). The moves and copies of a run can be
+        undone with EasyMP3.rollback_renames.
+
+        Only the last run in the journal is resumed, and only by the same operation called with the same
+        arguments. Each line is
+        flushed as it is written, so the journal survives the process being killed. It is also synced
+        to disk every `fsync_every` lines and at the end of every run, to survive a power loss.
+        A journal should only be used by one EasyMP3 object at a time.
+        :param journal_path: The path to the journal. It is created if it does not exist.
+                             ex. os.path.join(songs_directory, ".easymp3-journal.jsonl")
+        :param fsync_every: The number of lines between syncs to disk
+        """
+        self._path = journal_path
+        self._fsync_every = max(fsync_every, 1)
+        self._runs: dict[int, _Run] = {}
+        self._current: _Run | None = None
+        self._skipped: frozenset[str] = frozenset()
+        self._unsynced = 0
+        self._lock = threading.Lock()
+        self._load()
+        self._file = open(journal_path, "a", encoding="utf-8")
+
+    def _load(self) -> None:
+        """
+        Internal method that reads the runs of an existing journal. A last line cut short by a crash is ignored.
+        """
+        if not os.path.isfile(self._path):
+            return
+        with open(self._path, encoding="utf-8") as journal:
+            for line in journal:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                self._apply(entry)
+
+    def _apply(self, entry: dict) -> None:
+        """
+        Internal method that updates the runs with a line of the journal
+        """
+        run = self._runs.get(entry.get("run"))
+        if "begin" in entry:
+            self._runs[entry["run"]] = _Run(entry["run"], entry["begin"], entry.get("fingerprint"))
+        elif run is None:
+            return
+        elif "end" in entry:
+            run.finished = True
+        elif "place" in entry:
+            run.placed[entry["path"]] = (entry["new_path"], entry["place"] == "copy")
+        elif "rolled_back" in entry:
+            run.rolled_back.add(entry["rolled_back"])
+        elif entry.get("status") in _DONE:
+            run.done.add(entry["path"])
+
+    def _write(self, entry: dict, sync=False) -> None:
+        """
+        Internal method that appends a line to the journal. Must be called with the lock held.
+        """
+        self._apply(entry)
+        self._file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        self._file.flush()
+        self._unsynced += 1
+        if sync or self._unsynced >= self._fsync_every:
+            os.fsync(self._file.fileno())
+            self._unsynced = 0
+
+    def track(self, func: Callable[[str], FileResult], operation: str,
+              args: dict[str, Any] | None = None) -> Callable[[str], FileResult]:
+        """
+        Starts or resumes a run of an operation, and wraps its per-file work so that the files already
+        done are skipped and every file that is done is recorded. The last run is only resumed if it
+        is unfinished and was started by the same operation with the same arguments.
+        :param func: The per-file work of the operation
+        :param operation: The name of the batch operation
+        :param args: The arguments the operation was called with. ex. {"template_str": "{title}"}
+        :return: The per-file work to run instead
+        """
+        fingerprint = _fingerprint(operation, args)
+        with self._lock:
+            last = self._runs[max(self._runs)] if self._runs else None
+            if self._resumable(last, operation, fingerprint):
+                run = last
+            else:
+                run_id = last.run_id + 1 if last is not None else 1
+                self._write({"run": run_id, "begin": operation, "fingerprint": fingerprint, "time": time.time()},
+                            sync=True)
+                run = self._runs[run_id]
+            self._current = run
+            done = self._skipped = frozenset(run.done)
+
+        def journaled(mp3_path: str) -> FileResult:
+            if mp3_path in done:
+                message = f"'{mp3_path}' was already processed by an earlier {operation} run"
+                return FileResult(mp3_path, runner.UNCHANGED, message)
+            result = func(mp3_path)
+            with self._lock:
+                self._write({"run": run.run_id, "path": mp3_path, "status": result.status,
+                             "new_path": result.new_path})
+            return result
+
+        return journaled
+
+    def resumes(self, operation: str, args: dict[str, Any] | None = None) -> bool:
+        """
+        Checks whether tracking an operation would resume the last run instead of starting a new one
+        :param operation: The name of the batch operation
+        :param args: The arguments the operation was called with. See track
+        :return: Whether the last run would be resumed
+        """
+        with self._lock:
+            last = self._runs[max(self._runs)] if self._runs else None
+            return self._resumable(last, operation, _fingerprint(operation, args))
+
+    @staticmethod
+    def _resumable(run: _Run | None, operation: str, fingerprint: str) -> bool:
+        """
+        Internal method that checks if a run is unfinished and was started by the same call of an operation
+        """
+        return run is not None and run.operation == operation and run.fingerprint == fingerprint and not run.finished
+
+    def skips(self, mp3_path: str) -> bool:
+        """
+        Checks whether the per-file work of the current run skips a file, because the run was resumed
+        and the file was already done
+        :param mp3_path: The path to the MP3 file
+        :return: Whether the file is skipped
+        """
+        return self._current is not None and mp3_path in self._skipped
+
+    def record_place(self, old_path: str, new_path: str, copy: bool) -> None:
+        """
+        Records that a file is about to be moved or copied by the current run
+        :param old_path: The path of the file
+        :param new_path: The path it is moved or copied to
+        :param copy: Whether the file is copied instead of moved
+        """
+        with self._lock:
+            if self._current is None:
+                return
+            self._write({"run": self._current.run_id, "place": "copy" if copy else "move",
+                         "path": old_path, "new_path": new_path})
+
+    def finish(self, result: BatchResult) -> None:
+        """
+        Records that the current run is finished, so that it is not resumed
+        :param result: The summary of the run
+        """
+        with self._lock:
+            if self._current is None:
+                return
+            self._write({"run": self._current.run_id, "end": self._current.operation,
+                         "counts": dict(result.counts), "time": time.time()}, sync=True)
+            self._current = None
+            self._skipped = frozenset()
+
+    def renames(self, run_id: int | None = None) -> list[RenameEntry]:
+        """
+        Gets the moves and copies of a run that were not rolled back, most recent first
+        :param run_id: The run, or None for the last run that moved or copied files
+        :return: The moves and copies. A move recorded just before a crash may not have happened
+        """
+        with self._lock:
+            if run_id is None:
+                candidates = [run for run in self._runs.values() if set(run.placed) - run.rolled_back]
+                if not candidates:
+                    return []
+                run = max(candidates, key=lambda candidate: candidate.run_id)
+            else:
+                run = self._runs.get(run_id)
+                if run is None:
+                    raise KeyError(f"The journal has no run {run_id}")
+            return [RenameEntry(run.run_id, old_path, new_path, copy)
+                    for old_path, (new_path, copy) in reversed(run.placed.items())
+                    if old_path not in run.rolled_back]
+
+    def record_rollback(self, entry: RenameEntry) -> None:
+        """
+        Records that a move or copy was undone
+        :param entry: The move or copy
+        """
+        with self._lock:
+            self._write({"run": entry.run_id, "rolled_back": entry.old_path})
+
+    def sync(self) -> None:
+        """
+        Syncs the journal to disk
+        """
+        with self._lock:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._unsynced = 0
+
+    def close(self) -> None:
+        """
+        Syncs and closes the journal
+        """
+        with self._lock:
+            if self._file.closed:
+                return
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._file.close()
+
+    def __enter__(self) -> "Journal":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+    @property
+    def path(self) -> str:
+        return self._path
+
+    @property
+    def runs(self) -> list[dict]:
+        """
+        The runs in the journal, oldest first, with their operation, whether they finished, how many
+        files they completed and how many files they moved or copied
+        """
+        with self._lock:
+            return [{"run": run.run_id, "operation": run.operation, "finished": run.finished,
+                     "done": len(run.done), "placed": len(run.placed)}
+                    for run in sorted(self._runs.values(), key=lambda run: run.run_id)]
+
+
+def _fingerprint(operation: str, args: dict[str, Any] | None) -> str:
+    """
+    Internal function that gets the SHA-256 digest of an operation and its arguments
+    """
+    text = json.dumps([operation, _describe(args or {})], ensure_ascii=False)
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def _describe(value: Any) -> Any:
+    """
+    Internal function that turns an argument into a JSON value that stays the same across processes
+    """
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    if isinstance(value, Enum):
+        return _describe(value.value)
+    if isinstance(value, dict):
+        return sorted(([_describe(key), _describe(item)] for key, item in value.items()), key=json.dumps)
+    if isinstance(value, (set, frozenset)):
+        return sorted((_describe(item) for item in value), key=json.dumps)
+    if isinstance(value, (list, tuple)):
+        return [_describe(item) for item in value]
+    if isinstance(value, Template):
+        return value.source
+    if isinstance(value, CoverIndex):
+        return [type(value).__name__, value.directory]
+    if type(value).__repr__ is not object.__repr__:  # ex. CoverTransform
+        return repr(value)
+    return type(value).__name__
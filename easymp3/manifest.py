@@ -0,0 +1,214 @@
+import csv
+import json
+import os
+from typing import Any, Iterator, TextIO
+
+from . import exception
+from . import tag
+from . import util
+from .tag import Tag
+
+CSV = "csv"
+JSONL = "jsonl"
+MANIFEST_FORMATS = (CSV, JSONL)
+
+# How the rows of a manifest are matched to the MP3 files of a tagger
+MATCH_PATH = "path"
+MATCH_FILENAME = "filename"
+MATCH_MODES = (MATCH_PATH, MATCH_FILENAME)
+
+_EXTENSIONS = {".csv": CSV, ".jsonl": JSONL, ".ndjson": JSONL}
+
+
+class ManifestRow:
+    def __init__(self, line: int, key: str | None, tags: dict[str, str | list[str]], cover: str | None,
+                 error: str | None = None):
+        """
+        A single row of a tag manifest
+        :param line: The line number of the row in the manifest (for a CSV file, the first line of the row)
+        :param key: The path or filename that names the MP3 file, or None if the row has none.
+                    Paths are absolute.
+        :param tags: The EasyID3 keys of the row mapped to their values. Empty values are left out.
+        :param cover: The absolute path to the cover image of the row, or None if it has none
+        :param error: Why the row cannot be used, or None if it can
+        """
+        self.line = line
+        self.key = key
+        self.tags = tags
+        self.cover = cover
+        self.error = error
+
+    def __repr__(self):
+        return f"ManifestRow(line={self.line}, key={self.key!r})"
+
+
+def check_manifest_format(manifest_path: str, manifest_format: str | None = None) -> str:
+    """
+    Gets the format of a manifest or an export
+    :param manifest_path: The path to the manifest or export
+    :param manifest_format: "csv", "jsonl", or None to tell the format from the extension
+    :return: The format
+    :raises InvalidManifestError: If the format is unknown
+    """
+    if manifest_format is None:
+        manifest_format = _EXTENSIONS.get(os.path.splitext(manifest_path)[1].lower())
+        if manifest_format is None:
+            raise exception.InvalidManifestError(
+                f"Cannot tell the format of '{manifest_path}' from its extension. Pass its format")
+    if manifest_format not in MANIFEST_FORMATS:
+        raise exception.InvalidManifestError(
+            f"Invalid format '{manifest_format}'. Must be one of {', '.join(MANIFEST_FORMATS)}")
+    return manifest_format
+
+
+def iter_manifest(manifest_path: str, match: str = MATCH_PATH,
+                  manifest_format: str | None = None) -> Iterator[ManifestRow]:
+    """
+    Streams the rows of a tag manifest, reading one row at a time. Every row names an MP3 file under
+    the `match` key ("path" or "filename"), its tags under EasyID3 keys or Tag names
+    (ex. "artist" or "ARTIST"), and optionally a cover image under "cover_art".
+    Relative paths are relative to the folder of the manifest.
+
+    A CSV manifest has a header row, and empty cells are left unchanged. A JSON Lines manifest has
+    one object per line, a value can be a list of strings for a tag with more than one value, and
+    null leaves the tag unchanged. Rows that cannot be used are yielded with an error instead of
+    stopping the manifest.
+    :param manifest_path: The path to the manifest
+    :param match: The key that names the MP3 file of each row, "path" or "filename"
+    :param manifest_format: "csv", "jsonl", or None to tell the format from the extension
+    :return: The rows of the manifest
+    :raises InvalidManifestError: If the format is unknown, or the header of a CSV manifest has no
+                                  `match` column or has a column that is not a tag
+    """
+    if match not in MATCH_MODES:
+        raise ValueError(f"Invalid match '{match}'. Must be one of {', '.join(MATCH_MODES)}")
+    manifest_format = check_manifest_format(manifest_path, manifest_format)
+    base_dir = os.path.dirname(os.path.abspath(manifest_path))
+    keys = _KeyResolver(match)
+    manifest = open(manifest_path, encoding="utf-8-sig", newline="" if manifest_format == CSV else None)
+    try:
+        if manifest_format == CSV:
+            return _iter_csv(manifest, keys, base_dir)
+        return _iter_jsonl(manifest, keys, base_dir)
+    except BaseException:
+        manifest.close()
+        raise
+
+
+class _KeyResolver:
+    def __init__(self, match: str):
+        """
+        Internal cache that checks each column name of a manifest once
+        """
+        self.match = match
+        self._keys: dict[str, str | None] = {match: match, Tag.COVER_ART.value: Tag.COVER_ART.value}
+
+    def resolve(self, column: str) -> str | None:
+        """
+        Gets the EasyID3 key of a column, or None if it is not a tag
+        """
+        try:
+            return self._keys[column]
+        except KeyError:
+            pass
+        try:
+            key = tag.check_tag_key(Tag[column] if column in Tag.__members__ else column)
+        except exception.InvalidTagError:
+            key = None
+        self._keys[column] = key
+        return key
+
+
+def _iter_csv(manifest: TextIO, keys: _KeyResolver, base_dir: str) -> Iterator[ManifestRow]:
+    """
+    Internal function that checks the header of a CSV manifest and returns its rows
+    """
+    reader = csv.reader(manifest)
+    header = next(reader, None)
+    if header is None or keys.match not in header:
+        raise exception.InvalidManifestError(f"The manifest must have a '{keys.match}' column")
+    columns = []
+    for column in header:
+        key = keys.resolve(column)
+        if key is None:
+            raise exception.InvalidManifestError(f"The manifest column '{column}' is not a tag")
+        columns.append(key)
+    if len(set(columns)) != len(columns):
+        raise exception.InvalidManifestError("The manifest has the same tag in more than one column")
+
+    def rows() -> Iterator[ManifestRow]:
+        with manifest:
+            line = reader.line_num + 1
+            for cells in reader:
+                if cells:
+                    if len(cells) != len(columns):
+                        yield ManifestRow(line, None, {}, None,
+                                          f"The row has {len(cells)} cells instead of {len(columns)}")
+                    else:
+                        yield _make_row(line, dict(zip(columns, cells)), keys, base_dir)
+                line = reader.line_num + 1
+
+    return rows()
+
+
+def _iter_jsonl(manifest: TextIO, keys: _KeyResolver, base_dir: str) -> Iterator[ManifestRow]:
+    """
+    Internal function that returns the rows of a JSON Lines manifest
+    """
+    def rows() -> Iterator[ManifestRow]:
+        with manifest:
+            for line, text in enumerate(manifest, 1):
+                if not text.strip():
+                    continue
+                try:
+                    record = json.loads(text)
+                except json.JSONDecodeError as error:
+                    yield ManifestRow(line, None, {}, None, f"The line is not valid JSON: {error}")
+                    continue
+                if not isinstance(record, dict):
+                    yield ManifestRow(line, None, {}, None, "The line is not a JSON object")
+                    continue
+                values = {}
+                for column, value in record.items():
+                    key = keys.resolve(column)
+                    if key is None:
+                        yield ManifestRow(line, None, {}, None, f"'{column}' is not a tag")
+                        break
+                    values[key] = value
+                else:
+                    yield _make_row(line, values, keys, base_dir)
+
+    return rows()
+
+
+def _make_row(line: int, values: dict[str, Any], keys: _KeyResolver, base_dir: str) -> ManifestRow:
+    """
+    Internal function that checks the values of a row, keyed by EasyID3 key
+    """
+    file_key = values.pop(keys.match, None)
+    cover = values.pop(Tag.COVER_ART.value, None)
+    if not isinstance(file_key, str) or not file_key.strip():
+        return ManifestRow(line, None, {}, None, f"The row has no '{keys.match}'")
+    if keys.match == MATCH_PATH:
+        file_key = os.path.join(base_dir, file_key)
+    if cover is not None and cover != "":
+        # Relative paths are relative to the manifest, so the path is joined before it is checked
+        if not isinstance(cover, str) or not util.is_image(os.path.join(base_dir, cover)):
+            return ManifestRow(line, file_key, {}, None,
+                               f"The value for {Tag.COVER_ART} must be a path to an image. Invalid value: {cover}")
+        cover = os.path.join(base_dir, cover)
+    else:
+        cover = None
+
+    tags = {}
+    for key, value in values.items():
+        if value is None or value == "":
+            continue
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            value = str(value)
+        if not (isinstance(value, str) or
+                isinstance(value, list) and value and all(isinstance(item, str) for item in value)):
+            return ManifestRow(line, file_key, {}, None,
+                               f"The value for key {key} must be a string or a list of strings. Invalid value: {value}")
+        tags[key] = value
+    return ManifestRow(line, file_key, tags, cover)
@@ -0,0 +1,106 @@
+import threading
+from typing import Callable
+
+from mutagen import PaddingInfo
+
+PaddingFunction = Callable[[PaddingInfo], int]
+
+
+class PaddingPolicy:
+    def __init__(self, reserve_bytes=0, reserve_ratio=0.0):
+        """
+        Decides how much padding to leave after the ID3 tag when a file is saved.
+        Tags that still fit in the existing padding are always written in place, and the
+        padding is never shrunk. Only when the tags no longer fit is the file rewritten,
+        and then enough padding is reserved that later edits can be written in place.
+        :param reserve_bytes: The padding to reserve in bytes when the file is rewritten.
+                              ex. 64 * 1024
+        :param reserve_ratio: The padding to reserve when the file is rewritten, as a fraction of
+                              the size of the audio data. ex. 0.01 for 1%. The larger of the two is used.
+        """
+        if reserve_bytes < 0 or reserve_ratio < 0:
+            raise ValueError("The reserved padding cannot be negative")
+        self.reserve_bytes = reserve_bytes
+        self.reserve_ratio = reserve_ratio
+
+    def __call__(self, info: PaddingInfo) -> int:
+        """
+        The padding function passed to mutagen when saving
+        :param info: The padding left if the tag is written in place, and the size of the audio data
+        :return: The padding to use
+        """
+        if info.padding >= 0:
+            return info.padding
+        return max(self.reserve_bytes, int(info.size * self.reserve_ratio))
+
+    def __repr__(self):
+        return f"PaddingPolicy(reserve_bytes={self.reserve_bytes}, reserve_ratio={self.reserve_ratio})"
+
+
+def default_padding(info: PaddingInfo) -> int:
+    """
+    The padding mutagen uses when no padding function is given
+    :param info: The padding left if the tag is written in place, and the size of the audio data
+    :return: The padding to use
+    """
+    return info.get_default_padding()
+
+
+class SaveStats:
+    def __init__(self):
+        """
+        Counts, in total and per file, how many saves were written in place (the tag kept its size)
+        and how many had to rewrite the whole file (the tag grew or shrank).
+        """
+        self.in_place = 0
+        self.rewritten = 0
+        self._files: dict[str, list[int]] = {}
+        self._lock = threading.Lock()
+
+    def track(self, mp3_path: str, padding: PaddingFunction | None = None) -> PaddingFunction:
+        """
+        Wraps a padding function so that the save it is used for is counted
+        :param mp3_path: The path to the file being saved
+        :param padding: The padding function to wrap, or None for mutagen's default
+        :return: The padding function to pass to mutagen
+        """
+        if padding is None:
+            padding = default_padding
+
+        def tracked_padding(info: PaddingInfo) -> int:
+            new_padding = padding(info)
+            self.record(mp3_path, in_place=new_padding == info.padding)
+            return new_padding
+
+        return tracked_padding
+
+    def record(self, mp3_path: str, in_place: bool) -> None:
+        """
+        Counts a save
+        :param mp3_path: The path to the file that was saved
+        :param in_place: Whether the save was written in place
+        """
+        with self._lock:
+            counts = self._files.setdefault(mp3_path, [0, 0])
+            if in_place:
+                self.in_place += 1
+                counts[0] += 1
+            else:
+                self.rewritten += 1
+                counts[1] += 1
+
+    def for_file(self, mp3_path: str) -> tuple[int, int]:
+        """
+        Gets the counts of a single file
+        :param mp3_path: The path to the file
+        :return: The number of saves written in place and the number of full rewrites
+        """
+        in_place, rewritten = self._files.get(mp3_path, (0, 0))
+        return in_place, rewritten
+
+    @property
+    def files(self) -> dict[str, tuple[int, int]]:
+        return {path: (counts[0], counts[1]) for path, counts in self._files.items()}
+
+    def __repr__(self):
+        return f"SaveStats(in_place={self.in_place}, rewritten={self.rewritten})"
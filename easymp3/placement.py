@@ -0,0 +1,188 @@
+import errno
+import os
+import shutil
+import sys
+import threading
+
+from . import events
+from . import profiling
+from . import util
+
+# How a file is copied when set_filename_from_tags copies instead of moving
+AUTO = "auto"
+REFLINK = "reflink"
+HARDLINK = "hardlink"
+COPY_FILE_RANGE = "copy_file_range"
+COPY = "copy"
+COPY_STRATEGIES = (AUTO, REFLINK, HARDLINK, COPY_FILE_RANGE, COPY)
+
+# The strategies tried in order for each strategy, until one is supported
+_FALLBACKS = {
+    AUTO: (REFLINK, COPY_FILE_RANGE, COPY),
+    REFLINK: (REFLINK, COPY_FILE_RANGE, COPY),
+    HARDLINK: (HARDLINK, COPY),
+    COPY_FILE_RANGE: (COPY_FILE_RANGE, COPY),
+    COPY: (COPY,),
+}
+
+# The ioctl that clones a file on Linux file systems with copy-on-write (ex. Btrfs, XFS)
+_FICLONE = 0x40049409
+
+# Errors that mean a strategy is not supported for the two files, rather than that the copy failed
+_UNSUPPORTED = {errno.EXDEV, errno.EOPNOTSUPP, errno.ENOTTY, errno.EINVAL, errno.ENOSYS, errno.EPERM,
+                errno.EMLINK, errno.EBADF}
+
+_COPY_RANGE_CHUNK = 1 << 30
+
+
+def check_copy_strategy(strategy: str) -> None:
+    """
+    Checks that a copy strategy exists
+    :param strategy: The copy strategy
+    :raises ValueError: If it is not one of COPY_STRATEGIES
+    """
+    if strategy not in COPY_STRATEGIES:
+        raise ValueError(f"Invalid copy strategy '{strategy}'. Must be one of {', '.join(COPY_STRATEGIES)}")
+
+
+class DirectoryCache:
+    def __init__(self):
+        """
+        Remembers the folders that are known to exist, so that a batch that places many files
+        in the same folders only creates (or checks) each folder once
+        """
+        self._known: set[str] = set()
+        self._lock = threading.Lock()
+
+    def ensure(self, directory: str) -> None:
+        """
+        Creates a folder and its parents if they are not known to exist
+        :param directory: The path to the folder
+        """
+        directory = os.path.abspath(directory)
+        if directory in self._known:
+            return
+        os.makedirs(directory, exist_ok=True)
+        with self._lock:
+            self._known.add(directory)
+
+
+def move_file(source: str, dest: str) -> None:
+    """
+    Moves a file with an atomic os.rename, or by copying and removing it when the destination is on
+    another device
+    :param source: The path to the file
+    :param dest: The new path of the file
+    """
+    with profiling.phase(profiling.RENAME):
+        try:
+            os.rename(source, dest)
+            return
+        except OSError as error:
+            if error.errno != errno.EXDEV:
+                raise
+        _copy_with_fallback(source, dest, AUTO)
+        os.unlink(source)
+
+
+def copy_file(source: str, dest: str, strategy: str = AUTO) -> str:
+    """
+    Copies a file and its metadata (like shutil.copy2), trying each strategy in turn until one is supported.
+    The copy is made under a temporary name and then moved into place, so a partial copy is never visible.
+    :param source: The path to the file
+    :param dest: The path of the copy
+    :param strategy: One of COPY_STRATEGIES. "auto" clones the data if the file system supports it, and
+                     otherwise copies it in the kernel, falling back to a regular copy. "hardlink" links the
+                     copy to the same data, so later edits to either file show in both.
+    :return: The strategy that was used
+    """
+    check_copy_strategy(strategy)
+    with profiling.phase(profiling.RENAME):
+        return _copy_with_fallback(source, dest, strategy)
+
+
+def _copy_with_fallback(source: str, dest: str, strategy: str) -> str:
+    """
+    Internal function that copies a file with the first supported strategy. See copy_file
+    """
+    for attempt in _FALLBACKS[strategy]:
+        temp_path = util._temp_path(dest)
+        try:
+            _COPIERS[attempt](source, temp_path)
+        except OSError as error:
+            _remove(temp_path)
+            if attempt == COPY or error.errno not in _UNSUPPORTED:
+                raise
+            continue
+        try:
+            if attempt != HARDLINK:
+                shutil.copystat(source, temp_path)
+            os.replace(temp_path, dest)
+        except OSError:
+            _remove(temp_path)
+            raise
+        return attempt
+    raise AssertionError("The regular copy is always tried last")
+
+
+def _reflink(source: str, dest: str) -> None:
+    """
+    Internal function that clones the data of a file without copying it
+    """
+    if not sys.platform.startswith("linux"):
+        raise OSError(errno.EOPNOTSUPP, "Reflinks are only supported on Linux")
+    import fcntl
+    with open(source, "rb") as src, open(dest, "wb") as dst:
+        fcntl.ioctl(dst.fileno(), _FICLONE, src.fileno())
+
+
+def _hardlink(source: str, dest: str) -> None:
+    """
+    Internal function that links a new name to the data of a file
+    """
+    os.link(source, dest)
+
+
+def _copy_file_range(source: str, dest: str) -> None:
+    """
+    Internal function that copies the data of a file in the kernel, without reading it into memory
+    """
+    if not hasattr(os, "copy_file_range"):
+        raise OSError(errno.ENOSYS, "copy_file_range is not supported on this platform")
+    with open(source, "rb") as src, open(dest, "wb") as dst:
+        remaining = os.fstat(src.fileno()).st_size
+        while remaining > 0:
+            copied = os.copy_file_range(src.fileno(), dst.fileno(), min(remaining, _COPY_RANGE_CHUNK))
+            if copied == 0:
+                # Some file systems report no bytes copied instead of an error, so the regular copy is used
+                raise OSError(errno.EINVAL, "copy_file_range stopped before the end of the file")
+            remaining -= copied
+    events.count_read(os.path.getsize(dest))
+    events.count_written(os.path.getsize(dest))
+
+
+def _copy(source: str, dest: str) -> None:
+    """
+    Internal function that copies the data of a file through user space
+    """
+    shutil.copyfile(source, dest)
+    events.count_read(os.path.getsize(dest))
+    events.count_written(os.path.getsize(dest))
+
+
+def _remove(path: str) -> None:
+    """
+    Internal function that removes a file if it exists
+    """
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
+
+
+_COPIERS = {
+    REFLINK: _reflink,
+    HARDLINK: _hardlink,
+    COPY_FILE_RANGE: _copy_file_range,
+    COPY: _copy,
+}
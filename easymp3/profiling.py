@@ -0,0 +1,290 @@
+import cProfile
+import heapq
+import json
+import math
+import pstats
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterable, Iterator
+
+# The phases timed for each file
+SCAN = "scan"
+PARSE = "parse"
+IMAGE_READ = "image_read"
+IMAGE_ENCODE = "image_encode"
+SAVE = "save"
+RENAME = "rename"
+TOTAL = "total"
+
+PERCENTILES = (50, 95, 99)
+
+_timings: ContextVar[dict[str, float] | None] = ContextVar("easymp3_timings", default=None)
+
+
+@contextmanager
+def timing(timings: dict[str, float] | None) -> Iterator[dict[str, float] | None]:
+    """
+    Times the phases of the code run inside the block, in the current thread or task
+    :param timings: The dict the seconds spent in each phase are added to, or None to time nothing
+    :return: The dict of timings
+    """
+    token = _timings.set(timings)
+    try:
+        yield timings
+    finally:
+        _timings.reset(token)
+
+
+@contextmanager
+def phase(name: str) -> Iterator[None]:
+    """
+    Adds the time spent in the block to a phase of the file being processed, if it is being timed
+    :param name: The name of the phase. ex. PARSE
+    """
+    timings = _timings.get()
+    if timings is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[name] = timings.get(name, 0.0) + time.perf_counter() - started
+
+
+def add_timings(timings: dict[str, float] | None) -> None:
+    """
+    Adds timings measured earlier to the phases of the file being processed, if it is being timed
+    :param timings: The seconds spent in each phase, or None to add nothing
+    """
+    current = _timings.get()
+    if current is None or not timings:
+        return
+    for name, seconds in timings.items():
+        current[name] = current.get(name, 0.0) + seconds
+
+
+class Profiler:
+    def __init__(self, slowest=10, cprofile_operation: str | None = None, cprofile_path: str | None = None):
+        """
+        Collects how long each file took in each phase (scanning, parsing the tags, reading cover images,
+        saving and renaming) across the batch operations of the EasyMP3 objects it is given to.
+        Timing only happens while a profiler is set, so it costs nothing otherwise.
+        :param slowest: The number of slowest files to keep, with the time of each phase
+        :param cprofile_operation: The name of a batch operation to run under cProfile. ex. "set_cover_art".
+                                   Only the calling thread is profiled, so use a single worker to profile
+                                   the per-file work.
+        :param cprofile_path: An optional path to dump the cProfile stats to, which can be read with pstats
+        """
+        self.slowest_count = slowest
+        self.cprofile_operation = cprofile_operation
+        self.cprofile_path = cprofile_path
+        self.cprofile_stats: pstats.Stats | None = None
+        self._samples: dict[str, dict[str, list[float]]] = {}
+        self._scans: dict[str, float] = {}
+        self._slowest: list[tuple[float, int, str, str, dict[str, float]]] = []
+        self._counter = 0
+        self._lock = threading.Lock()
+
+    def record(self, operation: str, path: str, timings: dict[str, float]) -> None:
+        """
+        Records the timings of a single file
+        :param operation: The name of the batch operation
+        :param path: The path to the file
+        :param timings: The seconds spent in each phase, including TOTAL
+        """
+        with self._lock:
+            samples = self._samples.setdefault(operation, {})
+            for name, seconds in timings.items():
+                samples.setdefault(name, []).append(seconds)
+            if self.slowest_count > 0:
+                self._counter += 1
+                entry = (timings.get(TOTAL, 0.0), self._counter, operation, path, timings)
+                if len(self._slowest) < self.slowest_count:
+                    heapq.heappush(self._slowest, entry)
+                else:
+                    heapq.heappushpop(self._slowest, entry)
+
+    def record_scan(self, operation: str, seconds: float) -> None:
+        """
+        Records the time spent listing the files of a batch operation
+        :param operation: The name of the batch operation, or "scan" for the scan of a new EasyMP3 object
+        :param seconds: The time spent
+        """
+        with self._lock:
+            self._scans[operation] = self._scans.get(operation, 0.0) + seconds
+
+    def timed_paths(self, paths: Iterable[str], operation: str) -> Iterator[str]:
+        """
+        Yields the paths, recording the time spent getting them as the scan of the operation
+        :param paths: The paths to the MP3 files
+        :param operation: The name of the batch operation
+        """
+        iterator = iter(paths)
+        spent = 0.0
+        try:
+            while True:
+                started = time.perf_counter()
+                try:
+                    path = next(iterator)
+                except StopIteration:
+                    return
+                finally:
+                    spent += time.perf_counter() - started
+                yield path
+        finally:
+            self.record_scan(operation, spent)
+
+    @contextmanager
+    def profiling(self, operation: str) -> Iterator[None]:
+        """
+        Runs the block under cProfile if it is the operation that was asked to be profiled
+        :param operation: The name of the batch operation
+        """
+        if operation != self.cprofile_operation:
+            yield
+            return
+        profile = cProfile.Profile()
+        profile.enable()
+        try:
+            yield
+        finally:
+            profile.disable()
+            self.cprofile_stats = pstats.Stats(profile)
+            if self.cprofile_path is not None:
+                profile.dump_stats(self.cprofile_path)
+
+    def percentiles(self, operation: str | None = None) -> dict[str, dict[str, float]]:
+        """
+        Summarizes the time of each phase across files
+        :param operation: The batch operation to summarize, or None for every operation
+        :return: For each phase, the number of files, the total, p50, p95, p99 and max in seconds
+        """
+        summary = {}
+        for name, samples in self._phase_samples(operation).items():
+            ordered = sorted(samples)
+            stats = {"count": len(ordered), "total": sum(ordered)}
+            for percentile in PERCENTILES:
+                stats[f"p{percentile}"] = _percentile(ordered, percentile)
+            stats["max"] = ordered[-1]
+            summary[name] = stats
+        return summary
+
+    def histogram(self, phase_name: str = TOTAL, operation: str | None = None) -> list[tuple[float, int]]:
+        """
+        Counts the files in buckets of time that double in size, starting at 1 microsecond
+        :param phase_name: The phase to count
+        :param operation: The batch operation to count, or None for every operation
+        :return: The upper bound of each bucket in seconds and the number of files in it, up to the last
+                 bucket that is not empty
+        """
+        samples = self._phase_samples(operation).get(phase_name, [])
+        counts: dict[int, int] = {}
+        for seconds in samples:
+            bucket = max(math.ceil(math.log2(seconds / 1e-6)), 0) if seconds > 0 else 0
+            counts[bucket] = counts.get(bucket, 0) + 1
+        if not counts:
+            return []
+        return [(1e-6 * 2 ** bucket, counts.get(bucket, 0)) for bucket in range(max(counts) + 1)]
+
+    def slowest(self) -> list[dict]:
+        """
+        Gets the slowest files, slowest first
+        :return: The operation, the path and the time of each phase of every file
+        """
+        with self._lock:
+            entries = sorted(self._slowest, reverse=True)
+        return [{"operation": operation, "path": path, "timings": dict(timings)}
+                for _, _, operation, path, timings in entries]
+
+    def to_dict(self) -> dict:
+        """
+        Gets everything collected in a form that can be dumped as JSON
+        """
+        with self._lock:
+            operations = list(self._samples)
+            scans = dict(self._scans)
+        return {
+            "phases": self.percentiles(),
+            "operations": {operation: {"phases": self.percentiles(operation),
+                                       "histogram": self.histogram(TOTAL, operation)}
+                           for operation in operations},
+            "scans": scans,
+            "slowest": self.slowest(),
+        }
+
+    def write_json(self, path: str) -> None:
+        """
+        Writes everything collected to a JSON file
+        :param path: The path to the JSON file
+        """
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump(self.to_dict(), file, indent=2)
+
+    def report(self) -> str:
+        """
+        Formats the percentiles of each phase and the slowest files as a table
+        """
+        lines = [f"{'phase':<12}{'files':>8}{'total':>10}{'p50':>10}{'p95':>10}{'p99':>10}{'max':>10}"]
+        for name, stats in self.percentiles().items():
+            lines.append(f"{name:<12}{stats['count']:>8}" + "".join(
+                f"{_format_seconds(stats[key]):>10}" for key in ("total", "p50", "p95", "p99", "max")))
+        slowest = self.slowest()
+        if slowest:
+            lines.append("")
+            lines.append("slowest files:")
+            for entry in slowest:
+                timings = entry["timings"]
+                phases = ", ".join(f"{name} {_format_seconds(seconds)}"
+                                   for name, seconds in timings.items() if name != TOTAL)
+                lines.append(f"{_format_seconds(timings.get(TOTAL, 0.0)):>10}  {entry['operation']}  "
+                             f"{entry['path']}  ({phases})")
+        return "\n".join(lines)
+
+    def clear(self) -> None:
+        """
+        Forgets everything collected
+        """
+        with self._lock:
+            self._samples.clear()
+            self._scans.clear()
+            self._slowest.clear()
+            self.cprofile_stats = None
+
+    def _phase_samples(self, operation: str | None) -> dict[str, list[float]]:
+        """
+        Internal method that gets a copy of the samples of each phase of one or every operation
+        """
+        with self._lock:
+            if operation is not None:
+                return {name: list(samples) for name, samples in self._samples.get(operation, {}).items()}
+            merged: dict[str, list[float]] = {}
+            for samples in self._samples.values():
+                for name, values in samples.items():
+                    merged.setdefault(name, []).extend(values)
+            return merged
+
+    def __repr__(self):
+        with self._lock:
+            return f"Profiler(operations={list(self._samples)})"
+
+
+def _percentile(ordered: list[float], percentile: float) -> float:
+    """
+    Internal function that gets a percentile of sorted samples with the nearest-rank method
+    """
+    rank = max(math.ceil(percentile / 100 * len(ordered)), 1)
+    return ordered[rank - 1]
+
+
+def _format_seconds(seconds: float) -> str:
+    """
+    Internal function that formats a time with a unit that suits its size
+    """
+    if seconds >= 1:
+        return f"{seconds:.2f}s"
+    if seconds >= 1e-3:
+        return f"{seconds * 1e3:.1f}ms"
+    return f"{seconds * 1e6:.0f}us"
@@ -0,0 +1,191 @@
+import time
+from collections import Counter
+from concurrent.futures import Executor, FIRST_COMPLETED, wait
+from typing import Any, Callable, Iterable, Iterator
+
+from . import events
+from . import profiling
+from .events import BYTES, FAILED, SKIPPED, STARTED, UNCHANGED, WRITTEN, Event, EventSink
+from .profiling import Profiler
+
+_MAX_PENDING_PER_WORKER = 4
+
+
+class FileResult:
+    def __init__(self, path: str, status: str, message: str = "", error: BaseException | None = None,
+                 new_path: str | None = None):
+        """
+        The outcome of processing a single MP3 file in a batch operation
+        :param path: The path to the MP3 file
+        :param status: One of WRITTEN, SKIPPED, UNCHANGED (the file already had the requested tags) or FAILED
+        :param message: A human-readable description of the outcome
+        :param error: The exception raised while processing the file, if any
+        :param new_path: The path the file was moved or copied to, if it was renamed
+        """
+        self.path = path
+        self.status = status
+        self.message = message
+        self.error = error
+        self.new_path = new_path
+        self.bytes_read = 0
+        self.bytes_written = 0
+        self.timings: dict[str, float] | None = None
+
+    def __repr__(self):
+        return f"FileResult({self.path!r}, {self.status!r})"
+
+
+class BatchResult:
+    def __init__(self):
+        """
+        The summary of a batch operation. Only the counts, the errors, the new paths of renamed
+        files and the total bytes read and written are kept so that the summary stays small for
+        large libraries.
+        """
+        self.counts: Counter[str] = Counter()
+        self.errors: dict[str, BaseException] = {}
+        self.renamed: dict[str, str] = {}
+        self.bytes_read = 0
+        self.bytes_written = 0
+
+    def add(self, result: FileResult) -> None:
+        """
+        Adds the outcome of a single file to the summary
+        :param result: The outcome of the file
+        """
+        self.counts[result.status] += 1
+        if result.error is not None:
+            self.errors[result.path] = result.error
+        if result.new_path is not None:
+            self.renamed[result.path] = result.new_path
+        self.bytes_read += result.bytes_read
+        self.bytes_written += result.bytes_written
+
+    @property
+    def written(self) -> int:
+        return self.counts[WRITTEN]
+
+    @property
+    def skipped(self) -> int:
+        return self.counts[SKIPPED]
+
+    @property
+    def unchanged(self) -> int:
+        return self.counts[UNCHANGED]
+
+    @property
+    def failed(self) -> int:
+        return self.counts[FAILED]
+
+    @property
+    def total(self) -> int:
+        return sum(self.counts.values())
+
+    @property
+    def ok(self) -> bool:
+        return not self.errors
+
+    def __repr__(self):
+        return f"BatchResult({dict(self.counts)})"
+
+
+def run_file(func: Callable[[str], FileResult], path: str, sink: EventSink | None = None,
+             operation: str = "", profiler: Profiler | None = None) -> FileResult:
+    """
+    Runs the per-file work of a batch operation, turning any exception into a FAILED result
+    so that one bad file does not abort the batch. The bytes read and written are counted.
+    :param func: The per-file work
+    :param path: The path to the MP3 file
+    :param sink: An optional event sink that receives the events of the file
+    :param operation: The name of the batch operation, used in the events
+    :param profiler: An optional Profiler that records how long each phase of the file took
+    :return: The outcome of the file
+    """
+    if sink is not None:
+        sink(Event(STARTED, operation, path))
+    timings = {} if profiler is not None else None
+    started = time.perf_counter()
+    with events.counting_io() as counts, profiling.timing(timings):
+        try:
+            result = func(path)
+        except Exception as error:
+            result = FileResult(path, FAILED, f"Error processing '{path}': {error}", error)
+    result.bytes_read, result.bytes_written = counts
+    if profiler is not None:
+        timings[profiling.TOTAL] = timings.get(profiling.TOTAL, 0.0) + time.perf_counter() - started
+        result.timings = timings
+        profiler.record(operation, path, timings)
+    if sink is not None:
+        if result.bytes_read or result.bytes_written:
+            sink(Event(BYTES, operation, path, bytes_read=result.bytes_read, bytes_written=result.bytes_written))
+        sink(Event(result.status, operation, path, result.message, result.error))
+    return result
+
+
+def run_ahead(func: Callable[[str], Any], path: str, timed=False) -> tuple[Any, Callable[[], None]]:
+    """
+    Runs part of the per-file work of a batch operation before the batch starts, counting the bytes
+    it reads and writes and timing its phases like run_file does
+    :param func: The part of the per-file work to run ahead
+    :param path: The path to the MP3 file
+    :param timed: Whether to time the phases
+    :return: The value of `func`, or the exception it raised, and a function to call from the per-file
+             work of the same file in run_file, which adds the counted bytes and timings to the file
+    """
+    timings = {} if timed else None
+    started = time.perf_counter()
+    with events.counting_io() as counts, profiling.timing(timings):
+        try:
+            value = func(path)
+        except Exception as error:
+            value = error
+    if timings is not None:
+        timings[profiling.TOTAL] = time.perf_counter() - started
+
+    def replay() -> None:
+        events.count_read(counts[0])
+        events.count_written(counts[1])
+        profiling.add_timings(timings)
+
+    return value, replay
+
+
+def iter_results(paths: Iterable[str], func: Callable[[str], FileResult],
+                 executor: Executor | None = None, workers: int = 1, sink: EventSink | None = None,
+                 operation: str = "", profiler: Profiler | None = None) -> Iterator[FileResult]:
+    """
+    Runs the per-file work of a batch operation for every path, yielding each outcome as it completes.
+    Close the generator (ex. with contextlib.closing) if it is not run to the end, so that the files in
+    flight are waited for.
+    :param paths: The paths to the MP3 files
+    :param func: The per-file work
+    :param executor: The executor to run the work on, or None to run it in the calling thread
+    :param workers: The number of workers of the executor. Bounds how many files are queued at once
+    :param sink: An optional event sink that receives the events of every file
+    :param operation: The name of the batch operation, used in the events
+    :param profiler: An optional Profiler that records how long each phase of every file took
+    """
+    if executor is None:
+        for path in paths:
+            yield run_file(func, path, sink, operation, profiler)
+        return
+
+    max_pending = max(workers, 1) * _MAX_PENDING_PER_WORKER
+    pending = set()
+    try:
+        for path in paths:
+            pending.add(executor.submit(run_file, func, path, sink, operation, profiler))
+            if len(pending) >= max_pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
+    finally:
+        # When the operation is stopped early, the files not started are dropped and the files in flight
+        # are waited for, so that no work is left running on an executor that outlives the operation
+        for future in pending:
+            future.cancel()
+        wait(pending)
@@ -0,0 +1,213 @@
+from typing import TYPE_CHECKING, Callable
+
+from mutagen.easyid3 import EasyID3
+from mutagen.id3 import ID3
+
+from . import runner
+from . import util
+from .index import TagIndex
+from .runner import BatchResult, FileResult
+from .tag import Tag
+from .template import Template
+
+if TYPE_CHECKING:
+    from .covers import CoverIndex
+    from .transform import CoverTransform
+    from .easymp3 import EasyMP3
+
+
+class FileTags:
+    def __init__(self, mp3_path: str, index: TagIndex | None = None):
+        """
+        The tags of a single MP3 file, parsed at most once and shared by every step that edits the file.
+        The file is only parsed when its tags are first needed.
+        :param mp3_path: The path to the MP3 file
+        :param index: An optional TagIndex used to read the tags while the file has not been parsed
+        """
+        self.path = mp3_path
+        self._index = index
+        self._id3: ID3 | None = None
+        self._remove = False
+
+    @property
+    def id3(self) -> ID3:
+        if self._id3 is None:
+            self._id3 = util.read_id3(self.path)
+        return self._id3
+
+    @property
+    def easy(self) -> EasyID3:
+        return util.easy_view(self.id3)
+
+    def values(self):
+        """
+        Gets the EasyID3 values of the file, served from the index if the file has not been parsed
+        :return: A mapping of EasyID3 keys to their values
+        """
+        if self._id3 is None and self._index is not None:
+            return self._index.read_tags(self.path)
+        return self.easy
+
+    def remove_all(self) -> None:
+        """
+        Removes every tag. Unless tags are set again before the file is saved, the ID3 tags are then
+        deleted from the file like util.remove_tags does, instead of saving an empty tag.
+        """
+        self.id3.clear()
+        self._remove = True
+
+    def save(self, padding=None) -> None:
+        """
+        Saves the tags to the file, or deletes them if every tag was removed
+        :param padding: An optional mutagen padding function
+        """
+        if self._remove and not self.id3:
+            util.remove_tags(self.path)
+            return
+        util.save_id3(self.id3, self.path, padding)
+
+
+# An edit changes the tags of one file in memory and returns its status and a message
+Edit = Callable[[str, FileTags], tuple[str, str]]
+
+
+class EditSession:
+    def __init__(self, tagger: "EasyMP3", show_output=True):
+        """
+        Queues operations for the MP3 files of an EasyMP3 object and then applies them file by file,
+        parsing and saving each file once. A queued rename is applied last, after the file is saved.
+        Arguments are validated when an operation is queued.
+        Operations are applied in the order they were queued, and each operation sees the tags set
+        by the ones before it.
+
+        Usually created through EasyMP3.batch() and used as a context manager, which applies the
+        queued operations when the block exits without an error.
+        :param tagger: The EasyMP3 object whose files are edited
+        :param show_output: Whether to show the console output
+        """
+        self._tagger = tagger
+        self._show_output = show_output
+        self._edits: list[Edit] = []
+        # The name and arguments of every queued operation, so that the journal only resumes the same session
+        self._steps: list[list] = []
+        self._rename: Callable[[str, object], FileResult] | None = None
+        self._copy = False
+        self._result: BatchResult | None = None
+
+    def remove_all_tags(self) -> "EditSession":
+        """
+        Queues removing all tags. See EasyMP3.remove_all_tags
+        """
+        self._edits.append(self._tagger._edit_remove_all_tags())
+        self._steps.append(["remove_all_tags", {}])
+        return self
+
+    def set_tags_from_filename(self, template_str: str | Template) -> "EditSession":
+        """
+        Queues setting tags from the filename. See EasyMP3.set_tags_from_filename
+        """
+        self._edits.append(self._tagger._edit_set_tags_from_filename(template_str))
+        self._steps.append(["set_tags_from_filename", {"template_str": template_str}])
+        return self
+
+    def set_tags_from_dict(self, template_dict: dict[Tag, str]) -> "EditSession":
+        """
+        Queues setting the same tags for all files. See EasyMP3.set_tags_from_dict
+        """
+        self._edits.append(self._tagger._edit_set_tags_from_dict(template_dict))
+        self._steps.append(["set_tags_from_dict", {"template_dict": template_dict}])
+        return self
+
+    def set_cover_art(self, covers_dir: "str | CoverIndex | None" = None,
+                      template_str: str | Template = "cover_from_filename",
+                      search_subfolders=True) -> "EditSession":
+        """
+        Queues adding cover art. See EasyMP3.set_cover_art
+        """
+        self._edits.append(self._tagger._edit_set_cover_art(covers_dir, template_str, search_subfolders))
+        self._steps.append(["set_cover_art", {"covers_dir": covers_dir, "template_str": template_str,
+                                              "search_subfolders": search_subfolders}])
+        return self
+
+    def shrink_cover_arts(self, transform: "CoverTransform") -> "EditSession":
+        """
+        Queues shrinking the embedded cover arts. See EasyMP3.shrink_cover_arts
+        """
+        self._edits.append(self._tagger._edit_shrink_cover_arts(transform))
+        self._steps.append(["shrink_cover_arts", {"transform": transform}])
+        return self
+
+    def set_filename_from_tags(self, template_str: str | Template, copy=False, rename_invalid=True,
+                               copy_strategy="auto") -> "EditSession":
+        """
+        Queues renaming the files, which happens after all other operations. Only one rename
+        can be queued. See EasyMP3.set_filename_from_tags
+        """
+        if self._rename is not None:
+            raise RuntimeError("Only one rename can be queued in an edit session")
+        self._rename = self._tagger._rename_step(template_str, copy, rename_invalid, copy_strategy)
+        self._copy = copy
+        self._steps.append(["set_filename_from_tags", {"template_str": template_str, "copy": copy,
+                                                       "rename_invalid": rename_invalid,
+                                                       "copy_strategy": copy_strategy}])
+        return self
+
+    def apply(self) -> BatchResult:
+        """
+        Applies the queued operations to every file
+        :return: A summary of the files that were processed. A file counts as written if it was
+                 saved or renamed, and as unchanged if it already had the requested tags. Its
+                 `renamed` maps the old path of every renamed file to its new path.
+        """
+        if self._result is not None:
+            raise RuntimeError("An edit session can only be applied once")
+
+        edits = list(self._edits)
+        rename = self._rename
+        tagger = self._tagger
+
+        def apply_edits(mp3_path: str) -> FileResult:
+            file_tags = FileTags(mp3_path, tagger.index)
+            statuses = set()
+            messages = []
+            for edit in edits:
+                status, message = edit(mp3_path, file_tags)
+                statuses.add(status)
+                messages.append(message)
+            changed = runner.WRITTEN in statuses
+            if changed:
+                file_tags.save(tagger._padding_for(mp3_path))
+                tagger._update_index(mp3_path)
+
+            if changed:
+                status = runner.WRITTEN
+            elif runner.UNCHANGED in statuses:
+                status = runner.UNCHANGED
+            else:
+                status = runner.SKIPPED
+            new_path = None
+            if rename is not None:
+                rename_result = rename(mp3_path, file_tags.values())
+                messages.append(rename_result.message)
+                new_path = rename_result.new_path
+                if rename_result.status == runner.WRITTEN:
+                    status = runner.WRITTEN
+            return FileResult(mp3_path, status, "\n".join(messages), new_path=new_path)
+
+        self._result = tagger._run(apply_edits, "batch", self._show_output, args={"steps": self._steps})
+        tagger._update_paths(self._result.renamed, self._copy)
+        return self._result
+
+    def __enter__(self) -> "EditSession":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if exc_type is None and self._result is None:
+            self.apply()
+
+    @property
+    def result(self) -> BatchResult | None:
+        """
+        The summary of the applied session, or None if it has not been applied
+        """
+        return self._result
@@ -0,0 +1,307 @@
+import re
+import sys
+from array import array
+from concurrent.futures import Executor, ThreadPoolExecutor
+from itertools import compress
+from typing import TYPE_CHECKING, Any, Callable, Iterable, Iterator
+
+from . import tag
+from . import util
+from .index import TagIndex
+from .tag import Tag
+
+if TYPE_CHECKING:
+    from .easymp3 import EasyMP3
+
+# The code of a missing value in every column
+_MISSING = 0
+
+
+class _Column:
+    def __init__(self):
+        """
+        Internal dictionary-encoded column. Each distinct value is stored (interned) once, and each row
+        only holds the code of its value in an unsigned int array. Code 0 is a missing value.
+        """
+        self.values: list[str | None] = [None]
+        self.codes_by_value: dict[str, int] = {}
+        self.codes = array('I')
+
+    def append(self, value: str | None) -> None:
+        if value is None:
+            self.codes.append(_MISSING)
+            return
+        code = self.codes_by_value.get(value)
+        if code is None:
+            code = self.codes_by_value[value] = len(self.values)
+            self.values.append(sys.intern(value))
+        self.codes.append(code)
+
+
+class TagTable:
+    def __init__(self, paths: list[str], columns: dict[str, _Column], rows: array | None = None,
+                 failed: dict[str, Exception] | None = None):
+        """
+        An in-memory, column-oriented table of selected tags of many MP3 files, with one row per file.
+        Usually created with TagTable.load or TagTable.from_easymp3. Filtering returns a new table that
+        shares the columns with this one and only holds the numbers of the matching rows.
+        Predicates are evaluated once per distinct value of a column rather than once per file.
+        :param paths: The paths to the MP3 files of every row
+        :param columns: The column of every tag, keyed by its EasyID3 key. Tag.COVER_ART holds "yes" or None
+        :param rows: The numbers of the rows in this table, or None for every row
+        :param failed: The files that could not be read when the table was loaded, mapped to their error
+        """
+        self._paths = paths
+        self._columns = columns
+        self._rows = rows
+        self._failed = failed if failed is not None else {}
+
+    @classmethod
+    def load(cls, paths: Iterable[str], tags: Iterable[Tag], index: TagIndex | str | None = None,
+             workers: int = 1) -> "TagTable":
+        """
+        Reads the selected tags of every MP3 file in one pass. Only the tags of each file are read,
+        never the audio. A file that cannot be read is left out of the table and listed in `failed`.
+        :param paths: The paths to the MP3 files
+        :param tags: The tags to read. Tag.COVER_ART reads whether the file has a cover art.
+        :param index: An optional TagIndex (or a path to its database) to read unchanged files from
+        :param workers: The number of threads used to read the files
+        :return: The new table
+        """
+        if isinstance(index, str):
+            index = TagIndex(index)
+        if workers > 1:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                return cls._load(list(paths), tags, index, executor)
+        return cls._load(list(paths), tags, index, None)
+
+    @classmethod
+    def from_easymp3(cls, tagger: "EasyMP3", tags: Iterable[Tag]) -> "TagTable":
+        """
+        Reads the selected tags of every MP3 file of an EasyMP3 object, using its index and executor.
+        A file that cannot be read is left out of the table and listed in `failed`.
+        :param tagger: The EasyMP3 object
+        :param tags: The tags to read. Tag.COVER_ART reads whether the file has a cover art.
+        :return: The new table
+        """
+        with tagger._open_executor() as executor:
+            return cls._load(list(tagger.mp3_list), tags, tagger.index, executor)
+
+    @classmethod
+    def _load(cls, paths: list[str], tags: Iterable[Tag], index: TagIndex | None,
+              executor: Executor | None) -> "TagTable":
+        """
+        Internal method that reads the tags of every file into new columns
+        """
+        keys = []
+        for _tag in tags:
+            key = tag.check_tag_key(_tag)
+            if key not in keys:
+                keys.append(key)
+        with_cover = Tag.COVER_ART.value in keys
+        easy_keys = [key for key in keys if key != Tag.COVER_ART.value]
+
+        def read(mp3_path: str) -> list[str | None] | Exception:
+            try:
+                return read_row(mp3_path)
+            except Exception as error:
+                return error
+
+        def read_row(mp3_path: str) -> list[str | None]:
+            if index is not None:
+                entry = index.get(mp3_path)
+                values, has_cover = entry.tags, entry.has_cover_art
+            else:
+                id3 = util.read_id3(mp3_path)
+                values = util.easy_view(id3)
+                has_cover = with_cover and bool(id3.getall('APIC'))
+            row = []
+            for key in easy_keys:
+                value = values.get(key)
+                row.append(util.list_to_str(value) if value else None)
+            if with_cover:
+                row.append("yes" if has_cover else None)
+            return row
+
+        column_keys = easy_keys + ([Tag.COVER_ART.value] if with_cover else [])
+        columns = {key: _Column() for key in column_keys}
+        column_list = [columns[key] for key in column_keys]
+        kept, failed = _fill(column_list, paths, map(read, paths) if executor is None else executor.map(read, paths))
+        return cls(kept, columns, failed=failed)
+
+    def where(self, tag_key: Tag | str, condition: Any) -> "TagTable":
+        """
+        Keeps the rows whose value of a tag matches a condition.
+        ex. table.where(Tag.ARTIST, "Juice WRLD").where(Tag.COVER_ART, False)
+        :param tag_key: The tag. It must be one of the tags the table was loaded with
+        :param condition: One of
+                          - a string: the value must be equal to it
+                          - None or False: the tag must be missing (for Tag.COVER_ART, no cover art)
+                          - True: the tag must be present (for Tag.COVER_ART, a cover art)
+                          - a set, list or tuple: the value must be one of its items
+                          - a compiled regular expression: the value must contain a match
+                          - a function: called with each distinct value (None if missing), returns whether it matches
+        :return: A table with the matching rows
+        """
+        column = self._column(tag_key)
+        matches = _matcher(condition)
+        lookup = [matches(value) for value in column.values]
+        return self._select(compress(self._row_numbers(), map(lookup.__getitem__, self._codes(column))))
+
+    def where_path(self, predicate: Callable[[str], bool]) -> "TagTable":
+        """
+        Keeps the rows whose path matches a predicate
+        :param predicate: A function called with each path, returns whether it matches
+        :return: A table with the matching rows
+        """
+        return self._select(compress(self._row_numbers(), map(predicate, self.paths)))
+
+    def group_by(self, tag_key: Tag | str) -> dict[str | None, "TagTable"]:
+        """
+        Splits the rows by their value of a tag
+        :param tag_key: The tag. It must be one of the tags the table was loaded with
+        :return: A table for every value, keyed by the value (None for files without the tag)
+        """
+        column = self._column(tag_key)
+        groups: dict[int, array] = {}
+        for row, code in zip(self._row_numbers(), self._codes(column)):
+            rows = groups.get(code)
+            if rows is None:
+                rows = groups[code] = array('I')
+            rows.append(row)
+        return {column.values[code]: TagTable(self._paths, self._columns, rows, self._failed)
+                for code, rows in groups.items()}
+
+    def counts(self, tag_key: Tag | str) -> dict[str | None, int]:
+        """
+        Counts the rows with each value of a tag
+        :param tag_key: The tag. It must be one of the tags the table was loaded with
+        :return: The number of rows for every value (None for files without the tag)
+        """
+        column = self._column(tag_key)
+        totals = [0] * len(column.values)
+        for code in self._codes(column):
+            totals[code] += 1
+        return {column.values[code]: total for code, total in enumerate(totals) if total}
+
+    def column(self, tag_key: Tag | str) -> list[str | None]:
+        """
+        Gets the values of a tag for every row
+        :param tag_key: The tag. It must be one of the tags the table was loaded with
+        :return: The value of every row, None if the file does not have the tag
+        """
+        column = self._column(tag_key)
+        return list(map(column.values.__getitem__, self._codes(column)))
+
+    def rows(self) -> Iterator[dict[str, str | None]]:
+        """
+        Yields every row as a dict of its path and its tags, keyed by EasyID3 key
+        """
+        for row in self._row_numbers():
+            values = {"path": self._paths[row]}
+            for key, column in self._columns.items():
+                values[key] = column.values[column.codes[row]]
+            yield values
+
+    def to_easymp3(self, **kwargs) -> "EasyMP3":
+        """
+        Creates an EasyMP3 object for the files of this table, without scanning any directory
+        :param kwargs: Any keyword arguments for EasyMP3.from_paths. ex. workers=8
+        :return: The new EasyMP3 object
+        """
+        from .easymp3 import EasyMP3
+        return EasyMP3.from_paths(self.paths, **kwargs)
+
+    @property
+    def paths(self) -> list[str]:
+        if self._rows is None:
+            return list(self._paths)
+        return list(map(self._paths.__getitem__, self._rows))
+
+    @property
+    def tags(self) -> list[str]:
+        return list(self._columns)
+
+    @property
+    def failed(self) -> dict[str, Exception]:
+        """
+        The files that could not be read when the table was loaded, mapped to their error.
+        They have no row in the table or in any table filtered from it.
+        """
+        return dict(self._failed)
+
+    def __len__(self) -> int:
+        return len(self._paths) if self._rows is None else len(self._rows)
+
+    def __repr__(self):
+        if self._failed:
+            return f"TagTable({len(self)} rows, tags={self.tags}, failed={len(self._failed)})"
+        return f"TagTable({len(self)} rows, tags={self.tags})"
+
+    def _select(self, rows: Iterable[int]) -> "TagTable":
+        """
+        Internal method that creates a table with some of the rows of this table
+        """
+        return TagTable(self._paths, self._columns, array('I', rows), self._failed)
+
+    def _row_numbers(self) -> Iterable[int]:
+        """
+        Internal method that gets the numbers of the rows in this table
+        """
+        return range(len(self._paths)) if self._rows is None else self._rows
+
+    def _codes(self, column: _Column) -> Iterable[int]:
+        """
+        Internal method that gets the codes of a column for the rows in this table
+        """
+        if self._rows is None:
+            return column.codes
+        return map(column.codes.__getitem__, self._rows)
+
+    def _column(self, tag_key: Tag | str) -> _Column:
+        """
+        Internal method that gets the column of a tag
+        """
+        key = tag.check_tag_key(tag_key)
+        column = self._columns.get(key)
+        if column is None:
+            raise KeyError(f"The table was not loaded with the tag '{key}'")
+        return column
+
+
+def _fill(columns: list[_Column], paths: list[str],
+          rows: Iterable[list[str | None] | Exception]) -> tuple[list[str], dict[str, Exception]]:
+    """
+    Internal function that appends rows of values to columns, leaving out the files that could not be read
+    :return: The paths of the rows that were appended and the paths that failed mapped to their error
+    """
+    kept = []
+    failed = {}
+    for mp3_path, row in zip(paths, rows):
+        if isinstance(row, Exception):
+            failed[mp3_path] = row
+            continue
+        kept.append(mp3_path)
+        for column, value in zip(columns, row):
+            column.append(value)
+    return kept, failed
+
+
+def _matcher(condition: Any) -> Callable[[str | None], bool]:
+    """
+    Internal function that turns a condition of TagTable.where into a function of a single value
+    """
+    if condition is None or condition is False:
+        return lambda value: value is None
+    if condition is True:
+        return lambda value: value is not None
+    if isinstance(condition, str):
+        return lambda value: value == condition
+    if isinstance(condition, re.Pattern):
+        return lambda value: value is not None and condition.search(value) is not None
+    if isinstance(condition, (set, frozenset, list, tuple)):
+        options = set(condition)
+        return lambda value: value in options
+    if callable(condition):
+        return lambda value: bool(condition(value))
+    raise TypeError(f"Invalid condition: {condition!r}")
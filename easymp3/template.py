@@ -0,0 +1,126 @@
+import re
+from functools import lru_cache
+
+from . import exception
+from . import tag
+from . import util
+from .tag import Tag
+from .util import INVALID_CHAR_TRANS
+
+# Longer names first so that ex. ALBUMARTIST is not read as ALBUM followed by ARTIST
+_TAG_NAMES = sorted(tag.get_tag_list(), key=len, reverse=True)
+_TAG_NAME_PATTERN = re.compile("|".join(re.escape(name) for name in _TAG_NAMES))
+
+
+class Template:
+    def __init__(self, template: str):
+        """
+        A string template parsed once into literal text and the tags it references, so that it can
+        be rendered from the tags of many files, or used to parse many filenames, without being
+        scanned again. Can be passed anywhere EasyMP3 accepts a template string.
+        :param template: A traditional string template. ex. f"{Tag.TITLE} - {Tag.ARTIST}"
+        """
+        if isinstance(template, Template):
+            template = template.source
+        if not isinstance(template, str):
+            raise exception.InvalidTemplateStringError(f"Template must be a string. Invalid template: {template}")
+
+        self._source = template
+        self._parts: list[str | Tag] = []
+        position = 0
+        for match in _TAG_NAME_PATTERN.finditer(template):
+            if match.start() > position:
+                self._parts.append(template[position:match.start()])
+            self._parts.append(Tag[match.group()])
+            position = match.end()
+        if position < len(template):
+            self._parts.append(template[position:])
+
+        self._tags = tuple(dict.fromkeys(part for part in self._parts if isinstance(part, Tag)))
+        self._pattern: re.Pattern | None = None
+
+    @staticmethod
+    def compile(template: "str | Template") -> "Template":
+        """
+        Gets the compiled form of a template, reusing the compiled form of templates seen before
+        :param template: A traditional string template or an already compiled Template
+        :return: The compiled template
+        """
+        if isinstance(template, Template):
+            return template
+        return _compile(template)
+
+    def render(self, audio, rename_invalid=True) -> str:
+        """
+        Fills in the template with the tags of an MP3 file. Only the tags referenced by the template are read.
+        :param audio: A mapping of EasyID3 keys to the values of the MP3 file
+        :param rename_invalid: Whether to replace characters that can't be in a filename automatically
+                               or to prompt the user for a new value
+        :return: The rendered string
+        """
+        values = {}
+        for _tag in self._tags:
+            new_val = audio.get(_tag.value, f"NO{_tag.name}")
+
+            if isinstance(new_val, list):
+                new_val = util.list_to_str(new_val)
+            if rename_invalid:
+                new_val = new_val.translate(INVALID_CHAR_TRANS)
+            elif not util.is_valid_sub_file_name(new_val):
+                new_val = util.get_valid_replacement(new_val)
+                print()
+            values[_tag] = new_val
+
+        return "".join(values[part] if isinstance(part, Tag) else part for part in self._parts)
+
+    def parse(self, input_string: str) -> dict[Tag, str] | None:
+        """
+        Parses the tag values from a string that follows the template
+        :param input_string: The non-templated string. ex. "Black And White - Juice WRLD"
+        :return: A dictionary with tags and values or None if the string does not match the template
+        """
+        if self._pattern is None:
+            self._pattern = self._build_pattern()
+        match = self._pattern.match(input_string)
+        if match:
+            return {getattr(Tag, key): value for key, value in match.groupdict().items()}
+        else:
+            return None
+
+    def _build_pattern(self) -> re.Pattern:
+        seen = set()
+        regex = []
+        for part in self._parts:
+            if not isinstance(part, Tag):
+                regex.append(re.escape(part))
+            elif part in seen:
+                regex.append(f"(?P={part.name})")
+            else:
+                seen.add(part)
+                regex.append(f"(?P<{part.name}>.+)")
+        return re.compile("".join(regex))
+
+    @property
+    def source(self) -> str:
+        return self._source
+
+    @property
+    def tags(self) -> tuple[Tag, ...]:
+        return self._tags
+
+    def __str__(self):
+        return self._source
+
+    def __repr__(self):
+        return f"Template({self._source!r})"
+
+    def __eq__(self, other):
+        return isinstance(other, Template) and other._source == self._source
+
+    def __hash__(self):
+        return hash(self._source)
+
+
+@lru_cache(maxsize=256)
+def _compile(template: str) -> Template:
+    return Template(template)
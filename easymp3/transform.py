@@ -0,0 +1,176 @@
+import hashlib
+import io
+import threading
+from collections import OrderedDict
+
+from . import exception
+from . import profiling
+
+_MIME_TYPES = {
+    "JPEG": "image/jpeg",
+    "PNG": "image/png",
+    "WEBP": "image/webp",
+}
+
+DEFAULT_TRANSFORM_CACHE_BYTES = 32 * 1024 * 1024
+
+# Cached in place of an image that was left as is, since the caller already has its data
+_UNCHANGED = object()
+
+
+class CoverTransform:
+    def __init__(self, max_size=1000, image_format="JPEG", quality=85, max_bytes=DEFAULT_TRANSFORM_CACHE_BYTES):
+        """
+        Downscales and recompresses cover images. Each distinct image is encoded once and the
+        result is reused for every file that shares it, even when files are processed in parallel.
+        An image that already fits in `max_size` and is in the target format is left as is, and so
+        is one whose re-encoding would not be smaller. Requires Pillow (`pip install easymp3[images]`).
+        The results are kept in a least recently used cache bounded by their total size. An image
+        that was left as is only takes up its digest.
+        :param max_size: The maximum width and height in pixels. The aspect ratio is kept.
+        :param image_format: The format to encode the images in. One of "JPEG", "PNG" or "WEBP"
+        :param quality: The quality of JPEG and WEBP images, from 1 to 95
+        :param max_bytes: The maximum total size of the cached results in bytes
+        :raises ImportError: If Pillow is not installed
+        """
+        try:
+            from PIL import Image
+        except ImportError as error:
+            raise ImportError("Transforming cover arts requires Pillow. "
+                              "Install it with `pip install easymp3[images]`") from error
+        image_format = image_format.upper()
+        if image_format not in _MIME_TYPES:
+            raise ValueError(f"Invalid image format '{image_format}'. Must be one of {', '.join(_MIME_TYPES)}")
+        if max_size < 1:
+            raise ValueError("The maximum size must be at least 1 pixel")
+        if not 1 <= quality <= 95:
+            raise ValueError("The quality must be between 1 and 95")
+        self._image = Image
+        self.max_size = max_size
+        self.image_format = image_format
+        self.quality = quality
+        self._max_bytes = max_bytes
+        self._bytes = 0
+        self._results: OrderedDict[str, tuple[bytes, str] | object] = OrderedDict()
+        self._pending: dict[str, threading.Event] = {}
+        self._lock = threading.Lock()
+
+    def apply(self, data: bytes, mime_type: str) -> tuple[bytes, str]:
+        """
+        Transforms a cover image, encoding it only if the same image was not transformed before
+        :param data: The binary data of the image
+        :param mime_type: The MIME type of the image
+        :return: The binary data and the MIME type of the transformed image
+        :raises InvalidCoverArtDataError: If the image cannot be decoded
+        """
+        digest = hashlib.sha256(data).hexdigest()
+        while True:
+            with self._lock:
+                result = self._results.get(digest)
+                if result is not None:
+                    self._results.move_to_end(digest)
+                    return (data, mime_type) if result is _UNCHANGED else result
+                pending = self._pending.get(digest)
+                if pending is None:
+                    pending = self._pending[digest] = threading.Event()
+                    break
+            # Another thread is encoding the same image. If it could not be cached, it is encoded again
+            pending.wait()
+
+        try:
+            with profiling.phase(profiling.IMAGE_ENCODE):
+                result = self._encode(data, mime_type)
+            with self._lock:
+                self._add(digest, _UNCHANGED if result[0] is data else result)
+        finally:
+            with self._lock:
+                del self._pending[digest]
+            pending.set()
+        return result
+
+    def _add(self, digest: str, result: tuple[bytes, str] | object) -> None:
+        """
+        Internal method that caches a result if it fits in the budget. Must be called with the lock held.
+        """
+        size = _result_size(digest, result)
+        if size > self._max_bytes:
+            return
+        replaced = self._results.pop(digest, None)
+        if replaced is not None:
+            self._bytes -= _result_size(digest, replaced)
+        self._results[digest] = result
+        self._bytes += size
+        while self._bytes > self._max_bytes:
+            evicted_digest, evicted = self._results.popitem(last=False)
+            self._bytes -= _result_size(evicted_digest, evicted)
+
+    def _encode(self, data: bytes, mime_type: str) -> tuple[bytes, str]:
+        """
+        Internal method that downscales and re-encodes an image
+        """
+        try:
+            image = self._image.open(io.BytesIO(data))
+            image.load()
+        except Exception as error:
+            raise exception.InvalidCoverArtDataError(f"The cover art could not be decoded: {error}") from error
+
+        with image:
+            fits = max(image.size) <= self.max_size
+            if fits and image.format == self.image_format:
+                return data, mime_type
+
+            image.thumbnail((self.max_size, self.max_size), self._image.Resampling.LANCZOS)
+            if self.image_format == "JPEG" and image.mode not in ("RGB", "L"):
+                image = self._flatten(image)
+
+            output = io.BytesIO()
+            if self.image_format == "PNG":
+                image.save(output, "PNG", optimize=True)
+            else:
+                image.save(output, self.image_format, quality=self.quality, optimize=True)
+            encoded = output.getvalue()
+
+        if fits and len(encoded) >= len(data):
+            return data, mime_type
+        return encoded, _MIME_TYPES[self.image_format]
+
+    def _flatten(self, image):
+        """
+        Internal method that converts an image to RGB, drawing any transparency over a white background
+        """
+        image = image.convert("RGBA")
+        background = self._image.new("RGB", image.size, (255, 255, 255))
+        background.paste(image, mask=image.getchannel("A"))
+        return background
+
+    def clear(self) -> None:
+        """
+        Forgets every transformed image
+        """
+        with self._lock:
+            self._results.clear()
+            self._bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._results)
+
+    @property
+    def size(self) -> int:
+        return self._bytes
+
+    @property
+    def max_bytes(self) -> int:
+        return self._max_bytes
+
+    def __repr__(self):
+        return (f"CoverTransform(max_size={self.max_size}, image_format={self.image_format!r}, "
+                f"quality={self.quality})")
+
+
+def _result_size(digest: str, result: tuple[bytes, str] | object) -> int:
+    """
+    Internal function that gets the number of bytes a cached result counts for
+    """
+    if result is _UNCHANGED:
+        return len(digest)
+    return len(digest) + len(result[0])
@@ -1,15 +1,19 @@
+import fnmatch
 import mimetypes
 import os
-import re
-import sys
-from typing import Any, Type, Union
+import shutil
+import threading
+from typing import Any, Iterable, Iterator, Type, Union
 
 from mutagen.easyid3 import EasyID3
 from mutagen.id3 import ID3, ID3NoHeaderError, APIC
-from mutagen.mp3 import MP3
+from mutagen.id3 import delete as delete_id3
+from mutagen.mp3 import HeaderNotFoundError, MPEGInfo
 
 from . import exception
-from . import tag
+from .events import count_read, count_written
+from .padding import default_padding
+from .profiling import IMAGE_READ, PARSE, SAVE, phase
 from .tag import Tag
 
 INVALID_CHAR_MAP = {
@@ -26,15 +30,17 @@ INVALID_CHAR_MAP = {
 
 INVALID_CHAR_TRANS = str.maketrans(INVALID_CHAR_MAP)
 
+_PROMPT_LOCK = threading.Lock()
+
 
 def is_mp3(file_path: str) -> bool:
     """
-    Checks if a given file path points to an existing MP3 file.
+    Checks if a given file path points to an existing MP3 file. The extension is not case-sensitive.
 
     :param file_path: Path to the file to check.
     :returns: True if the file is an MP3 file, otherwise False.
     """
-    return os.path.isfile(file_path) and file_path.endswith(".mp3")
+    return has_extension(file_path, (".mp3",)) and os.path.isfile(file_path)
 
 
 def is_image(file_path: str) -> bool:
@@ -44,7 +50,31 @@ def is_image(file_path: str) -> bool:
     :param file_path: Path to the file to check.
     :returns: True if the file is an image and exists, otherwise False.
     """
-    return os.path.isfile(file_path) and "image" in get_mime_type(file_path)
+    return has_image_type(file_path) and os.path.isfile(file_path)
+
+
+def has_image_type(file_path: str) -> bool:
+    """
+    Determines if the given path has the extension of an image file, without checking the file itself.
+
+    :param file_path: Path to the file to check.
+    :returns: True if the extension is that of an image, otherwise False.
+    """
+    try:
+        return "image" in get_mime_type(file_path)
+    except TypeError:
+        return False
+
+
+def has_extension(file_path: str, extensions: Iterable[str]) -> bool:
+    """
+    Checks if a path ends with one of the given extensions. The check is not case-sensitive.
+
+    :param file_path: Path to the file to check.
+    :param extensions: The extensions to accept, including the dot. ex. (".mp3",)
+    :returns: True if the path has one of the extensions, otherwise False.
+    """
+    return file_path.lower().endswith(tuple(extension.lower() for extension in extensions))
 
 
 def no_filter(_: Any) -> bool:
@@ -57,19 +87,33 @@ def no_filter(_: Any) -> bool:
     return True
 
 
-def get_all_mp3s(directory: str, search_subfolders: bool) -> list[str]:
+def get_all_mp3s(directory: str, search_subfolders: bool, exclude: Iterable[str] | None = None) -> list[str]:
     """
     Retrieves a list of MP3 files from a directory
 
     :param directory: Path to a directory containing MP3 files or an individual MP3 file
     :param search_subfolders: Whether to include subdirectories in the search.
+    :param exclude: Optional glob patterns of files and folders to leave out. See scan_files
     :return: List of MP3 files found
     :raises TypeError: If the given path is not an MP3 file or directory.
     """
+    return list(iter_mp3s(directory, search_subfolders, exclude))
+
+
+def iter_mp3s(directory: str, search_subfolders: bool, exclude: Iterable[str] | None = None) -> Iterator[str]:
+    """
+    Yields the MP3 files of a directory while it is being scanned. See get_all_mp3s
+
+    :param directory: Path to a directory containing MP3 files or an individual MP3 file
+    :param search_subfolders: Whether to include subdirectories in the search.
+    :param exclude: Optional glob patterns of files and folders to leave out. See scan_files
+    :return: A generator of the MP3 files found
+    :raises TypeError: If the given path is not an MP3 file or directory.
+    """
     if is_mp3(directory):
-        return [directory]
+        return iter([directory])
     elif os.path.isdir(directory):
-        return get_all_files(directory, search_subfolders, is_mp3)
+        return scan_files(directory, search_subfolders, extensions=(".mp3",), exclude=exclude)
     else:
         raise exception.InvalidMP3DirectoryError(f"\"{directory}\" is neither an MP3 file nor a directory")
 
@@ -83,21 +127,58 @@ def get_all_files(directory: str, search_subfolders: bool, filter_func=no_filter
     :param filter_func: A function that filters which files to include.
     :return: List of files meeting the filter criteria.
     """
-    files = []
+    return [path for path in scan_files(directory, search_subfolders) if filter_func(path)]
 
-    if search_subfolders:
-        for root, _, filenames in os.walk(directory):
-            for filename in filenames:
-                path = os.path.join(root, filename)
-                if filter_func(path):
-                    files.append(path)
-    else:
-        for filename in os.listdir(directory):
-            path = os.path.join(directory, filename)
-            if filter_func(path):
-                files.append(path)
 
-    return files
+def scan_files(directory: str, search_subfolders: bool, extensions: Iterable[str] | None = None,
+               exclude: Iterable[str] | None = None) -> Iterator[str]:
+    """
+    Yields the files of a directory while it is being scanned. The file type reported by the directory
+    listing is used, so no file is opened or checked separately. The files of a folder are yielded before
+    the files of its subfolders, in the same order as os.walk. Subfolders that can't be read are skipped.
+
+    :param directory: Path to the root directory to search for files.
+    :param search_subfolders: Whether to include subdirectories in the search.
+    :param extensions: Optional extensions of the files to include, including the dot. ex. (".mp3",)
+                       The check is not case-sensitive.
+    :param exclude: Optional glob patterns of files and folders to leave out. A pattern is matched
+                    against the name and against the path relative to the directory, using "/" as
+                    the separator. ex. ["*.part", ".*", "Podcasts/*"]
+    :return: A generator of the paths to the files found
+    """
+    extensions = None if extensions is None else tuple(extension.lower() for extension in extensions)
+    exclude = tuple(exclude or ())
+
+    def excluded(entry: os.DirEntry) -> bool:
+        if not exclude:
+            return False
+        relative_path = os.path.relpath(entry.path, directory).replace(os.sep, "/")
+        return any(fnmatch.fnmatch(entry.name, pattern) or fnmatch.fnmatch(relative_path, pattern)
+                   for pattern in exclude)
+
+    pending = [directory]
+    while pending:
+        folder = pending.pop()
+        try:
+            entries = os.scandir(folder)
+        except OSError:
+            if folder == directory:
+                raise
+            continue
+
+        subfolders = []
+        with entries:
+            for entry in entries:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        if search_subfolders and not excluded(entry):
+                            subfolders.append(entry.path)
+                    elif entry.is_file():
+                        if (extensions is None or entry.name.lower().endswith(extensions)) and not excluded(entry):
+                            yield entry.path
+                except OSError:
+                    continue
+        pending.extend(reversed(subfolders))
 
 
 def filename_no_extension(file_path: str) -> str:
@@ -113,6 +194,32 @@ def filename_no_extension(file_path: str) -> str:
     return filename_without_ext
 
 
+def normalize_name(name: str) -> str:
+    """
+    Normalizes a file name so that names differing only in case or surrounding
+    whitespace compare equal.
+
+    :param name: The name to normalize.
+    :return: The normalized name.
+    """
+    return name.lower().strip()
+
+
+def group_by_name(paths: list[str], name_func=os.path.basename) -> dict[str, list[str]]:
+    """
+    Groups paths by their normalized name so that a path can be looked up by name
+    in constant time. Names shared by more than one path keep all of them.
+
+    :param paths: The paths to group.
+    :param name_func: A function that gets the name of a path. Default is the basename.
+    :return: A dictionary of normalized names and the paths with that name.
+    """
+    groups = {}
+    for path in paths:
+        groups.setdefault(normalize_name(name_func(path)), []).append(path)
+    return groups
+
+
 def get_mime_type(path, verify_image=False) -> str:
     """
     Determines the MIME type of the file at the given path.
@@ -131,15 +238,6 @@ def get_mime_type(path, verify_image=False) -> str:
         return mime_type
 
 
-def _replace_attribute(attribute: str) -> str:
-    """
-    An internal method used for replacing template strings with actual values using regex
-    :param attribute: a string which should be a member of Tag
-    :return: The new regex string
-    """
-    return f'(?P<{attribute}>.+)'
-
-
 def list_to_str(_list: list) -> str:
     """
     Converts a list to a string. Useful when a tag has a list of strings instead of
@@ -166,57 +264,166 @@ def construct_mp3_obj(path: str, cls: Type[Union[EasyID3, ID3]] = EasyID3) -> Ea
         return cls(path)
 
 
-def extract_info(template: str, input_string: str) -> dict[Tag, str] | None:
-    # Escape special regex characters in the template
-    # Replace placeholders with named capture groups
+def read_id3(path: str) -> ID3:
     """
-    Parses the information from a template string
-    :param template: A traditional string template.
-                     ex. f"{Tag.TITLE} - {Tag.ARTIST}"
-    :param input_string: The non-templated string.
-                     ex. "Black And White - Juice WRLD"
-    :return: A dictionary with tags and values
+    Reads the ID3 tags of an MP3 file without modifying the file.
+    Only the ID3v2 tag at the start of the file and the ID3v1 tag in the last
+    128 bytes are read. Unlike mutagen.mp3.MP3, the MPEG audio frames are never
+    parsed, so this should be used whenever only the tags are needed.
+    :param path: Path to the MP3 file.
+    :return: The tags of the file, or empty tags if the file has none.
     """
+    with phase(PARSE):
+        try:
+            id3 = ID3(path)
+        except ID3NoHeaderError:
+            id3 = ID3()
+            id3.filename = path
+    count_read(id3.size)
+    return id3
 
-    template = re.escape(template)
 
-    template_vals = tag.get_tag_list()
+def save_id3(id3: ID3, path: str, padding=None) -> None:
+    """
+    Saves ID3 tags read with read_id3 to an MP3 file, counting the bytes written.
+    If the tag no longer fits in the space it had, the rest of the file is moved and counted too.
+    :param id3: The tags to save
+    :param path: Path to the MP3 file.
+    :param padding: An optional mutagen padding function
+    """
+    if padding is None:
+        padding = default_padding
+    available = id3.size
 
-    for tag_val in template_vals:
-        template = template.replace(tag_val, _replace_attribute(tag_val))
+    def counted_padding(info) -> int:
+        new_padding = padding(info)
+        written = available - info.padding + new_padding
+        if new_padding != info.padding:
+            written += info.size - available
+        count_written(written)
+        return new_padding
 
-    # Compile the regex pattern
-    pattern = re.compile(template)
+    with phase(SAVE):
+        id3.save(path, padding=counted_padding)
 
-    # Match the pattern to the input string
-    match = pattern.match(input_string)
 
-    # If there's a match, return the group dictionary
-    if match:
-        result_dict = match.groupdict()
-        return {getattr(Tag, key): value for key, value in result_dict.items()}
-    else:
-        return None
+def remove_tags(path: str) -> bool:
+    """
+    Removes the ID3v2 and ID3v1 tags from an MP3 file without parsing the frames
+    or the audio data. The file is not opened for writing if it has no tags.
+    :param path: Path to the MP3 file.
+    :return: True if the file had tags, otherwise False.
+    """
+    if not has_tags(path):
+        return False
+    with phase(SAVE):
+        delete_id3(path)
+    return True
+
+
+def has_tags(path: str) -> bool:
+    """
+    Checks if an MP3 file has an ID3v2 tag at the start of the file or an ID3v1 tag at the end,
+    by reading the few bytes where the tags begin.
+    :param path: Path to the MP3 file.
+    :return: True if the file has either tag, otherwise False.
+    """
+    with open(path, "rb") as file:
+        if file.read(3) == b"ID3":
+            return True
+        try:
+            file.seek(-128, os.SEEK_END)
+        except OSError:
+            return False
+        return file.read(3) == b"TAG"
+
+
+def set_easy_values(audio: EasyID3, values: dict[str, str | list[str]]) -> bool:
+    """
+    Sets EasyID3 values, leaving the ones that already have the same value untouched
+    :param audio: The EasyID3 object to change
+    :param values: The EasyID3 keys mapped to their new values
+    :return: True if any value was changed, otherwise False
+    """
+    changed = False
+    for key, value in values.items():
+        if isinstance(value, str):
+            value = [value]
+        if audio.get(key) != value:
+            audio[key] = value
+            changed = True
+    return changed
+
+
+def same_cover(frame: APIC | None, apic: APIC) -> bool:
+    """
+    Checks if a cover art frame holds the same image, with the same type and description, as another
+    :param frame: The existing cover art frame or None if there is none
+    :param apic: The cover art frame to compare with
+    :return: True if the frames are the same, otherwise False
+    """
+    return (frame is not None and frame.type == apic.type and frame.desc == apic.desc
+            and frame.mime == apic.mime and frame.data == apic.data)
+
+
+def add_cover(id3: ID3, apic: APIC) -> bool:
+    """
+    Adds a cover art frame, unless the tags already have the same cover art
+    :param id3: The tags to change
+    :param apic: The cover art frame. It is only read, so the same frame can be added to many files.
+    :return: True if the cover art was added, otherwise False
+    """
+    if same_cover(id3.get(apic.HashKey), apic):
+        return False
+    id3.add(apic)
+    return True
 
 
-def copy_tags(source_file: str, dest_file: str, tag_set: set[str] | None, complement: bool):
+def easy_view(id3: ID3) -> EasyID3:
     """
-    Copy the tags from one MP3 file to another
+    Wraps already loaded ID3 tags in an EasyID3 object so that both views
+    share the same frames and the file only has to be parsed once.
+    :param id3: The loaded ID3 tags.
+    :return: An EasyID3 object backed by `id3`.
+    """
+    easy = EasyID3()
+    easy._EasyID3__id3 = id3  # EasyID3 keeps its ID3 object in a name-mangled attribute
+    return easy
+
+
+def extract_info(template: str, input_string: str) -> dict[Tag, str] | None:
+    """
+    Parses the information from a template string. Same as Template.compile(template).parse(input_string)
+    :param template: A traditional string template.
+                     ex. f"{Tag.TITLE} - {Tag.ARTIST}"
+    :param input_string: The non-templated string.
+                     ex. "Black And White - Juice WRLD"
+    :return: A dictionary with tags and values
+    """
+    from .template import Template  # template.py imports this module
+    return Template.compile(template).parse(input_string)
+
+
+def copy_tags(source_file: str, dest_file: str, tag_set: set[str] | None, complement: bool, padding=None) -> bool:
+    """
+    Copy the tags from one MP3 file to another. Each file is parsed once and the
+    destination is saved once, only if any of its tags changed.
     :param source_file: The file that will have its tags copied
     :param dest_file: The file that will receive the tags
     :param tag_set: A set of tags. Should be a set of values from the Tag class
     :param complement: Whether to check if something is in the set, or check
         if it is not in the set
+    :param padding: An optional mutagen padding function used when saving the destination
+    :return: True if the destination was changed, otherwise False
     """
 
     # Load the source MP3 file and read its tags
-    source_audio = MP3(source_file, ID3=EasyID3)
-    all_tags = source_audio.tags.items()
+    source_id3 = read_id3(source_file)
+    all_tags = easy_view(source_id3).items()
 
-    # Load the destination MP3 file and initialize it for ID3 tags if not already present
-    dest_audio = MP3(dest_file, ID3=EasyID3)
-
-    # Clear existing tags in the destination file
+    # Load the destination MP3 file, both views share the same frames
+    dest_id3 = read_id3(dest_file)
+    dest_audio = easy_view(dest_id3)
 
     # Copy each tag from the source to the destination
 
@@ -225,35 +432,28 @@ def copy_tags(source_file: str, dest_file: str, tag_set: set[str] | None, comple
     else:
         verified_tag_set = tag_set
 
+    new_values = {}
     for tag_key, tag_value in all_tags:
         _test = tag_key in verified_tag_set
         if complement:
             _test = not _test  # If it's not in the set
 
         if (tag_set is not None and _test) or tag_set is None:
-            dest_audio[tag_key] = tag_value
-    # Save the destination file with the new tags
-    dest_audio.save()
-
+            new_values[tag_key] = tag_value
+    changed = set_easy_values(dest_audio, new_values)
 
     ca_in_set = Tag.COVER_ART.value in verified_tag_set
     if complement:
         ca_in_set = not ca_in_set
 
-    if tag_set is not None and (not ca_in_set):
-        return
-
-
-    src_id3 = construct_mp3_obj(source_file, cls=ID3)
-    dest_id3 = construct_mp3_obj(dest_file, cls=ID3)
-    for _tag in src_id3.values():
-        if isinstance(_tag, APIC):
-            dest_id3.add(_tag)
-    dest_audio.save()
-    dest_id3.save(dest_file)
-
-
+    if tag_set is None or ca_in_set:
+        for apic in source_id3.getall('APIC'):
+            changed = add_cover(dest_id3, apic) or changed
 
+    # Save the destination file with the new tags
+    if changed:
+        save_id3(dest_id3, dest_file, padding)
+    return changed
 
 
 def check_template(template: str) -> None:
@@ -267,69 +467,143 @@ def check_template(template: str) -> None:
             f"Invalid string template '{template}'. A string template should not end in .mp3")
 
 
-def extract_cover_art(mp3_path: str, dest_path_no_extension: str, show_output: bool) -> None:
+def extract_cover_art(mp3_path: str, dest_path_no_extension: str) -> str | None:
     """
     Extracts the first cover art from an MP3 file and saves it to the destination folder.
+    The image is written to a temporary file first and then moved into place, so files
+    extracted to the same path at the same time never produce a partially written image.
     :param mp3_path: Path to the MP3 file.
     :param dest_path_no_extension: Path to the destination folder and file (with no extension) where
     the cover art will be saved.
-    :param show_output: Whether to include the console output
+    :return: The path to the extracted image, or None if the file has no cover art
     """
 
-    audio = MP3(mp3_path, ID3=ID3)
+    apic_frame = read_cover(mp3_path)
 
-    apic_frame = audio.tags.getall('APIC')
+    if apic_frame is None:
+        return None
 
-    if not apic_frame:
-        print(f"No cover art found for file: {mp3_path}", file=sys.stderr)
-        return
+    dest_path_full = dest_path_no_extension + get_extension_from_mime(apic_frame.mime.lower())
+    write_file_atomic(dest_path_full, apic_frame.data)
+    return dest_path_full
 
-    apic_frame = apic_frame[0]
 
-    mime: str = apic_frame.mime.lower()
+def read_cover(mp3_path: str) -> APIC | None:
+    """
+    Reads the first cover art frame of an MP3 file
+    :param mp3_path: Path to the MP3 file.
+    :return: The cover art frame or None if the file has no cover art
+    :raises InvalidCoverArtDataError: If the cover art is not an image
+    """
+    apic_frames = read_id3(mp3_path).getall('APIC')
+    if not apic_frames:
+        return None
+
+    mime: str = apic_frames[0].mime.lower()
     if not mime.startswith("image"):
         raise exception.InvalidCoverArtDataError(f"The cover art from mp3 '{mp3_path}' has invalid data\n"
                                                  f"Mime type is '{mime}'")
-    extension = get_extension_from_mime(mime)
-    dest_path_full = dest_path_no_extension + extension
+    return apic_frames[0]
+
+
+def read_duration(mp3_path: str) -> float | None:
+    """
+    Reads the duration of an MP3 file from the header of its audio, skipping the tags
+    :param mp3_path: Path to the MP3 file.
+    :return: The duration in seconds or None if no MPEG audio was found
+    """
+    with phase(PARSE), open(mp3_path, "rb") as file:
+        try:
+            info = MPEGInfo(file)
+        except HeaderNotFoundError:
+            return None
+    return info.length
+
+
+def _temp_path(dest_path: str) -> str:
+    return f"{dest_path}.{os.getpid()}-{threading.get_ident()}.tmp"
+
 
-    base_dir = os.path.dirname(dest_path_full)
-    os.makedirs(base_dir, exist_ok=True)
+def write_file_atomic(dest_path: str, data: bytes) -> None:
+    """
+    Writes a file through a temporary file that is then moved into place, creating its folder if needed
+    :param dest_path: The path to the file
+    :param data: The contents of the file
+    """
+    with phase(SAVE):
+        os.makedirs(os.path.dirname(dest_path) or ".", exist_ok=True)
+        temp_path = _temp_path(dest_path)
+        with open(temp_path, 'wb') as file:
+            file.write(data)
+        os.replace(temp_path, dest_path)
+    count_written(len(data))
 
-    with open(dest_path_full, 'wb') as img_file:
-        img_file.write(apic_frame.data)
-    if show_output:
-        print(f"Successfully extracted cover art from MP3 with path '{mp3_path}' to file '{dest_path_full}'")
 
-def apply_cover_art(mp3_path: str, cover_path: str):
+def link_file_atomic(source_path: str, dest_path: str, symbolic=False) -> None:
+    """
+    Creates a link to a file, replacing any file already at the destination, and creating its folder if needed.
+    A hard link falls back to a copy if the file system does not support it (ex. across devices).
+    :param source_path: The path to the existing file
+    :param dest_path: The path to the new link
+    :param symbolic: Whether to create a symbolic link, relative to the folder of the link, instead of a hard link
+    """
+    with phase(SAVE):
+        os.makedirs(os.path.dirname(dest_path) or ".", exist_ok=True)
+        temp_path = _temp_path(dest_path)
+        if symbolic:
+            os.symlink(os.path.relpath(source_path, os.path.dirname(dest_path) or "."), temp_path)
+        else:
+            try:
+                os.link(source_path, temp_path)
+            except OSError:
+                shutil.copyfile(source_path, temp_path)
+        os.replace(temp_path, dest_path)
+
+
+def apply_cover_art(mp3_path: str, cover_path: str) -> bool:
     """
     Internal wrapper method that applies a cover art to a file
     :param mp3_path: The path to an MP3 file
     :param cover_path: The path to the cover art image
+    :return: True if the file was changed, False if it already had the cover art
     """
-    with open(cover_path, 'rb') as img:
+    with phase(IMAGE_READ), open(cover_path, 'rb') as img:
         cover_data = img.read()
         mime_type = get_mime_type(cover_path, verify_image=True)
+    count_read(len(cover_data))
 
-    apply_cover_art_data(mp3_path, cover_data, mime_type)
+    return apply_cover_art_data(mp3_path, cover_data, mime_type)
 
 
-def apply_cover_art_data(mp3_path: str, cover_data, mime_type: str):
+def apply_cover_art_data(mp3_path: str, cover_data, mime_type: str) -> bool:
     """
     An internal method that adds cover art to a single MP3 file
     :param mp3_path: Path to the MP3 file.
     :param cover_data: The binary data for the cover art.
+    :return: True if the file was changed, False if it already had the cover art
     """
 
     apic = APIC(encoding=3, mime=mime_type, type=3, desc='Cover', data=cover_data)
+    return apply_cover_art_frame(mp3_path, apic)
 
-    mp3_audio = MP3(mp3_path, ID3=ID3)
 
-    if mp3_audio.tags is None:
-        mp3_audio.add_tags()
+def apply_cover_art_frame(mp3_path: str, apic: APIC, padding=None) -> bool:
+    """
+    An internal method that adds a prebuilt cover art frame to a single MP3 file.
+    The frame is only read, so the same frame can be added to many files.
+    The file is only saved if it does not already have the same cover art.
+    :param mp3_path: Path to the MP3 file.
+    :param apic: The cover art frame.
+    :param padding: An optional mutagen padding function used when saving
+    :return: True if the file was changed, False if it already had the cover art
+    """
+
+    id3 = read_id3(mp3_path)
+    if not add_cover(id3, apic):
+        return False
+    save_id3(id3, mp3_path, padding)
+    return True
 
-    mp3_audio.tags.add(apic)
-    mp3_audio.save()
 
 def get_extension_from_mime(mime: str) -> str:
     """
@@ -361,14 +635,15 @@ def get_valid_replacement(initial_val: str) -> str:
     :param initial_val: The initial string the user entered
     :return: The new (user entered) value with no invalid path characters
     """
-    invalid_chars = get_invalid_filename_chars(initial_val)
-    print(f"'{initial_val}' contains invalid path characters: {invalid_chars}")
-    while True:
-        new_val = input(f"Enter new name: ")
-        if new_val == new_val.translate(INVALID_CHAR_TRANS):
-            return new_val
-        invalid_chars = get_invalid_filename_chars(new_val)
-        print(f"The entered name contains invalid path characters: {invalid_chars}")
+    with _PROMPT_LOCK:  # Only one file can prompt at a time when files are processed in parallel
+        invalid_chars = get_invalid_filename_chars(initial_val)
+        print(f"'{initial_val}' contains invalid path characters: {invalid_chars}")
+        while True:
+            new_val = input(f"Enter new name: ")
+            if new_val == new_val.translate(INVALID_CHAR_TRANS):
+                return new_val
+            invalid_chars = get_invalid_filename_chars(new_val)
+            print(f"The entered name contains invalid path characters: {invalid_chars}")
 
 
 def get_invalid_filename_chars(name: str, string=True) -> str | tuple[str]:
@@ -0,0 +1,403 @@
+import ctypes
+import ctypes.util
+import errno
+import os
+import select
+import struct
+import sys
+import threading
+import time
+from typing import Callable, Iterable, Iterator
+
+from . import exception
+from . import util
+from .covers import CoverCache, CoverIndex
+from .easymp3 import EasyMP3
+from .index import TagIndex
+from .journal import Journal
+from .runner import BatchResult
+from .session import EditSession, FileTags
+from .template import Template
+
+# inotify event masks, from <sys/inotify.h>
+_IN_MODIFY = 0x00000002
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_FROM = 0x00000040
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_DELETE = 0x00000200
+_IN_DELETE_SELF = 0x00000400
+_IN_MOVE_SELF = 0x00000800
+_IN_Q_OVERFLOW = 0x00004000
+_IN_IGNORED = 0x00008000
+_IN_ISDIR = 0x40000000
+_IN_NONBLOCK = 0o4000
+_IN_CLOEXEC = 0o2000000
+
+_WATCH_MASK = (_IN_MODIFY | _IN_CLOSE_WRITE | _IN_MOVED_FROM | _IN_MOVED_TO | _IN_CREATE | _IN_DELETE
+               | _IN_DELETE_SELF | _IN_MOVE_SELF)
+# The events that mean a file is ready to be processed
+_IN_READY = _IN_CLOSE_WRITE | _IN_MOVED_TO | _IN_CREATE
+_IN_GONE = _IN_MOVED_FROM | _IN_DELETE
+
+_EVENT_HEADER = struct.Struct("iIII")
+_READ_SIZE = 64 * 1024
+
+DEFAULT_DEBOUNCE = 2.0
+DEFAULT_MAX_DELAY = 30.0
+
+
+class _Inotify:
+    def __init__(self):
+        """
+        Internal wrapper of a Linux inotify instance that watches folders (not their subfolders)
+        """
+        if not sys.platform.startswith("linux"):
+            raise OSError(errno.ENOSYS, "Watching folders needs Linux inotify")
+        self._libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self._libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self.fd = self._call(self._libc.inotify_init1, _IN_NONBLOCK | _IN_CLOEXEC)
+        self.folders: dict[int, str] = {}
+
+    def _call(self, func, *args) -> int:
+        result = func(*args)
+        if result < 0:
+            code = ctypes.get_errno()
+            raise OSError(code, os.strerror(code))
+        return result
+
+    def add(self, folder: str) -> None:
+        """
+        Watches a folder. A folder that no longer exists is ignored
+        """
+        try:
+            wd = self._call(self._libc.inotify_add_watch, self.fd, os.fsencode(folder), _WATCH_MASK)
+        except OSError as error:
+            if error.errno in (errno.ENOENT, errno.ENOTDIR):
+                return
+            raise
+        self.folders[wd] = folder
+
+    def read(self, timeout: float | None) -> Iterator[tuple[str | None, int]]:
+        """
+        Waits for events and yields the path and mask of each of them. The path is None for an overflow
+        """
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return
+        try:
+            data = os.read(self.fd, _READ_SIZE)
+        except BlockingIOError:
+            return
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = os.fsdecode(data[offset:offset + length].rstrip(b"\0"))
+            offset += length
+            if mask & _IN_Q_OVERFLOW:
+                yield None, mask
+                continue
+            folder = self.folders.get(wd)
+            if mask & _IN_IGNORED:
+                self.folders.pop(wd, None)
+            if folder is not None:
+                yield os.path.join(folder, name) if name else folder, mask
+
+    def close(self) -> None:
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
+
+class Watcher:
+    def __init__(self, directory: str, pipeline: Callable[[EditSession], object], covers: CoverIndex | None = None,
+                 cover_template: str | Template = "cover_from_filename", debounce=DEFAULT_DEBOUNCE,
+                 max_delay=DEFAULT_MAX_DELAY, show_output=True, **tagger_options):
+        """
+        Watches a folder and its subfolders with Linux inotify, and runs a pipeline of operations on only
+        the MP3 files that were added, changed or moved in, instead of on the whole library. Bursts of
+        events are debounced, and each batch of files is edited in one EditSession, so every file is
+        parsed and saved once. Files saved or renamed by the pipeline itself do not trigger it again.
+
+        When `covers` is given, the covers folder is watched too. The watcher remembers the cover name
+        of every file it has seen (see `cover_template`), so that adding or replacing a cover image
+        runs the pipeline on the files that use it. The covers index is refreshed before such a batch.
+        If events are lost because too many arrived at once, the whole folder is processed again.
+
+        ex.
+            covers = CoverIndex(r"path/to/covers")
+            watcher = Watcher(r"path/to/songs", lambda session: session
+                              .set_tags_from_filename(f"{Tag.TITLE} - {Tag.ARTIST}")
+                              .set_cover_art(covers, f"{Tag.ALBUM}")
+                              .set_filename_from_tags(f"{Tag.ARTIST}/{Tag.TITLE}"),
+                              covers=covers, cover_template=f"{Tag.ALBUM}", index=index_path)
+            watcher.run()
+        :param directory: The folder of the MP3 files. Its subfolders are watched too
+        :param pipeline: A function that queues operations on the EditSession of each batch
+        :param covers: The CoverIndex used by the pipeline, if changes to its images should run the pipeline
+        :param cover_template: The template used by the pipeline to find the cover image of a file. By default,
+                               the cover image has the same name as the file. Characters that can't be in a
+                               filename are replaced automatically, as with `rename_invalid`
+        :param debounce: The number of seconds without events to wait before a batch is run
+        :param max_delay: The most seconds to wait before a batch is run when events keep arriving
+        :param show_output: Whether to show the console output
+        :param tagger_options: Any keyword arguments for EasyMP3.from_paths, used for the tagger of every batch.
+                               ex. index=index_path, workers=8
+        """
+        if not os.path.isdir(directory):
+            raise exception.InvalidMP3DirectoryError(f"\"{directory}\" is not a directory")
+        self._directory = os.path.abspath(directory)
+        self._pipeline = pipeline
+        self._covers = covers
+        self._cover_template = None if cover_template == "cover_from_filename" else Template.compile(cover_template)
+        self._debounce = debounce
+        self._max_delay = max_delay
+        self._show_output = show_output
+        # Shared by every batch, so that images, tags and the journal are opened once
+        tagger_options.setdefault("cover_cache", CoverCache())
+        if isinstance(tagger_options.get("index"), str):
+            tagger_options["index"] = TagIndex(tagger_options["index"])
+        if isinstance(tagger_options.get("journal"), str):
+            tagger_options["journal"] = Journal(tagger_options["journal"])
+        self._tagger_options = tagger_options
+
+        self._pending: set[str] = set()
+        self._first_event: float | None = None
+        self._last_event: float | None = None
+        self._covers_changed = False
+        # The size and modification time of every file saved by the last two batches, so that the events
+        # caused by the pipeline can be ignored
+        self._saved: dict[str, tuple[int, int]] = {}
+        self._saved_before: dict[str, tuple[int, int]] = {}
+        # The cover name of every file seen, and the files that use each cover name
+        self._cover_names: dict[str, str] = {}
+        self._tracks: dict[str, set[str]] = {}
+        self._stopped = threading.Event()
+
+        self._inotify = _Inotify()
+        try:
+            self._watch_tree(self._directory)
+            if covers is not None:
+                self._watch_tree(os.path.abspath(covers.directory))
+                self._remember_covers(util.iter_mp3s(self._directory, True))
+        except BaseException:
+            self._inotify.close()
+            raise
+
+    def run(self) -> None:
+        """
+        Processes changes until `stop` is called or the process is interrupted
+        """
+        try:
+            while not self._stopped.is_set():
+                self.poll(timeout=1.0)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.flush()
+
+    def poll(self, timeout: float | None = None) -> BatchResult | None:
+        """
+        Waits for events, and runs the pipeline if the files changed so far are due
+        :param timeout: The most seconds to wait for events, or None to wait until there are events
+        :return: The summary of the batch that was run, or None if no batch was due
+        """
+        if self._pending or self._covers_changed:
+            due = min(self._last_event + self._debounce, self._first_event + self._max_delay)
+            wait = max(due - time.monotonic(), 0.0)
+            timeout = wait if timeout is None else min(timeout, wait)
+        for path, mask in self._inotify.read(timeout):
+            self._handle(path, mask)
+        if not (self._pending or self._covers_changed):
+            return None
+        now = time.monotonic()
+        if now - self._last_event < self._debounce and now - self._first_event < self._max_delay:
+            return None
+        return self.flush()
+
+    def flush(self) -> BatchResult | None:
+        """
+        Runs the pipeline on the files changed so far without waiting
+        :return: The summary of the batch, or None if no file has changed
+        """
+        if self._covers_changed and self._covers is not None:
+            self._covers.refresh()
+        self._covers_changed = False
+        paths = [path for path in self._pending if os.path.isfile(path)]
+        self._pending.clear()
+        self._first_event = self._last_event = None
+        if not paths:
+            return None
+
+        self._saved_before, self._saved = self._saved, {}
+        tagger = EasyMP3.from_paths(paths, **self._tagger_options)
+        session = tagger.batch(self._show_output)
+        self._pipeline(session)
+        result = session.apply()
+        for old_path, new_path in result.renamed.items():
+            if not os.path.exists(old_path):
+                self._forget(old_path)
+        final_paths = [path for path in tagger.mp3_list if os.path.isfile(path)]
+        for path in final_paths + list(result.renamed.values()):
+            self._remember_saved(path)
+        if self._covers is not None:
+            self._remember_covers(final_paths)
+        return result
+
+    def stop(self) -> None:
+        """
+        Makes `run` return after the current batch. Can be called from another thread
+        """
+        self._stopped.set()
+
+    def close(self) -> None:
+        """
+        Stops watching. Changes that were not processed yet are dropped
+        """
+        self._inotify.close()
+
+    def __enter__(self) -> "Watcher":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+    @property
+    def pending(self) -> list[str]:
+        """
+        The files waiting for the next batch
+        """
+        return list(self._pending)
+
+    @property
+    def directory(self) -> str:
+        return self._directory
+
+    def _handle(self, path: str | None, mask: int) -> None:
+        """
+        Internal method that records a single inotify event
+        """
+        if path is None:
+            # Events were lost, so every file may have changed
+            self._queue(*util.iter_mp3s(self._directory, True))
+            self._covers_changed = True
+            return
+        if mask & _IN_ISDIR:
+            if mask & (_IN_CREATE | _IN_MOVED_TO):
+                # Files can be added to a new folder before it is watched
+                self._watch_tree(path)
+                if self._is_in(path, self._directory):
+                    self._queue(*(mp3_path for mp3_path in util.iter_mp3s(path, True)
+                                  if not self._saved_by_pipeline(mp3_path)))
+                if self._is_cover_path(path):
+                    self._touch_covers()
+            return
+        if mask & _IN_GONE:
+            self._pending.discard(path)
+            self._forget(path)
+            if self._is_cover_path(path) and util.has_image_type(path):
+                self._touch_covers()
+            return
+        if mask & _IN_MODIFY:
+            # A file is still being written. Its close or move queues it
+            if self._first_event is not None:
+                self._last_event = time.monotonic()
+            return
+        if not mask & _IN_READY:
+            return
+        if util.is_mp3(path) and self._is_in(path, self._directory):
+            if not self._saved_by_pipeline(path):
+                self._queue(path)
+        elif self._is_cover_path(path) and util.has_image_type(path):
+            self._touch_covers()
+            name = util.normalize_name(util.filename_no_extension(path))
+            self._queue(*self._tracks.get(name, ()))
+
+    def _queue(self, *paths: str) -> None:
+        """
+        Internal method that adds files to the next batch
+        """
+        now = time.monotonic()
+        if paths:
+            self._pending.update(paths)
+            if self._first_event is None:
+                self._first_event = now
+            self._last_event = now
+
+    def _touch_covers(self) -> None:
+        """
+        Internal method that marks the covers index as out of date
+        """
+        self._covers_changed = True
+        now = time.monotonic()
+        if self._first_event is None:
+            self._first_event = now
+        self._last_event = now
+
+    def _watch_tree(self, folder: str) -> None:
+        """
+        Internal method that watches a folder and all its subfolders
+        """
+        for root, _, _ in os.walk(folder):
+            self._inotify.add(root)
+
+    def _saved_by_pipeline(self, path: str) -> bool:
+        """
+        Internal method that checks if an event was caused by the pipeline saving or moving a file
+        """
+        saved = self._saved.get(path) or self._saved_before.get(path)
+        if saved is None:
+            return False
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return False
+        return (stat.st_size, stat.st_mtime_ns) == saved
+
+    def _remember_saved(self, path: str) -> None:
+        """
+        Internal method that records the state of a file the pipeline has processed
+        """
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return
+        self._saved[path] = (stat.st_size, stat.st_mtime_ns)
+
+    def _remember_covers(self, paths: Iterable[str]) -> None:
+        """
+        Internal method that records the cover name of each file
+        """
+        index = self._tagger_options.get("index")
+        for path in paths:
+            if self._cover_template is None:
+                name = util.filename_no_extension(path)
+            else:
+                try:
+                    # Never prompt for a valid name, as the watcher runs unattended
+                    name = self._cover_template.render(FileTags(path, index).values(), rename_invalid=True)
+                except Exception:
+                    continue
+            self._forget(path)
+            name = util.normalize_name(name)
+            self._cover_names[path] = name
+            self._tracks.setdefault(name, set()).add(path)
+
+    def _forget(self, path: str) -> None:
+        """
+        Internal method that forgets the cover name of a file that was moved or removed
+        """
+        name = self._cover_names.pop(path, None)
+        if name is not None:
+            tracks = self._tracks.get(name)
+            tracks.discard(path)
+            if not tracks:
+                del self._tracks[name]
+
+    def _is_cover_path(self, path: str) -> bool:
+        return self._covers is not None and self._is_in(path, os.path.abspath(self._covers.directory))
+
+    @staticmethod
+    def _is_in(path: str, folder: str) -> bool:
+        return path == folder or path.startswith(folder.rstrip(os.sep) + os.sep)
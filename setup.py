@@ -10,6 +10,9 @@ setup(
     install_requires=[
         'mutagen==1.47.0'
     ],
+    extras_require={
+        'images': ['Pillow>=9.1']
+    },
     author="Chase Minert",
     author_email="cminert58@gmail.com",
     description="Easily tag and manipulate MP3 files in a programmatic way.",
@@ -0,0 +1,60 @@
+import os
+
+import pytest
+from mutagen.easyid3 import EasyID3
+
+from benchmarks.library import COVERS_DIR, MIRROR_DIR, SONGS_DIR, LibrarySpec, generate_library
+
+
+@pytest.fixture
+def library(tmp_path) -> str:
+    """
+    A small flat library of six tagged MP3 files named "{TITLE} - {ARTIST}.mp3", with a cover image
+    for every file in the covers folder
+    """
+    root = str(tmp_path / "library")
+    generate_library(root, LibrarySpec(num_files=6, tag_density=0.5, cover_bytes=512, embedded_covers=0.5,
+                                       depth=0, seconds=0.2, seed=1))
+    return root
+
+
+@pytest.fixture
+def songs(library) -> str:
+    return os.path.join(library, SONGS_DIR)
+
+
+@pytest.fixture
+def covers(library) -> str:
+    return os.path.join(library, COVERS_DIR)
+
+
+def mp3_paths(folder: str) -> list[str]:
+    """
+    Gets the paths to the MP3 files in a folder, sorted by name
+    """
+    return sorted(os.path.join(folder, name) for name in os.listdir(folder) if name.endswith(".mp3"))
+
+
+def read_tag(mp3_path: str, key: str) -> str | None:
+    """
+    Reads the first value of a tag of an MP3 file, or None if it is missing
+    """
+    try:
+        values = EasyID3(mp3_path).get(key)
+    except Exception:
+        return None
+    return values[0] if values else None
+
+
+def break_tag(mp3_path: str) -> None:
+    """
+    Corrupts the ID3 header of an MP3 file so that its tags cannot be read
+    """
+    with open(mp3_path, "r+b") as file:
+        file.seek(6)
+        file.write(b"\xff\xff\xff\xff")  # a tag size that is not synchsafe
+
+
+@pytest.fixture
+def mirror(library) -> str:
+    return os.path.join(library, MIRROR_DIR)
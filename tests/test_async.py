@@ -0,0 +1,80 @@
+import asyncio
+import os
+import threading
+
+import pytest
+
+from easymp3 import AsyncEasyMP3, BatchResult, EasyMP3, FileResult, Tag, exception
+
+from conftest import mp3_paths, read_tag
+
+
+def test_outcomes_can_be_awaited(songs):
+    async def main() -> BatchResult:
+        tagger = await AsyncEasyMP3.open(songs, concurrency=3)
+        return await tagger.set_tags_from_dict({Tag.ALBUM: "New"}, show_output=False)
+
+    result = asyncio.run(main())
+    assert result.written == 6
+    assert all(read_tag(path, "album") == "New" for path in mp3_paths(songs))
+
+
+def test_outcomes_are_streamed_per_file(songs):
+    async def main() -> list[FileResult]:
+        tagger = AsyncEasyMP3(EasyMP3(songs), concurrency=2)
+        return [result async for result in tagger.set_tags_from_dict({Tag.ALBUM: "New"}, show_output=False)]
+
+    results = asyncio.run(main())
+    assert sorted(result.path for result in results) == mp3_paths(songs)
+    assert {result.status for result in results} == {"written"}
+
+
+def test_concurrency_is_bounded(songs):
+    running = 0
+    most = 0
+    lock = threading.Lock()
+
+    def sink(event):
+        nonlocal running, most
+        with lock:
+            if event.kind == "started":
+                running += 1
+                most = max(most, running)
+            elif event.kind in ("written", "unchanged", "skipped", "failed"):
+                running -= 1
+
+    async def main() -> BatchResult:
+        tagger = AsyncEasyMP3(EasyMP3(songs, on_event=sink), concurrency=2)
+        return await tagger.set_tags_from_dict({Tag.ALBUM: "New"})
+
+    assert asyncio.run(main()).written == 6
+    assert 1 <= most <= 2
+
+
+def test_outcomes_can_only_be_consumed_once(songs):
+    async def main():
+        outcomes = AsyncEasyMP3(EasyMP3(songs)).remove_all_tags(show_output=False)
+        await outcomes
+        await outcomes
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(main())
+
+
+def test_invalid_arguments_are_raised_when_awaited(songs):
+    async def main():
+        await AsyncEasyMP3(EasyMP3(songs)).set_cover_art(os.path.join(songs, "missing"), show_output=False)
+
+    with pytest.raises(exception.InvalidCoversDirectoryError):
+        asyncio.run(main())
+
+
+def test_rename_updates_the_paths_of_the_tagger(songs):
+    async def main() -> AsyncEasyMP3:
+        tagger = AsyncEasyMP3(EasyMP3(songs), concurrency=3)
+        await tagger.set_filename_from_tags(f"{Tag.ARTIST} - {Tag.TITLE}", show_output=False)
+        return tagger
+
+    tagger = asyncio.run(main())
+    assert sorted(tagger.mp3_list) == mp3_paths(songs)
+    assert all(os.path.basename(path).startswith("Artist ") for path in tagger.mp3_list)
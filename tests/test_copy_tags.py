@@ -0,0 +1,64 @@
+import os
+import shutil
+
+from easymp3 import EasyMP3, Tag
+
+from conftest import mp3_paths, read_tag
+
+
+def test_tags_are_copied_to_files_of_the_same_name(songs, mirror):
+    result = EasyMP3(songs).copy_tags(mirror, show_output=False)
+    assert result.written == 6
+    for source, dest in zip(mp3_paths(songs), mp3_paths(mirror)):
+        assert read_tag(dest, "title") == read_tag(source, "title")
+        assert read_tag(dest, "album") == read_tag(source, "album")
+    assert EasyMP3(songs).copy_tags(mirror, show_output=False).unchanged == 6
+
+
+def test_only_the_listed_tags_are_copied(songs, mirror):
+    EasyMP3(songs).copy_tags(mirror, tag_list=[Tag.TITLE], show_output=False)
+    dest = mp3_paths(mirror)[0]
+    assert read_tag(dest, "title") == "Song 000000"
+    assert read_tag(dest, "album") is None
+
+
+def test_names_are_matched_ignoring_case(songs, mirror):
+    dest = mp3_paths(mirror)[0]
+    upper = os.path.join(mirror, os.path.basename(dest).upper())
+    os.rename(dest, upper)
+    result = EasyMP3(songs).copy_tags(mirror, show_output=False)
+    assert result.written == 6
+    assert read_tag(upper, "title") == "Song 000000"
+
+
+def test_name_matching_more_than_one_destination_is_skipped(songs, mirror):
+    dest = mp3_paths(mirror)[0]
+    os.makedirs(os.path.join(mirror, "sub"))
+    shutil.copyfile(dest, os.path.join(mirror, "sub", os.path.basename(dest).upper()))
+    events = []
+    tagger = EasyMP3(songs, on_event=events.append)
+    result = tagger.copy_tags(mirror)
+    assert result.written == 5
+    assert result.skipped == 1
+    [skipped] = [event for event in events if event.kind == "skipped"]
+    assert "ambiguous" in skipped.message
+    assert read_tag(dest, "title") is None
+
+
+def test_subfolders_of_the_destination_can_be_left_out(songs, mirror):
+    dest = mp3_paths(mirror)[0]
+    os.makedirs(os.path.join(mirror, "sub"))
+    moved = os.path.join(mirror, "sub", os.path.basename(dest))
+    os.rename(dest, moved)
+    assert EasyMP3(songs).copy_tags(mirror, search_subfolders=False, show_output=False).skipped == 1
+    assert EasyMP3(songs).copy_tags(mirror, search_subfolders=True, show_output=False).written == 1
+    assert read_tag(moved, "title") == "Song 000000"
+
+
+def test_name_shared_by_more_than_one_source_is_skipped(songs, mirror):
+    source = mp3_paths(songs)[0]
+    os.makedirs(os.path.join(songs, "sub"))
+    shutil.copyfile(source, os.path.join(songs, "sub", os.path.basename(source)))
+    result = EasyMP3(songs, search_subfolders=True).copy_tags(mirror, show_output=False)
+    assert result.written == 5
+    assert result.skipped == 2
@@ -0,0 +1,101 @@
+import os
+
+import pytest
+
+from easymp3 import CoverCache, CoverIndex, EasyMP3, Tag, exception
+
+
+def write_image(path: str) -> str:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as file:
+        file.write(b"\x89PNG\r\n\x1a\n" + os.urandom(64))
+    return path
+
+
+def test_set_cover_art_from_filename(songs, covers):
+    tagger = EasyMP3(songs)
+    tagger.remove_all_tags(show_output=False)
+    tagger.set_tags_from_filename(f"{Tag.TITLE} - {Tag.ARTIST}", show_output=False)
+    assert tagger.set_cover_art(covers, show_output=False).written == 6
+    assert tagger.set_cover_art(covers, show_output=False).unchanged == 6
+
+
+def test_cover_index_is_reused_across_calls(songs, covers):
+    index = CoverIndex(covers)
+    assert len(index) == 6
+    tagger = EasyMP3(songs)
+    tagger.remove_all_tags(show_output=False)
+    assert tagger.set_cover_art(index, show_output=False).written == 6
+
+
+def test_names_are_matched_ignoring_case_and_whitespace(tmp_path):
+    image = write_image(str(tmp_path / "covers" / "Fast - Juice WRLD.png"))
+    index = CoverIndex(str(tmp_path / "covers"))
+    assert index.find("  fast - juice wrld ") == image
+    assert "FAST - JUICE WRLD" in index
+    assert index.find("Slow") is None
+
+
+def test_image_closest_to_the_covers_directory_wins(tmp_path):
+    covers = str(tmp_path / "covers")
+    write_image(os.path.join(covers, "a", "b", "Fast.png"))
+    shallow = write_image(os.path.join(covers, "z", "Fast.jpg"))
+    assert CoverIndex(covers).find("Fast") == shallow
+
+
+def test_images_at_the_same_depth_are_ordered_by_path(tmp_path):
+    covers = str(tmp_path / "covers")
+    first = write_image(os.path.join(covers, "a", "Fast.png"))
+    write_image(os.path.join(covers, "b", "FAST.png"))
+    assert CoverIndex(covers).find("Fast") == first
+
+
+def test_subfolders_can_be_left_out(tmp_path):
+    covers = str(tmp_path / "covers")
+    write_image(os.path.join(covers, "a", "Fast.png"))
+    assert CoverIndex(covers, search_subfolders=False).find("Fast") is None
+
+
+def test_refresh_picks_up_new_images(tmp_path):
+    covers = str(tmp_path / "covers")
+    os.makedirs(covers)
+    index = CoverIndex(covers)
+    image = write_image(os.path.join(covers, "Fast.png"))
+    assert index.find("Fast") is None
+    index.refresh()
+    assert index.find("Fast") == image
+
+
+def test_covers_directory_must_exist(tmp_path):
+    with pytest.raises(exception.InvalidCoversDirectoryError):
+        CoverIndex(str(tmp_path / "missing"))
+
+
+def test_cover_cache_stays_within_its_budget(covers):
+    images = sorted(os.path.join(covers, name) for name in os.listdir(covers))
+    cache = CoverCache(max_bytes=1200)
+    for image in images:
+        assert cache.get(image).size == 512
+    assert len(cache) == 2
+    assert cache.size == 1024
+    assert cache.get(images[-1]) is cache.get(images[-1])
+
+
+def test_changed_image_is_read_again(tmp_path):
+    image = write_image(str(tmp_path / "Fast.png"))
+    cache = CoverCache()
+    first = cache.get(image)
+    stat = os.stat(image)
+    write_image(image)
+    os.utime(image, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    second = cache.get(image)
+    assert second is not first
+    assert second.data != first.data
+
+
+def test_cover_is_shared_between_files(songs, covers):
+    cache = CoverCache()
+    tagger = EasyMP3(songs, workers=3, cover_cache=cache)
+    image = sorted(os.path.join(covers, name) for name in os.listdir(covers))[0]
+    assert tagger.set_tags_from_dict({Tag.COVER_ART: image}, show_output=False).written == 6
+    assert len(cache) == 1
@@ -0,0 +1,97 @@
+import csv
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from easymp3 import EasyMP3, Tag
+from easymp3 import export
+
+
+def read_jsonl(path: str) -> list[dict]:
+    with open(path, encoding="utf-8") as file:
+        return [json.loads(line) for line in file]
+
+
+@pytest.mark.parametrize("extension", ["jsonl", "csv"])
+def test_export_writes_a_record_per_file(songs, tmp_path, extension):
+    export_path = str(tmp_path / f"tags.{extension}")
+    tagger = EasyMP3(songs, workers=3)
+    result = tagger.export_tags(export_path, [Tag.TITLE, Tag.ALBUM], show_output=False)
+    assert result.written == 6
+    if extension == "jsonl":
+        records = read_jsonl(export_path)
+    else:
+        with open(export_path, encoding="utf-8", newline="") as file:
+            records = list(csv.DictReader(file))
+    assert [record["path"] for record in records] == tagger.mp3_list
+    assert all(os.path.basename(record["path"]).startswith(record["title"]) for record in records)
+
+
+def test_export_resumes_after_the_last_complete_record(songs, tmp_path):
+    export_path = str(tmp_path / "tags.jsonl")
+    tagger = EasyMP3(songs)
+    tagger.export_tags(export_path, [Tag.TITLE], show_output=False)
+    full = read_jsonl(export_path)
+
+    with open(export_path, encoding="utf-8") as file:
+        lines = file.readlines()
+    with open(export_path, "w", encoding="utf-8") as file:
+        file.writelines(lines[:2])
+        file.write(lines[2][:10])  # a record cut short by a crash
+
+    result = tagger.export_tags(export_path, [Tag.TITLE], resume=True, show_output=False)
+    assert result.written == 4
+    assert read_jsonl(export_path) == full
+
+
+def test_only_an_ordered_export_can_be_resumed(songs, tmp_path):
+    with pytest.raises(ValueError):
+        EasyMP3(songs).export_tags(str(tmp_path / "tags.jsonl"), ordered=False, resume=True, show_output=False)
+
+
+def test_unordered_export_writes_every_file(songs, tmp_path):
+    export_path = str(tmp_path / "tags.jsonl")
+    tagger = EasyMP3(songs, workers=3)
+    assert tagger.export_tags(export_path, [Tag.TITLE], ordered=False, show_output=False).written == 6
+    assert sorted(record["path"] for record in read_jsonl(export_path)) == sorted(tagger.mp3_list)
+
+
+def test_held_records_after_a_missing_record_are_dropped(tmp_path):
+    export_path = str(tmp_path / "tags.jsonl")
+    with export.ExportWriter(export_path, ["title"], "jsonl") as writer:
+        writer.write(0, {"path": "a.mp3"})
+        writer.write(2, {"path": "c.mp3"})
+        writer.write(3, {"path": "d.mp3"})
+    assert read_jsonl(export_path) == [{"path": "a.mp3"}]
+
+
+class Interrupted(BaseException):
+    pass
+
+
+def test_interrupted_export_waits_for_the_files_in_flight(songs, tmp_path):
+    export_path = str(tmp_path / "tags.jsonl")
+    started, finished = [], []
+
+    def sink(event):
+        if event.kind == "started":
+            started.append(event.path)
+            if len(started) > 1:
+                time.sleep(0.2)
+        elif event.kind == "written":
+            if event.path == started[0]:
+                raise Interrupted
+            finished.append(event.path)
+
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        tagger = EasyMP3(songs, executor=executor, workers=3, on_event=sink)
+        with pytest.raises(Interrupted):
+            tagger.export_tags(export_path, [Tag.TITLE])
+        assert len(finished) == len(started) - 1
+        records = read_jsonl(export_path)
+        assert [record["path"] for record in records] == tagger.mp3_list[:len(records)]
+        assert tagger.export_tags(export_path, [Tag.TITLE], resume=True, show_output=False).written == \
+            6 - len(records)
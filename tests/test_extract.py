@@ -0,0 +1,72 @@
+import json
+import os
+
+import pytest
+
+from easymp3 import EasyMP3, Tag
+
+
+def read_manifest(path: str) -> list[dict]:
+    with open(path, encoding="utf-8") as file:
+        return [json.loads(line) for line in file]
+
+
+def links_in(folder: str) -> list[str]:
+    return sorted(os.path.join(folder, name) for name in os.listdir(folder) if name.startswith("Song "))
+
+
+def test_each_distinct_image_is_written_once(songs, covers, tmp_path):
+    tagger = EasyMP3(songs)
+    image = sorted(os.path.join(covers, name) for name in os.listdir(covers))[0]
+    tagger.set_tags_from_dict({Tag.COVER_ART: image}, show_output=False)
+    folder = str(tmp_path / "extracted")
+    assert tagger.extract_cover_arts(folder, dedupe="hardlink", show_output=False).written == 6
+
+    rows = read_manifest(os.path.join(folder, "covers.jsonl"))
+    assert len(rows) == 6
+    assert len({row["image"] for row in rows}) == 1
+    assert all(os.path.samefile(link, rows[0]["image"]) for link in links_in(folder))
+
+
+def test_manifest_mode_writes_no_links(songs, tmp_path):
+    folder = str(tmp_path / "extracted")
+    manifest_path = str(tmp_path / "manifest.jsonl")
+    result = EasyMP3(songs).extract_cover_arts(folder, dedupe="manifest", manifest_path=manifest_path,
+                                               show_output=False)
+    assert result.written == 3
+    assert result.skipped == 3
+    assert links_in(folder) == []
+    rows = read_manifest(manifest_path)
+    assert {row["link"] for row in rows} == {None}
+    assert sorted(os.path.basename(row["image"]) for row in rows) == sorted(os.listdir(folder))
+
+
+def test_images_already_extracted_are_unchanged(songs, tmp_path):
+    folder = str(tmp_path / "extracted")
+    tagger = EasyMP3(songs)
+    assert tagger.extract_cover_arts(folder, dedupe="symlink", show_output=False).written == 3
+    assert tagger.extract_cover_arts(folder, dedupe="symlink", show_output=False).unchanged == 3
+    assert len(read_manifest(os.path.join(folder, "covers.jsonl"))) == 3
+
+
+def test_dedupe_mode_must_be_known(songs, tmp_path):
+    with pytest.raises(ValueError):
+        EasyMP3(songs).extract_cover_arts(str(tmp_path / "extracted"), dedupe="copy", show_output=False)
+
+
+@pytest.mark.parametrize("dedupe", ["symlink", "hardlink"])
+def test_extract_replaces_broken_links(songs, tmp_path, dedupe):
+    folder = str(tmp_path / "extracted")
+    tagger = EasyMP3(songs)
+    assert tagger.extract_cover_arts(folder, dedupe=dedupe, show_output=False).written == 3
+    links = links_in(folder)
+    assert len(links) == 3
+    for link in links:
+        os.remove(link)
+        os.symlink("missing.png", link)
+
+    result = tagger.extract_cover_arts(folder, dedupe=dedupe, show_output=False)
+    assert result.written == 3
+    assert result.failed == 0
+    assert all(os.path.exists(link) for link in links)
+    assert tagger.extract_cover_arts(folder, dedupe=dedupe, show_output=False).unchanged == 3
@@ -0,0 +1,140 @@
+import csv
+import json
+import os
+
+import pytest
+
+from easymp3 import EasyMP3, Journal, exception
+
+from conftest import mp3_paths, read_tag
+
+
+def write_jsonl(path: str, records: list) -> str:
+    with open(path, "w", encoding="utf-8") as file:
+        for record in records:
+            file.write((record if isinstance(record, str) else json.dumps(record)) + "\n")
+    return path
+
+
+def test_import_matches_rows_by_relative_path(songs, tmp_path):
+    paths = mp3_paths(songs)
+    manifest_path = str(tmp_path / "tags.csv")
+    with open(manifest_path, "w", encoding="utf-8", newline="") as manifest:
+        writer = csv.writer(manifest)
+        writer.writerow(["path", "ALBUM", "genre"])
+        writer.writerow([os.path.relpath(paths[0], tmp_path), "First", ""])
+        writer.writerow([os.path.relpath(paths[1], tmp_path), "Second", "Jazz"])
+
+    result = EasyMP3(songs).import_tags(manifest_path, show_output=False)
+    assert result.written == 2
+    assert read_tag(paths[0], "album") == "First"
+    assert read_tag(paths[0], "genre") == "Hip-Hop"  # empty cells are left unchanged
+    assert read_tag(paths[1], "genre") == "Jazz"
+
+
+def test_import_matches_rows_by_filename(songs, tmp_path):
+    paths = mp3_paths(songs)
+    name = os.path.basename(paths[2])
+    manifest_path = write_jsonl(str(tmp_path / "tags.jsonl"), [
+        {"filename": f"  {name.upper()} ", "artist": ["One", "Two"]},
+    ])
+    result = EasyMP3(songs).import_tags(manifest_path, match="filename", show_output=False)
+    assert result.written == 1
+    assert read_tag(paths[2], "artist") == "One"
+
+
+def test_import_skips_unknown_ambiguous_and_repeated_rows(songs, tmp_path):
+    paths = mp3_paths(songs)
+    duplicate_dir = os.path.join(songs, "more")
+    os.makedirs(duplicate_dir)
+    with open(paths[0], "rb") as source, open(os.path.join(duplicate_dir, os.path.basename(paths[0])), "wb") as copy:
+        copy.write(source.read())
+    manifest_path = write_jsonl(str(tmp_path / "tags.jsonl"), [
+        {"filename": "missing.mp3", "album": "A"},
+        {"filename": os.path.basename(paths[0]), "album": "B"},
+        {"filename": os.path.basename(paths[1]), "album": "C"},
+        {"filename": os.path.basename(paths[1]), "album": "D"},
+    ])
+    tagger = EasyMP3(songs, search_subfolders=True)
+    result = tagger.import_tags(manifest_path, match="filename", show_output=False)
+    assert result.skipped == 3
+    assert result.written == 1
+    assert read_tag(paths[1], "album") == "C"
+
+
+def test_invalid_rows_fail_without_stopping_the_import(songs, tmp_path):
+    paths = mp3_paths(songs)
+    manifest_path = write_jsonl(str(tmp_path / "tags.jsonl"), [
+        "not json",
+        {"path": paths[0], "not_a_tag": "x"},
+        {"path": paths[1], "album": {"nested": True}},
+        {"album": "no path"},
+        {"path": paths[2], "album": "Good"},
+    ])
+    result = EasyMP3(songs).import_tags(manifest_path, show_output=False)
+    assert result.failed == 4
+    assert result.written == 1
+    assert all(isinstance(error, exception.InvalidManifestError) for error in result.errors.values())
+    assert f"{manifest_path}:1" in result.errors
+
+
+def test_import_rejects_a_header_without_the_match_column(songs, tmp_path):
+    manifest_path = str(tmp_path / "tags.csv")
+    with open(manifest_path, "w", encoding="utf-8") as manifest:
+        manifest.write("title,artist\n")
+    with pytest.raises(exception.InvalidManifestError):
+        EasyMP3(songs).import_tags(manifest_path, show_output=False)
+
+
+
+class Interrupted(BaseException):
+    pass
+
+
+def interrupt_after(written: int):
+    """
+    Gets an event sink that stops the batch operation once a number of files were written
+    """
+    count = 0
+
+    def sink(event):
+        nonlocal count
+        if event.kind == "written":
+            count += 1
+            if count == written:
+                raise Interrupted
+    return sink
+
+
+def test_resumed_import_skips_rows_of_files_already_done(songs, tmp_path):
+    manifest_path = str(tmp_path / "tags.jsonl")
+    journal_path = str(tmp_path / "journal.jsonl")
+    with open(manifest_path, "w", encoding="utf-8") as manifest:
+        for path in mp3_paths(songs):
+            manifest.write(json.dumps({"path": path, "album": "Imported"}) + "\n")
+
+    with Journal(journal_path) as journal:
+        tagger = EasyMP3(songs, journal=journal, on_event=interrupt_after(2))
+        with pytest.raises(Interrupted):
+            tagger.import_tags(manifest_path)
+
+    with Journal(journal_path) as journal:
+        tagger = EasyMP3(songs, journal=journal)
+        result = tagger.import_tags(manifest_path, show_output=False)
+        assert result.written == 4
+        assert result.unchanged == 2
+        assert not journal.skips(mp3_paths(songs)[0])
+    assert all(read_tag(path, "album") == "Imported" for path in mp3_paths(songs))
+
+
+def test_cover_paths_are_relative_to_the_manifest(songs, covers, tmp_path, monkeypatch):
+    paths = mp3_paths(songs)
+    image = sorted(os.listdir(covers))[0]
+    manifest_path = write_jsonl(os.path.join(os.path.dirname(covers), "tags.jsonl"), [
+        {"path": os.path.relpath(paths[4], os.path.dirname(covers)),
+         "cover_art": os.path.join(os.path.basename(covers), image)},
+    ])
+    monkeypatch.chdir(tmp_path)
+    result = EasyMP3(songs).import_tags(manifest_path, show_output=False)
+    assert result.written == 1
+    assert result.failed == 0
@@ -0,0 +1,81 @@
+import os
+
+import pytest
+from mutagen.easyid3 import EasyID3
+
+from easymp3 import EasyMP3, Tag, TagIndex
+
+from conftest import mp3_paths, read_tag
+
+
+@pytest.fixture
+def index(tmp_path):
+    with TagIndex(str(tmp_path / "index.sqlite")) as index:
+        yield index
+
+
+def test_unindexed_file_is_parsed_and_stored(songs, index):
+    path = mp3_paths(songs)[0]
+    assert index.lookup(path) is None
+    entry = index.get(path)
+    assert entry.tags["title"] == ["Song 000000"]
+    assert entry.has_cover_art
+    assert index.lookup(path).tags == entry.tags
+
+
+def test_entry_is_kept_across_connections(songs, tmp_path):
+    path = mp3_paths(songs)[0]
+    db_path = str(tmp_path / "index.sqlite")
+    with TagIndex(db_path) as index:
+        index.get(path)
+    with TagIndex(db_path) as index:
+        assert index.lookup(path) is not None
+
+
+def test_changed_file_is_stale(songs, index):
+    path = mp3_paths(songs)[0]
+    index.get(path)
+    audio = EasyID3(path)
+    audio["title"] = "Changed title"
+    audio.save()
+    assert index.lookup(path) is None
+    assert index.get(path).tags["title"] == ["Changed title"]
+
+
+def test_touched_file_is_stale(songs, index):
+    path = mp3_paths(songs)[0]
+    index.get(path)
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert index.lookup(path) is None
+
+
+def test_replaced_file_is_stale(songs, index):
+    first, second = mp3_paths(songs)[:2]
+    index.get(first)
+    stat = os.stat(first)
+    os.replace(second, first)
+    # Same size and modification time, but another inode
+    os.utime(first, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    assert index.lookup(first) is None
+    assert index.get(first).tags["title"] == ["Song 000001"]
+
+
+def test_renamed_entry_follows_the_file(songs, index):
+    path = mp3_paths(songs)[0]
+    index.get(path)
+    new_path = os.path.join(songs, "renamed.mp3")
+    os.rename(path, new_path)
+    index.rename(path, new_path)
+    assert index.lookup(new_path) is not None
+
+
+def test_tagger_updates_the_index_on_save(songs, index):
+    tagger = EasyMP3(songs, index=index)
+    path = mp3_paths(songs)[0]
+    index.get(path)
+    tagger.set_tags_from_dict({Tag.ALBUM: "New"}, show_output=False)
+    entry = index.lookup(path)
+    assert entry is not None
+    assert entry.tags["album"] == ["New"]
+    assert read_tag(path, "album") == "New"
@@ -0,0 +1,138 @@
+import json
+import os
+
+import pytest
+
+from easymp3 import EasyMP3, Journal, Tag
+
+from conftest import mp3_paths, read_tag
+
+
+class Interrupted(BaseException):
+    pass
+
+
+def interrupt_after(written: int):
+    """
+    Gets an event sink that stops the batch operation once a number of files were written
+    """
+    count = 0
+
+    def sink(event):
+        nonlocal count
+        if event.kind == "written":
+            count += 1
+            if count == written:
+                raise Interrupted
+    return sink
+
+
+@pytest.fixture
+def journal_path(tmp_path) -> str:
+    return str(tmp_path / "journal.jsonl")
+
+
+def test_interrupted_run_is_resumed(songs, journal_path):
+    with Journal(journal_path) as journal:
+        tagger = EasyMP3(songs, journal=journal, on_event=interrupt_after(2))
+        with pytest.raises(Interrupted):
+            tagger.set_tags_from_dict({Tag.ALBUM: "New"})
+
+    with Journal(journal_path) as journal:
+        result = EasyMP3(songs, journal=journal).set_tags_from_dict({Tag.ALBUM: "New"}, show_output=False)
+        assert result.written == 4
+        assert result.unchanged == 2
+        assert [run["finished"] for run in journal.runs] == [True]
+    assert all(read_tag(path, "album") == "New" for path in mp3_paths(songs))
+
+
+def test_run_with_other_arguments_is_not_resumed(songs, journal_path):
+    with Journal(journal_path) as journal:
+        tagger = EasyMP3(songs, journal=journal, on_event=interrupt_after(2))
+        with pytest.raises(Interrupted):
+            tagger.set_tags_from_dict({Tag.ALBUM: "First"})
+
+    with Journal(journal_path) as journal:
+        result = EasyMP3(songs, journal=journal).set_tags_from_dict({Tag.ALBUM: "Second"}, show_output=False)
+        assert result.written == 6
+        assert [(run["finished"], run["done"]) for run in journal.runs] == [(False, 2), (True, 6)]
+    assert all(read_tag(path, "album") == "Second" for path in mp3_paths(songs))
+
+
+def test_finished_run_is_not_resumed(songs, journal_path):
+    with Journal(journal_path) as journal:
+        tagger = EasyMP3(songs, journal=journal)
+        tagger.set_tags_from_dict({Tag.ALBUM: "New"}, show_output=False)
+        result = tagger.set_tags_from_dict({Tag.ALBUM: "New"}, show_output=False)
+        assert result.unchanged == 6
+        assert len(journal.runs) == 2
+
+
+def test_begin_entry_records_a_fingerprint(songs, journal_path):
+    with Journal(journal_path) as journal:
+        EasyMP3(songs, journal=journal).set_tags_from_dict({Tag.ALBUM: "New"}, show_output=False)
+    with open(journal_path, encoding="utf-8") as file:
+        begin = json.loads(file.readline())
+    assert begin["begin"] == "set_tags_from_dict"
+    assert len(begin["fingerprint"]) == 64
+
+
+def test_rollback_moves_renamed_files_back(songs, journal_path):
+    before = mp3_paths(songs)
+    with Journal(journal_path) as journal:
+        tagger = EasyMP3(songs, journal=journal)
+        renamed = tagger.set_filename_from_tags(f"{Tag.ARTIST} - {Tag.TITLE}", show_output=False)
+        assert renamed.written == 6
+        assert mp3_paths(songs) != before
+
+        result = tagger.rollback_renames(show_output=False)
+        assert result.written == 6
+        assert mp3_paths(songs) == before
+        assert sorted(tagger.mp3_list) == before
+        assert journal.renames() == []
+
+
+def test_rollback_of_an_interrupted_rename(songs, journal_path):
+    before = mp3_paths(songs)
+    with Journal(journal_path) as journal:
+        tagger = EasyMP3(songs, journal=journal, on_event=interrupt_after(3))
+        with pytest.raises(Interrupted):
+            tagger.set_filename_from_tags(f"{Tag.ARTIST} - {Tag.TITLE}")
+        assert len(journal.renames()) == 3
+
+    with Journal(journal_path) as journal:
+        result = EasyMP3(songs, journal=journal).rollback_renames(show_output=False)
+        assert result.written == 3
+    assert mp3_paths(songs) == before
+
+
+def test_rollback_removes_copies(songs, tmp_path, journal_path):
+    with Journal(journal_path) as journal:
+        tagger = EasyMP3(songs, journal=journal)
+        tagger.set_filename_from_tags(f"{Tag.ARTIST} - {Tag.TITLE}", copy=True, show_output=False)
+        assert len(mp3_paths(songs)) == 12
+        tagger.rollback_renames(show_output=False)
+    assert len(mp3_paths(songs)) == 6
+    assert all(os.path.basename(path).startswith("Song ") for path in mp3_paths(songs))
+
+
+
+def test_resumed_extraction_keeps_the_manifest_entries_of_files_already_done(songs, tmp_path, journal_path):
+    folder = str(tmp_path / "extracted")
+    with Journal(journal_path) as journal:
+        tagger = EasyMP3(songs, journal=journal, on_event=interrupt_after(2))
+        with pytest.raises(Interrupted):
+            tagger.extract_cover_arts(folder, dedupe="symlink")
+
+    with Journal(journal_path) as journal:
+        result = EasyMP3(songs, journal=journal).extract_cover_arts(folder, dedupe="symlink", show_output=False)
+        assert result.written == 1
+    with open(os.path.join(folder, "covers.jsonl"), encoding="utf-8") as manifest:
+        rows = [json.loads(line) for line in manifest]
+    assert len(rows) == 3
+    assert len({row["track"] for row in rows}) == 3
+
+    with Journal(journal_path) as journal:
+        EasyMP3(songs, journal=journal).extract_cover_arts(folder, dedupe="symlink", show_output=False)
+    with open(os.path.join(folder, "covers.jsonl"), encoding="utf-8") as manifest:
+        assert len(manifest.readlines()) == 3
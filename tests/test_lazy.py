@@ -0,0 +1,78 @@
+import io
+import os
+
+import pytest
+
+from easymp3 import EasyMP3, Tag, exception
+
+from conftest import mp3_paths, read_tag
+
+
+def test_lazy_tagger_scans_while_processing(songs):
+    tagger = EasyMP3(songs, lazy=True)
+    assert tagger.set_tags_from_dict({Tag.ALBUM: "Lazy"}, show_output=False).written == 6
+    assert all(read_tag(path, "album") == "Lazy" for path in mp3_paths(songs))
+    assert sorted(tagger.mp3_list) == mp3_paths(songs)
+
+
+def test_lazy_tagger_does_not_rename_files_twice(songs):
+    tagger = EasyMP3(songs, lazy=True)
+    assert tagger.set_filename_from_tags(f"{Tag.ARTIST} - {Tag.TITLE}", show_output=False).written == 6
+    assert all(os.path.basename(path).startswith("Artist ") for path in mp3_paths(songs))
+
+
+def test_lazy_tagger_validates_the_directory(tmp_path):
+    with pytest.raises(exception.InvalidMP3DirectoryError):
+        EasyMP3(str(tmp_path / "missing"), lazy=True)
+
+
+def test_from_paths_leaves_out_other_files(songs):
+    paths = mp3_paths(songs)[:3] + [os.path.join(songs, "cover.png")]
+    tagger = EasyMP3.from_paths(paths)
+    assert tagger.set_tags_from_dict({Tag.ALBUM: "Some"}, show_output=False).written == 3
+    assert tagger.set_tags_from_dict({Tag.ALBUM: "Some"}, show_output=False).unchanged == 3
+
+
+def test_generator_can_only_be_read_once(songs):
+    tagger = EasyMP3.from_paths(path for path in mp3_paths(songs))
+    assert tagger.remove_all_tags(show_output=False).written == 6
+    with pytest.raises(RuntimeError):
+        tagger.remove_all_tags(show_output=False)
+
+
+def test_mp3_list_keeps_the_paths_of_a_generator(songs):
+    tagger = EasyMP3.from_paths(path for path in mp3_paths(songs))
+    assert tagger.mp3_list == mp3_paths(songs)
+    assert tagger.remove_all_tags(show_output=False).written == 6
+    assert tagger.remove_all_tags(show_output=False).unchanged == 6
+
+
+def test_from_file_list_reads_one_path_per_line(songs, tmp_path):
+    list_path = str(tmp_path / "list.txt")
+    with open(list_path, "w", encoding="utf-8") as file:
+        file.write("\n".join(mp3_paths(songs)[:4]) + "\n\n")
+    tagger = EasyMP3.from_file_list(list_path)
+    assert tagger.remove_all_tags(show_output=False).written == 4
+    assert tagger.remove_all_tags(show_output=False).unchanged == 4
+
+
+def test_from_file_list_needs_an_existing_file(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        EasyMP3.from_file_list(str(tmp_path / "missing.txt"))
+
+
+def test_from_file_list_reads_stdin(songs, monkeypatch):
+    monkeypatch.setattr("sys.stdin", io.StringIO("\n".join(mp3_paths(songs)) + "\n"))
+    tagger = EasyMP3.from_file_list("-")
+    assert tagger.remove_all_tags(show_output=False).written == 6
+    with pytest.raises(RuntimeError):
+        tagger.remove_all_tags(show_output=False)
+
+
+def test_covers_dir_is_required_without_a_directory(songs):
+    tagger = EasyMP3.from_paths(mp3_paths(songs))
+    with pytest.raises(exception.InvalidCoversDirectoryError):
+        tagger.set_cover_art(show_output=False)
+    with pytest.raises(exception.InvalidCoversDirectoryError):
+        with tagger.batch(show_output=False) as session:
+            session.set_cover_art()
@@ -0,0 +1,42 @@
+import pytest
+from mutagen import PaddingInfo
+
+from easymp3 import EasyMP3, PaddingPolicy, SaveStats, Tag
+
+from conftest import read_tag
+
+
+def test_tag_that_fits_keeps_its_padding():
+    assert PaddingPolicy(reserve_bytes=4096)(PaddingInfo(100, 10_000)) == 100
+
+
+def test_larger_reserve_is_used_when_the_file_is_rewritten():
+    assert PaddingPolicy(reserve_bytes=4096)(PaddingInfo(-1, 10_000)) == 4096
+    assert PaddingPolicy(reserve_bytes=100, reserve_ratio=0.5)(PaddingInfo(-1, 10_000)) == 5000
+
+
+def test_reserve_cannot_be_negative():
+    with pytest.raises(ValueError):
+        PaddingPolicy(reserve_bytes=-1)
+
+
+def test_save_stats_count_each_file():
+    stats = SaveStats()
+    stats.track("a.mp3")(PaddingInfo(100, 10_000))
+    stats.track("b.mp3", PaddingPolicy(reserve_bytes=10))(PaddingInfo(-1, 10_000))
+    assert (stats.in_place, stats.rewritten) == (1, 1)
+    assert stats.for_file("a.mp3") == (1, 0)
+    assert stats.for_file("b.mp3") == (0, 1)
+    assert stats.for_file("c.mp3") == (0, 0)
+
+
+def test_reserved_padding_lets_later_edits_be_written_in_place(songs):
+    tagger = EasyMP3(songs, padding=PaddingPolicy(reserve_bytes=16 * 1024))
+    tagger.set_tags_from_dict({Tag.ALBUM: "A" * 2000}, show_output=False)
+    rewritten = tagger.save_stats.rewritten
+    assert rewritten > 0
+
+    tagger.set_tags_from_dict({Tag.ALBUM: "B" * 4000}, show_output=False)
+    assert tagger.save_stats.rewritten == rewritten
+    assert tagger.save_stats.in_place >= 6
+    assert all(read_tag(path, "album") == "B" * 4000 for path in tagger.mp3_list)
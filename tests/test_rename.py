@@ -0,0 +1,135 @@
+import filecmp
+import os
+
+import pytest
+
+from easymp3 import EasyMP3, Profiler, Tag, exception, placement
+from easymp3 import profiling
+
+from conftest import mp3_paths
+
+
+def test_renamed_paths_replace_the_old_ones(songs):
+    tagger = EasyMP3(songs, workers=3)
+    result = tagger.set_filename_from_tags(f"{Tag.ARTIST} - {Tag.TITLE}", show_output=False)
+    assert result.written == 6
+    assert sorted(tagger.mp3_list) == mp3_paths(songs)
+    assert all(os.path.basename(path).startswith("Artist ") for path in tagger.mp3_list)
+
+
+def test_copies_are_not_added_to_the_paths(songs):
+    tagger = EasyMP3(songs)
+    paths = list(tagger.mp3_list)
+    result = tagger.set_filename_from_tags(f"{Tag.ARTIST}/{Tag.TITLE}", copy=True, show_output=False)
+    assert result.written == 6
+    assert tagger.mp3_list == paths
+    assert len(mp3_paths(songs)) == 6
+
+
+def test_files_that_failed_keep_their_paths(songs):
+    tagger = EasyMP3(songs)
+    paths = list(tagger.mp3_list)
+    # Every file of the library is on the same album, so only the first one is renamed
+    result = tagger.set_filename_from_tags(f"{Tag.ALBUM}", show_output=False)
+    assert result.written == 1
+    assert tagger.mp3_list == [result.renamed[paths[0]]] + paths[1:]
+
+
+def test_files_already_named_correctly_are_unchanged(songs):
+    result = EasyMP3(songs).set_filename_from_tags(f"{Tag.TITLE} - {Tag.ARTIST}", show_output=False)
+    assert result.unchanged == 6
+    assert not result.renamed
+
+
+def test_first_file_in_order_claims_a_shared_name(songs):
+    tagger = EasyMP3(songs, workers=3)
+    first = tagger.mp3_list[0]
+    # Every file of the library is on the same album
+    result = tagger.set_filename_from_tags(f"{Tag.ALBUM}", show_output=False)
+    assert result.written == 1
+    assert result.failed == 5
+    assert list(result.renamed) == [first]
+    assert all(isinstance(error, exception.FileCollisionError) for error in result.errors.values())
+    assert len(mp3_paths(songs)) == 6
+
+
+def test_existing_file_is_not_replaced(songs):
+    tagger = EasyMP3(songs)
+    taken = os.path.join(songs, "Song 000001.mp3")
+    with open(taken, "wb") as file:
+        file.write(b"not renamed")
+    result = tagger.set_filename_from_tags(f"{Tag.TITLE}", show_output=False)
+    assert result.written == 5
+    assert result.failed == 1
+    [error] = result.errors.values()
+    assert isinstance(error, exception.FileCollisionError)
+    with open(taken, "rb") as file:
+        assert file.read() == b"not renamed"
+
+
+def test_reading_the_tags_is_counted_with_the_file(songs):
+    profiler = Profiler()
+    tagger = EasyMP3(songs, workers=2, profiler=profiler)
+    result = tagger.set_filename_from_tags(f"{Tag.ARTIST} - {Tag.TITLE}", show_output=False)
+    assert result.bytes_read > 0
+    assert profiler.percentiles("set_filename_from_tags")[profiling.PARSE]["count"] == 6
+
+
+@pytest.mark.parametrize("strategy", placement.COPY_STRATEGIES)
+def test_every_copy_strategy_copies_the_file(songs, tmp_path, strategy):
+    source = mp3_paths(songs)[0]
+    dest = str(tmp_path / "copy.mp3")
+    used = placement.copy_file(source, dest, strategy)
+    assert used in placement.COPY_STRATEGIES
+    assert filecmp.cmp(source, dest, shallow=False)
+    assert os.stat(source).st_mtime_ns == os.stat(dest).st_mtime_ns
+    assert not any(name.endswith(".tmp") for name in os.listdir(tmp_path))
+
+
+def test_hardlink_copies_share_their_data(songs, tmp_path):
+    source = mp3_paths(songs)[0]
+    dest = str(tmp_path / "copy.mp3")
+    assert placement.copy_file(source, dest, placement.HARDLINK) == placement.HARDLINK
+    assert os.path.samefile(source, dest)
+
+
+def test_unsupported_strategy_falls_back_to_a_regular_copy(songs, tmp_path, monkeypatch):
+    def unsupported(source: str, dest: str) -> None:
+        raise OSError(placement.errno.EXDEV, "Invalid cross-device link")
+
+    monkeypatch.setitem(placement._COPIERS, placement.HARDLINK, unsupported)
+    source = mp3_paths(songs)[0]
+    dest = str(tmp_path / "copy.mp3")
+    assert placement.copy_file(source, dest, placement.HARDLINK) == placement.COPY
+    assert filecmp.cmp(source, dest, shallow=False)
+
+
+def test_copy_strategy_must_be_known(songs):
+    with pytest.raises(ValueError):
+        EasyMP3(songs).set_filename_from_tags(f"{Tag.ARTIST}", copy=True, copy_strategy="rsync", show_output=False)
+
+
+def test_copies_can_be_hard_links(songs):
+    tagger = EasyMP3(songs)
+    result = tagger.set_filename_from_tags(f"{Tag.ARTIST} - {Tag.TITLE}", copy=True, copy_strategy="hardlink",
+                                           show_output=False)
+    assert result.written == 6
+    assert all(os.path.samefile(old_path, new_path) for old_path, new_path in result.renamed.items())
+
+
+def test_copy_file_range_that_stops_early_falls_back_to_a_regular_copy(songs, tmp_path, monkeypatch):
+    monkeypatch.setattr(os, "copy_file_range", lambda src, dst, count: 0, raising=False)
+    source = mp3_paths(songs)[0]
+    dest = str(tmp_path / "copy.mp3")
+    assert placement.copy_file(source, dest, placement.COPY_FILE_RANGE) == placement.COPY
+    assert filecmp.cmp(source, dest, shallow=False)
+
+
+def test_session_rename_claims_paths_like_set_filename_from_tags(songs):
+    tagger = EasyMP3(songs)
+    with tagger.batch(show_output=False) as session:
+        session.set_tags_from_dict({Tag.GENRE: "Jazz"}).set_filename_from_tags(f"{Tag.ALBUM}")
+    assert session.result.written == 1
+    assert session.result.failed == 5
+    assert all(isinstance(error, exception.FileCollisionError) for error in session.result.errors.values())
+    assert len(mp3_paths(songs)) == 6
@@ -0,0 +1,46 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from easymp3 import EasyMP3, Tag
+
+from conftest import break_tag, mp3_paths, read_tag
+
+
+@pytest.mark.parametrize("workers", [1, 4])
+def test_every_file_is_processed(songs, workers):
+    tagger = EasyMP3(songs, workers=workers)
+    result = tagger.set_tags_from_dict({Tag.ALBUM: "New"}, show_output=False)
+    assert result.written == 6
+    assert result.ok
+    assert all(read_tag(path, "album") == "New" for path in mp3_paths(songs))
+
+
+def test_files_are_processed_on_a_shared_executor(songs):
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        tagger = EasyMP3(songs, workers=3, executor=executor)
+        assert tagger.set_tags_from_dict({Tag.ALBUM: "New"}, show_output=False).written == 6
+        # The executor is not shut down by the batch operation
+        assert executor.submit(lambda: 1).result() == 1
+
+
+@pytest.mark.parametrize("workers", [1, 3])
+def test_errors_are_collected_per_file(songs, workers):
+    paths = mp3_paths(songs)
+    break_tag(paths[2])
+    result = EasyMP3(songs, workers=workers).set_tags_from_dict({Tag.ALBUM: "New"}, show_output=False)
+    assert result.written == 5
+    assert result.failed == 1
+    assert not result.ok
+    assert list(result.errors) == [paths[2]]
+    assert read_tag(paths[3], "album") == "New"
+
+
+def test_set_tags_from_filename_in_parallel(songs):
+    tagger = EasyMP3(songs, workers=3)
+    tagger.remove_all_tags(show_output=False)
+    result = tagger.set_tags_from_filename(f"{Tag.TITLE} - {Tag.ARTIST}", show_output=False)
+    assert result.written == 6
+    path = mp3_paths(songs)[0]
+    assert read_tag(path, "title") == "Song 000000"
+    assert read_tag(path, "artist") == "Artist 00"
@@ -0,0 +1,58 @@
+import os
+import shutil
+
+from easymp3 import EasyMP3, util
+
+from conftest import mp3_paths
+
+
+def make_tree(root: str) -> None:
+    for path in ("a.mp3", "B.MP3", "notes.txt", "song.mp3.part", "sub/c.mp3", "sub/deeper/d.Mp3",
+                 "Podcasts/e.mp3", ".hidden/f.mp3"):
+        path = os.path.join(root, *path.split("/"))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        open(path, "wb").close()
+
+
+def names(paths) -> list[str]:
+    return sorted(os.path.basename(path) for path in paths)
+
+
+def test_upper_case_extensions_are_found(tmp_path):
+    make_tree(str(tmp_path))
+    assert names(util.get_all_mp3s(str(tmp_path), False)) == ["B.MP3", "a.mp3"]
+    assert names(util.get_all_mp3s(str(tmp_path), True)) == ["B.MP3", "a.mp3", "c.mp3", "d.Mp3", "e.mp3", "f.mp3"]
+
+
+def test_files_of_a_folder_come_before_its_subfolders(tmp_path):
+    make_tree(str(tmp_path))
+    found = list(util.scan_files(str(tmp_path), True, (".mp3",)))
+    assert names(found[:2]) == ["B.MP3", "a.mp3"]
+    assert found.index(os.path.join(str(tmp_path), "sub", "c.mp3")) < \
+        found.index(os.path.join(str(tmp_path), "sub", "deeper", "d.Mp3"))
+
+
+def test_scan_without_extensions_finds_every_file(tmp_path):
+    make_tree(str(tmp_path))
+    assert names(util.scan_files(str(tmp_path), False)) == ["B.MP3", "a.mp3", "notes.txt", "song.mp3.part"]
+
+
+def test_exclude_matches_names_and_relative_paths(tmp_path):
+    make_tree(str(tmp_path))
+    found = util.get_all_mp3s(str(tmp_path), True, exclude=[".*", "Podcasts/*", "B.*", "sub/deeper"])
+    assert names(found) == ["a.mp3", "c.mp3"]
+
+
+def test_single_file_is_returned_as_is(tmp_path):
+    make_tree(str(tmp_path))
+    path = os.path.join(str(tmp_path), "B.MP3")
+    assert util.get_all_mp3s(path, False) == [path]
+
+
+def test_tagger_picks_up_upper_case_extensions_and_exclude(songs):
+    first, second = mp3_paths(songs)[:2]
+    shutil.move(first, first[:-len(".mp3")] + ".MP3")
+    tagger = EasyMP3(songs, exclude=[os.path.basename(second)])
+    assert len(tagger.mp3_list) == 5
+    assert first[:-len(".mp3")] + ".MP3" in tagger.mp3_list
+    assert second not in tagger.mp3_list
@@ -0,0 +1,82 @@
+import os
+
+import pytest
+
+from easymp3 import EasyMP3, Tag, util
+
+from conftest import mp3_paths, read_tag
+
+
+def test_operations_are_applied_in_order_with_one_save_per_file(songs):
+    tagger = EasyMP3(songs)
+    with tagger.batch(show_output=False) as session:
+        session.set_tags_from_dict({Tag.ALBUM: "First"}).set_tags_from_dict({Tag.ALBUM: "Second", Tag.GENRE: "Jazz"})
+    assert session.result.written == 6
+    assert all(sum(tagger.save_stats.for_file(path)) == 1 for path in tagger.mp3_list)
+    path = mp3_paths(songs)[0]
+    assert read_tag(path, "album") == "Second"
+    assert read_tag(path, "genre") == "Jazz"
+
+
+def test_session_with_nothing_to_change_is_unchanged(songs):
+    tagger = EasyMP3(songs)
+    with tagger.batch(show_output=False) as session:
+        session.set_tags_from_dict({Tag.TITLE: "Same"})
+    with tagger.batch(show_output=False) as session:
+        session.set_tags_from_dict({Tag.TITLE: "Same"})
+    assert session.result.unchanged == 6
+
+
+def test_rename_is_applied_after_the_tags_are_saved(songs):
+    tagger = EasyMP3(songs)
+    with tagger.batch(show_output=False) as session:
+        session.set_filename_from_tags(f"{Tag.ALBUM} {Tag.TITLE}").set_tags_from_dict({Tag.ALBUM: "New"})
+    assert session.result.written == 6
+    assert all(os.path.basename(path).startswith("New Song ") for path in tagger.mp3_list)
+    assert sorted(tagger.mp3_list) == mp3_paths(songs)
+
+
+def test_only_one_rename_can_be_queued(songs):
+    session = EasyMP3(songs).batch(show_output=False)
+    session.set_filename_from_tags(f"{Tag.TITLE}")
+    with pytest.raises(RuntimeError):
+        session.set_filename_from_tags(f"{Tag.ARTIST}")
+
+
+def test_session_can_only_be_applied_once(songs):
+    session = EasyMP3(songs).batch(show_output=False)
+    session.remove_all_tags().apply()
+    with pytest.raises(RuntimeError):
+        session.apply()
+
+
+def test_session_is_not_applied_when_the_block_raises(songs):
+    with pytest.raises(KeyError):
+        with EasyMP3(songs).batch(show_output=False) as session:
+            session.remove_all_tags()
+            raise KeyError
+    assert session.result is None
+    assert all(util.has_tags(path) for path in mp3_paths(songs))
+
+
+def test_session_removes_tags_like_remove_all_tags(songs):
+    tagger = EasyMP3(songs)
+    with tagger.batch(show_output=False) as session:
+        session.remove_all_tags()
+    assert session.result.written == 6
+    assert not any(util.has_tags(path) for path in mp3_paths(songs))
+
+    assert tagger.remove_all_tags(show_output=False).unchanged == 6
+    with tagger.batch(show_output=False) as session:
+        session.remove_all_tags()
+    assert session.result.unchanged == 6
+
+
+def test_tags_set_after_removing_all_tags_are_kept(songs):
+    tagger = EasyMP3(songs)
+    with tagger.batch(show_output=False) as session:
+        session.remove_all_tags().set_tags_from_dict({Tag.ALBUM: "Only"})
+    assert session.result.written == 6
+    for path in mp3_paths(songs):
+        assert read_tag(path, "album") == "Only"
+        assert read_tag(path, "title") is None
@@ -0,0 +1,59 @@
+import re
+
+import pytest
+
+from easymp3 import EasyMP3, Tag, TagTable
+
+from conftest import break_tag, mp3_paths
+
+
+@pytest.fixture
+def table(songs) -> TagTable:
+    return TagTable.from_easymp3(EasyMP3(songs), [Tag.TITLE, Tag.ALBUM, Tag.COVER_ART])
+
+
+def test_table_filters_and_groups(table):
+    assert len(table) == 6
+    assert table.counts(Tag.ALBUM) == {"Album 0": 6}
+    # The first half of the library has an embedded cover art
+    assert len(table.where(Tag.COVER_ART, True)) == 3
+    assert len(table.where(Tag.COVER_ART, False)) == 3
+    assert sorted(table.where(Tag.TITLE, {"Song 000001", "Song 000004"}).column(Tag.TITLE)) == \
+        ["Song 000001", "Song 000004"]
+
+
+def test_conditions_can_be_chained(table):
+    assert len(table.where(Tag.TITLE, re.compile(r"[0-2]$")).where(Tag.COVER_ART, True)) == 3
+    ends_with_five = lambda title: title is not None and title.endswith("5")
+    assert table.where(Tag.TITLE, ends_with_five).column(Tag.TITLE) == ["Song 000005"]
+    assert len(table.where_path(lambda path: "Artist 0" in path).where(Tag.ALBUM, "Other")) == 0
+
+
+def test_group_by_splits_the_rows(table):
+    groups = table.group_by(Tag.COVER_ART)
+    assert sorted(len(group) for group in groups.values()) == [3, 3]
+    assert sum(len(group.where(Tag.ALBUM, "Album 0")) for group in groups.values()) == 6
+
+
+def test_rows_and_to_easymp3(table):
+    rows = list(table.where(Tag.TITLE, "Song 000002").rows())
+    assert [row["album"] for row in rows] == ["Album 0"]
+    tagger = table.where(Tag.TITLE, "Song 000002").to_easymp3()
+    assert tagger.mp3_list == [rows[0]["path"]]
+
+
+def test_unknown_tag_or_condition_is_rejected(table):
+    with pytest.raises(KeyError):
+        table.where(Tag.ARTIST, "Artist 00")
+    with pytest.raises(TypeError):
+        table.where(Tag.TITLE, 5)
+
+
+def test_table_leaves_out_files_that_cannot_be_read(songs):
+    paths = mp3_paths(songs)
+    break_tag(paths[1])
+    table = TagTable.load(paths, [Tag.TITLE], workers=2)
+    assert len(table) == 5
+    assert paths[1] not in table.paths
+    assert list(table.failed) == [paths[1]]
+    assert table.where(Tag.TITLE, True).failed == table.failed
@@ -0,0 +1,53 @@
+import pytest
+
+from easymp3 import Tag, Template, exception, util
+
+
+@pytest.mark.parametrize("source, values", [
+    (f"{Tag.TITLE} - {Tag.ARTIST}", {Tag.TITLE: "Black And White", Tag.ARTIST: "Juice WRLD"}),
+    (f"{Tag.TRACKNUMBER}. {Tag.TITLE}", {Tag.TRACKNUMBER: "7", Tag.TITLE: "Fast"}),
+    (f"[{Tag.ALBUM}] {Tag.TITLE} ({Tag.ARTIST})", {Tag.ALBUM: "Legends (Deluxe)", Tag.TITLE: "Wishing Well",
+                                                   Tag.ARTIST: "Juice WRLD"}),
+])
+def test_render_then_parse_round_trips(source, values):
+    template = Template.compile(source)
+    rendered = template.render({_tag.value: [value] for _tag, value in values.items()})
+    assert template.parse(rendered) == values
+
+
+def test_parse_then_render_round_trips():
+    template = Template.compile(f"{Tag.TITLE} - {Tag.ARTIST}")
+    values = template.parse("Lucid Dreams - Juice WRLD")
+    assert template.render({_tag.value: value for _tag, value in values.items()}) == "Lucid Dreams - Juice WRLD"
+
+
+def test_repeated_tag_must_match_the_same_value():
+    template = Template.compile(f"{Tag.ARTIST} - {Tag.TITLE} - {Tag.ARTIST}")
+    assert template.parse("A - Song - A") == {Tag.ARTIST: "A", Tag.TITLE: "Song"}
+    assert template.parse("A - Song - B") is None
+
+
+def test_parse_returns_none_without_a_match():
+    assert Template.compile(f"{Tag.TITLE} - {Tag.ARTIST}").parse("no separator") is None
+
+
+def test_render_fills_in_missing_tags_and_replaces_invalid_characters():
+    template = Template.compile(f"{Tag.TITLE} - {Tag.ARTIST}")
+    assert template.render({"title": ["AC/DC?"]}) == "AC/DC?".translate(util.INVALID_CHAR_TRANS) + " - NOARTIST"
+
+
+def test_compile_reuses_templates():
+    template = Template.compile(f"{Tag.TITLE}")
+    assert Template.compile(template) is template
+    assert Template.compile(f"{Tag.TITLE}") == template
+
+
+def test_extract_info_matches_template_parse():
+    source = f"{Tag.TITLE} - {Tag.ARTIST}"
+    assert util.extract_info(source, "Fast - Juice WRLD") == Template.compile(source).parse("Fast - Juice WRLD")
+    assert util.extract_info(source, "nothing") is None
+
+
+def test_template_must_not_end_with_the_extension():
+    with pytest.raises(exception.InvalidTemplateStringError):
+        util.check_template(f"{Tag.TITLE}.mp3")
@@ -0,0 +1,60 @@
+import io
+
+import pytest
+from mutagen.id3 import ID3
+
+from easymp3 import CoverTransform, EasyMP3, Tag
+
+pytest.importorskip("PIL")
+
+
+def png(size: int, color: tuple[int, int, int]) -> bytes:
+    from PIL import Image
+    output = io.BytesIO()
+    Image.new("RGB", (size, size), color).save(output, "PNG")
+    return output.getvalue()
+
+
+def test_transform_cache_stays_within_its_budget():
+    transform = CoverTransform(max_size=32, image_format="PNG", max_bytes=2000)
+    for shade in range(20):
+        data, mime_type = transform.apply(png(256, (shade, shade, shade)), "image/png")
+        assert mime_type == "image/png"
+    assert 0 < transform.size <= transform.max_bytes
+    assert len(transform) < 20
+
+
+def test_transform_keeps_only_a_marker_for_unchanged_images():
+    transform = CoverTransform(max_size=64, image_format="PNG")
+    small = png(16, (10, 20, 30))
+    assert transform.apply(small, "image/png") == (small, "image/png")
+    assert transform.apply(small, "image/png")[0] is small
+    assert len(transform) == 1
+    assert transform.size < len(small)
+
+
+def test_invalid_settings_are_rejected():
+    with pytest.raises(ValueError):
+        CoverTransform(image_format="BMP")
+    with pytest.raises(ValueError):
+        CoverTransform(max_size=0)
+    with pytest.raises(ValueError):
+        CoverTransform(quality=100)
+
+
+def test_shrink_cover_arts_encodes_a_shared_image_once(songs, tmp_path):
+    image = str(tmp_path / "large.png")
+    with open(image, "wb") as file:
+        file.write(png(512, (200, 100, 50)))
+    tagger = EasyMP3(songs, workers=3)
+    tagger.set_tags_from_dict({Tag.COVER_ART: image}, show_output=False)
+
+    transform = CoverTransform(max_size=64, image_format="JPEG")
+    assert tagger.shrink_cover_arts(transform, show_output=False).written == 6
+    assert len(transform) == 1
+    from PIL import Image
+    for path in tagger.mp3_list:
+        [apic] = ID3(path).getall("APIC")
+        assert apic.mime == "image/jpeg"
+        assert Image.open(io.BytesIO(apic.data)).size == (64, 64)
+    assert tagger.shrink_cover_arts(transform, show_output=False).unchanged == 6
@@ -0,0 +1,98 @@
+import os
+import shutil
+import sys
+
+import pytest
+from mutagen.easyid3 import EasyID3
+
+from easymp3 import CoverIndex, Tag, Watcher, exception
+
+from conftest import mp3_paths, read_tag
+
+pytestmark = pytest.mark.skipif(not sys.platform.startswith("linux"), reason="Watching folders needs Linux inotify")
+
+
+def set_album(session):
+    session.set_tags_from_dict({Tag.ALBUM: "Watched"})
+
+
+def wait_for_batch(watcher: Watcher):
+    """
+    Polls the watcher until a batch is run
+    """
+    for _ in range(20):
+        result = watcher.poll(timeout=0.1)
+        if result is not None:
+            return result
+    return None
+
+
+def test_only_new_files_are_processed(songs, tmp_path):
+    os.makedirs(tmp_path / "incoming")
+    with Watcher(str(tmp_path / "incoming"), set_album, debounce=0, show_output=False) as watcher:
+        new_path = shutil.copy(mp3_paths(songs)[0], str(tmp_path / "incoming"))
+        result = wait_for_batch(watcher)
+        assert result.written == 1
+        assert read_tag(new_path, "album") == "Watched"
+        assert watcher.pending == []
+
+
+def test_files_saved_by_the_pipeline_do_not_trigger_it_again(songs):
+    with Watcher(songs, set_album, debounce=0, show_output=False) as watcher:
+        path = mp3_paths(songs)[0]
+        os.utime(path)
+        with open(path, "ab"):
+            pass
+        assert wait_for_batch(watcher).written == 1
+        assert wait_for_batch(watcher) is None
+
+
+def test_files_in_a_new_folder_are_processed(songs, mirror):
+    with Watcher(songs, set_album, debounce=0, show_output=False) as watcher:
+        shutil.copytree(mirror, os.path.join(songs, "more"))
+        result = wait_for_batch(watcher)
+        assert result.written == 6
+        assert all(read_tag(path, "album") == "Watched" for path in mp3_paths(os.path.join(songs, "more")))
+
+
+def test_new_cover_runs_the_pipeline_on_the_files_that_use_it(songs, covers):
+    index = CoverIndex(covers)
+    path = mp3_paths(songs)[3]
+    name = os.path.splitext(os.path.basename(path))[0]
+    os.remove(index.find(name))
+    index.refresh()
+
+    with Watcher(songs, lambda session: session.set_cover_art(index), covers=index, debounce=0,
+                 show_output=False) as watcher:
+        with open(os.path.join(covers, name + ".png"), "wb") as file:
+            file.write(b"\x89PNG\r\n\x1a\n" + os.urandom(64))
+        result = wait_for_batch(watcher)
+        assert result.written == 1
+
+
+def test_directory_must_exist(tmp_path):
+    with pytest.raises(exception.InvalidMP3DirectoryError):
+        Watcher(str(tmp_path / "missing"), set_album)
+
+
+def test_cover_names_are_found_without_prompting(songs, covers, monkeypatch):
+    def no_input(prompt=""):
+        raise AssertionError("The watcher prompted for input")
+
+    monkeypatch.setattr("builtins.input", no_input)
+    path = mp3_paths(songs)[0]
+    tags = EasyID3(path)
+    tags["album"] = "AC/DC Live"
+    tags.save()
+    index = CoverIndex(covers)
+
+    def set_genre(session):
+        session.set_tags_from_dict({Tag.GENRE: "Rock"})
+
+    with Watcher(songs, set_genre, covers=index, cover_template=f"{Tag.ALBUM}", debounce=0,
+                 show_output=False) as watcher:
+        with open(os.path.join(covers, "AC-DC Live.png"), "wb") as file:
+            file.write(b"\x89PNG\r\n\x1a\n" + os.urandom(64))
+        result = wait_for_batch(watcher)
+        assert result.written == 1
+        assert read_tag(path, "genre") == "Rock"